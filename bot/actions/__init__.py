@@ -1,16 +1,18 @@
 from .screenshot import Screenshot
 from .wait import Wait
+from .wait_for import WaitFor
 from .click import ClickPercent, DragPercent, SpiralCameraMoveStep, ResetGemSpiral
 from .find_click import FindAndClick
 from .end import EndCycle
 from .check import CheckTemplate, CheckTemplatesCountAtLeast
-from .cooldown import CooldownGate, SetCooldown, SetCooldownRandom
+from .cooldown import CooldownGate, SetCooldown, SetCooldownRandom, SetCooldownFromText
 from .retry import Retry
 from .ocr import ReadText
 
 __all__ = [
     "Screenshot",
     "Wait",
+    "WaitFor",
     "ClickPercent",
     "DragPercent",
     "SpiralCameraMoveStep",
@@ -22,6 +24,7 @@ __all__ = [
     "CooldownGate",
     "SetCooldown",
     "SetCooldownRandom",
+    "SetCooldownFromText",
     "Retry",
     "ReadText",
 ]
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Optional, Sequence
+from typing import ClassVar, Optional, Sequence
 
 import numpy as np
 import cv2
@@ -17,6 +17,13 @@ from bot.core.image import (
 from bot.core import logs
 
 
+class _CountDetails(dict):
+    """Per-template counts rendered as 'a.png count=1 b.png count=0' only when logged."""
+
+    def __format__(self, spec: str) -> str:
+        return " ".join(f"{k} count={v}" for k, v in self.items())
+
+
 @dataclass
 class CheckTemplate(Action):
     name: str
@@ -27,6 +34,11 @@ class CheckTemplate(Action):
 
     _tpl_cache: dict[str, tuple[np.ndarray, Optional[np.ndarray]]] = None  # type: ignore
 
+    # Reads the frame/context only; the frame stays fresh for the next step
+    frame_safe: ClassVar[bool] = True
+    # No context writes or captures: may overlap other such actions in a "parallel" step
+    parallel_safe: ClassVar[bool] = True
+
     def _ensure_cache(self) -> None:
         if self._tpl_cache is None:
             self._tpl_cache = {}
@@ -70,8 +82,15 @@ class CheckTemplate(Action):
                 if vscore < VERIFY_MIN:
                     found = False
             try:
-                extra = f" v={vscore:.3f}" if vscore > 0 else ""
-                logs.add(f"[CheckTemplate] tpl={fname} score={score:.3f}{extra} found={found}", level="ok" if found else "info")
+                logs.event(
+                    "CheckTemplate",
+                    "tpl={tpl} score={score:.3f} v={v:.3f} found={found}" if vscore > 0 else "tpl={tpl} score={score:.3f} found={found}",
+                    level="ok" if found else "info",
+                    tpl=fname,
+                    score=score,
+                    v=vscore,
+                    found=found,
+                )
             except Exception:
                 pass
             if found:
@@ -129,6 +148,11 @@ class CheckTemplatesCountAtLeast(Action):
 
     _tpl_cache: dict[str, tuple[np.ndarray, Optional[np.ndarray]] ] = None  # type: ignore
 
+    # Reads the frame/context only; the frame stays fresh for the next step
+    frame_safe: ClassVar[bool] = True
+    # No context writes or captures: may overlap other such actions in a "parallel" step
+    parallel_safe: ClassVar[bool] = True
+
     def _ensure_cache(self) -> None:
         if self._tpl_cache is None:
             self._tpl_cache = {}
@@ -198,7 +222,7 @@ class CheckTemplatesCountAtLeast(Action):
         rx, ry, rw, rh = pct_region_to_pixels((width, height), self.region_pct)
 
         total = 0
-        debug_msgs = []
+        counts: dict[str, int] = {}
         # Collect per-template debug data
         per_tpl_verified: dict[str, list[tuple[int, int, float, float]]] = {}
         for fname in self.templates:
@@ -226,9 +250,15 @@ class CheckTemplatesCountAtLeast(Action):
                     verified_list.append((mx, my, float(score), float(vscore)))
             total += verified
             per_tpl_verified[fname] = verified_list
-            debug_msgs.append(f"{fname} count={verified}")
+            counts[fname] = verified
         try:
-            logs.add(f"[CheckTemplatesCount] total={total} need>={self.min_total} details={' '.join(debug_msgs)}", level="info")
+            logs.event(
+                "CheckTemplatesCount",
+                "total={total} need>={need} details={details}",
+                total=total,
+                need=self.min_total,
+                details=_CountDetails(counts),
+            )
         except Exception:
             pass
         # Save annotated matches when debug is enabled
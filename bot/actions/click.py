@@ -2,18 +2,11 @@ from __future__ import annotations
 
 import time
 from dataclasses import dataclass
+from typing import ClassVar
 import random
 
 from bot.core.state_machine import Action, Context
-from bot.core.window import bring_to_front, click_screen_xy
-import bot.config as config
-
-try:
-    import win32api  # type: ignore
-    import win32con  # type: ignore
-except Exception:  # pragma: no cover - environment specific
-    win32api = None  # type: ignore
-    win32con = None  # type: ignore
+from bot.core import inputs
 
 
 @dataclass
@@ -22,16 +15,16 @@ class ClickPercent(Action):
     x_pct: float
     y_pct: float
 
+    # Clicks/drags the game; stamps ctx.last_input_ts
+    sends_input: ClassVar[bool] = True
+
     def run(self, ctx: Context) -> None:
         left, top, width, height = ctx.window_rect
         if width <= 0 or height <= 0:
             return
         x = left + int(max(0.0, min(1.0, self.x_pct)) * width)
         y = top + int(max(0.0, min(1.0, self.y_pct)) * height)
-        if ctx.hwnd is not None:
-            bring_to_front(ctx.hwnd)
-            time.sleep(0.05)
-        click_screen_xy(x, y)
+        inputs.click(ctx, x, y)
 
 
 
@@ -45,10 +38,10 @@ class DragPercent(Action):
     duration_s: float = 0.15  # total drag duration
     steps: int = 8            # intermediate move steps
 
+    # Clicks/drags the game; stamps ctx.last_input_ts
+    sends_input: ClassVar[bool] = True
+
     def run(self, ctx: Context) -> None:
-        # Require Win32 API for dragging
-        if win32api is None or win32con is None:
-            return None
         left, top, width, height = ctx.window_rect
         if width <= 0 or height <= 0:
             return None
@@ -56,57 +49,7 @@ class DragPercent(Action):
         sy = top + int(max(0.0, min(1.0, self.from_y_pct)) * height)
         ex = left + int(max(0.0, min(1.0, self.to_x_pct)) * width)
         ey = top + int(max(0.0, min(1.0, self.to_y_pct)) * height)
-        if ctx.hwnd is not None:
-            bring_to_front(ctx.hwnd)
-            time.sleep(0.05)
-        # Remember cursor and clamp to virtual desktop
-        try:
-            prev_pos = win32api.GetCursorPos()
-        except Exception:
-            prev_pos = None
-        try:
-            # Clamp helpers
-            try:
-                vx = win32api.GetSystemMetrics(76)
-                vy = win32api.GetSystemMetrics(77)
-                vw = win32api.GetSystemMetrics(78)
-                vh = win32api.GetSystemMetrics(79)
-                max_x = vx + max(0, vw - 1)
-                max_y = vy + max(0, vh - 1)
-            except Exception:
-                vx = 0
-                vy = 0
-                max_x = 65535
-                max_y = 65535
-            sx = max(vx, min(sx, max_x))
-            sy = max(vy, min(sy, max_y))
-            ex = max(vx, min(ex, max_x))
-            ey = max(vy, min(ey, max_y))
-            # Go to start, press, interpolate moves, release
-            win32api.SetCursorPos((sx, sy))
-            time.sleep(0.01)
-            win32api.mouse_event(win32con.MOUSEEVENTF_LEFTDOWN, 0, 0, 0, 0)
-            n = max(1, int(self.steps))
-            delay = max(0.0, float(self.duration_s)) / float(n)
-            dx = (ex - sx) / float(n)
-            dy = (ey - sy) / float(n)
-            cx = float(sx)
-            cy = float(sy)
-            for _ in range(n):
-                cx += dx
-                cy += dy
-                win32api.SetCursorPos((int(cx), int(cy)))
-                time.sleep(delay)
-            win32api.SetCursorPos((ex, ey))
-            time.sleep(0.01)
-            win32api.mouse_event(win32con.MOUSEEVENTF_LEFTUP, 0, 0, 0, 0)
-        finally:
-            # Optionally restore the cursor to its previous position
-            if getattr(config.DEFAULT_CONFIG, 'click_snap_back', True) and prev_pos is not None:
-                try:
-                    win32api.SetCursorPos(prev_pos)
-                except Exception:
-                    pass
+        inputs.drag(ctx, sx, sy, ex, ey, self.duration_s, self.steps)
 
 
 
@@ -119,6 +62,9 @@ class SpiralCameraMoveStep(Action):
     # Random starting point jitter from center (fraction of width/height)
     start_jitter_pct: float = 0.02
 
+    # Clicks/drags the game; stamps ctx.last_input_ts
+    sends_input: ClassVar[bool] = True
+
     def run(self, ctx: Context) -> bool:
         # Counters for spiral progression stored on context
         block_len = int(getattr(ctx, "_gem_spiral_block_len", 1))
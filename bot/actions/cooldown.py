@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import ClassVar, Optional, Sequence
 import time
 import random
 
 from bot.core.state_machine import Action, Context
 from bot.core import logs
+from bot.actions.ocr import ReadText
 
 
 def _attr_name(key: str) -> str:
@@ -18,6 +20,8 @@ class SetCooldown(Action):
     key: str
     seconds: float
 
+    frame_safe: ClassVar[bool] = True
+
     def run(self, ctx: Context) -> None:
         try:
             seconds = max(0.0, float(self.seconds))
@@ -40,6 +44,8 @@ class CooldownGate(Action):
     name: str
     key: str
 
+    frame_safe: ClassVar[bool] = True
+
     def run(self, ctx: Context) -> bool:
         try:
             until = float(getattr(ctx, _attr_name(self.key), 0.0))
@@ -60,6 +66,8 @@ class SetCooldownRandom(Action):
     min_seconds: float
     max_seconds: float
 
+    frame_safe: ClassVar[bool] = True
+
     def run(self, ctx: Context) -> None:
         try:
             a = float(self.min_seconds)
@@ -79,3 +87,84 @@ class SetCooldownRandom(Action):
         except Exception:
             pass
         return None
+
+
+@dataclass
+class SetCooldownFromText(Action):
+    """Read a countdown (march return, training done, ...) in ``region_pct`` and
+    set cooldown ``key`` to the time left plus ``margin_s``.
+
+    Pair with CooldownGate so the mode wakes up when the timer runs out instead
+    of on a random guess. Returns True when a timer was read. Otherwise it
+    returns False; the cooldown falls back to a random
+    ``fallback_min_seconds``..``fallback_max_seconds`` when both are set and is
+    left untouched when they are not.
+    """
+
+    name: str
+    key: str
+    region_pct: tuple[float, float, float, float]
+    margin_s: float = 5.0
+    min_seconds: float = 0.0
+    max_seconds: Optional[float] = None
+    fallback_min_seconds: Optional[float] = None
+    fallback_max_seconds: Optional[float] = None
+    # Passed to the underlying ReadText; "digits" is faster but needs a glyph
+    # atlas with ":" (none ships)
+    engine: str = "easyocr"
+    atlas: str = "digits"
+    glyph_threshold: float = 0.6
+    preprocess: Sequence[str] = ("gray", "thresh")
+    langs: Sequence[str] = ("en",)
+
+    frame_safe: ClassVar[bool] = True
+
+    def __post_init__(self) -> None:
+        self._read = ReadText(
+            name=self.name,
+            region_pct=self.region_pct,
+            preprocess=self.preprocess,
+            langs=self.langs,
+            engine=self.engine,
+            atlas=self.atlas,
+            glyph_threshold=self.glyph_threshold,
+        )
+
+    def run(self, ctx: Context) -> bool:
+        started = time.time()
+        try:
+            self._read.run(ctx)
+        except Exception as exc:
+            try:
+                logs.add(f"[CooldownSet] {self.name} read failed: {exc}", level="err")
+            except Exception:
+                pass
+        # Only this run's read counts; a failed read leaves the previous entry behind
+        read = ctx.ocr_reads.get(self.name) or {}
+        remaining = read.get("seconds") if float(read.get("ts", 0.0)) >= started else None
+        if remaining is not None:
+            seconds = float(remaining) + float(self.margin_s)
+            seconds = max(float(self.min_seconds), seconds)
+            if self.max_seconds is not None:
+                seconds = min(float(self.max_seconds), seconds)
+            note = f"timer {int(remaining)}s + {float(self.margin_s):.0f}s"
+        elif self.fallback_min_seconds is not None and self.fallback_max_seconds is not None:
+            a = float(self.fallback_min_seconds)
+            b = float(self.fallback_max_seconds)
+            if b < a:
+                a, b = b, a
+            seconds = random.uniform(a, b)
+            note = f"no timer read, random {a:.1f}-{b:.1f}"
+        else:
+            try:
+                logs.add(f"[CooldownSet] key={self.key} unchanged: no timer read by {self.name}", level="warn")
+            except Exception:
+                pass
+            return False
+        seconds = max(0.0, seconds)
+        setattr(ctx, _attr_name(self.key), time.time() + seconds)
+        try:
+            logs.add(f"[CooldownSet] key={self.key} seconds={seconds:.1f} ({note})", level="info")
+        except Exception:
+            pass
+        return remaining is not None
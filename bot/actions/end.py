@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import ClassVar
 
 from bot.core.state_machine import Action, Context
 
@@ -17,6 +18,7 @@ class EndMachine(Action):
 @dataclass
 class EndCycle(Action):
     name: str
+    frame_safe: ClassVar[bool] = True
 
     def run(self, ctx: Context) -> None:
         # Ask the orchestrator to end the current cycle (e.g., switch to next mode in alternation)
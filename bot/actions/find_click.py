@@ -1,10 +1,9 @@
 from __future__ import annotations
 
-import time
 from datetime import datetime
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional, Sequence, Tuple
+from typing import ClassVar, List, Optional, Sequence, Tuple
 
 import numpy as np
 
@@ -16,7 +15,7 @@ from bot.core.image import (
     masked_zncc,
 )
 from bot.core.state_machine import Action, Context, MatchResult
-from bot.core.window import bring_to_front, click_screen_xy
+from bot.core import inputs
 from bot.core import logs
 
 # ANSI colors for Windows 10+ terminals; ignored if unsupported
@@ -35,6 +34,9 @@ class FindAndClick(Action):
 
     _tpl_cache: dict[str, np.ndarray] = None  # type: ignore
 
+    # Clicks when it returns True; stamps ctx.last_input_ts then
+    sends_input: ClassVar[bool] = True
+
     def _ensure_cache(self) -> None:
         if self._tpl_cache is None:
             self._tpl_cache = {}
@@ -79,28 +81,37 @@ class FindAndClick(Action):
                 #if vscore is less than the verify threshold, set it to the threshold
                 if vscore < self.verify_threshold:
                     try:
-                        logs.add(
-                            f"[VerifyFail] tpl={fname} score={score:.3f} v={vscore:.3f} min={VERIFY_MIN:.2f}",
+                        logs.event(
+                            "VerifyFail",
+                            "tpl={tpl} score={score:.3f} v={v:.3f} min={min:.2f}",
                             level="err",
+                            tpl=fname,
+                            score=score,
+                            v=vscore,
+                            min=VERIFY_MIN,
                         )
                     except Exception:
                         pass
                     found = False
-            msg = (
-                f"[FindAndClick] tpl={fname} score={score:.3f}"
-                + (f" v={vscore:.3f}" if vscore > 0 else "")
-                + f" found={found}"
-            )
-            # Console color (best-effort) and UI log
-            try:
-                color = GREEN if found else RED
-                print(f"{color}{msg}{RESET}")
-            except Exception:
-                pass
+            # UI log (formatted lazily) and console echo for entries that pass the filters
             try:
-                logs.add(msg, level="ok" if found else "err")
+                entry = logs.event(
+                    "FindAndClick",
+                    "tpl={tpl} score={score:.3f} v={v:.3f} found={found}" if vscore > 0 else "tpl={tpl} score={score:.3f} found={found}",
+                    level="ok" if found else "err",
+                    tpl=fname,
+                    score=score,
+                    v=vscore,
+                    found=found,
+                )
             except Exception:
-                pass
+                entry = None
+            if entry is not None:
+                try:
+                    color = GREEN if found else RED
+                    print(f"{color}{entry.text}{RESET}")
+                except Exception:
+                    pass
             if not found:
                 if getattr(ctx, "save_shots", False):
                     try:
@@ -135,10 +146,7 @@ class FindAndClick(Action):
                 template_wh=(tpl_w, tpl_h),
                 roi_win_offset_xy=(roi_xywh[0], roi_xywh[1]),
             )
-            if ctx.hwnd is not None:
-                bring_to_front(ctx.hwnd)
-                time.sleep(0.05)
-            click_screen_xy(screen_x, screen_y)
+            inputs.click(ctx, screen_x, screen_y)
             if getattr(ctx, "save_shots", False):
                 try:
                     out_dir = getattr(ctx, "shots_dir", Path("debug_captures"))
@@ -1,20 +1,27 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Optional, Sequence
+from typing import Callable, ClassVar, Optional, Sequence, Tuple
+from pathlib import Path
 import difflib
+import time
 
 import cv2
-try:
-    import easyocr  # type: ignore
-    HAS_EASYOCR = True
-except Exception:  # pragma: no cover
-    easyocr = None  # type: ignore
-    HAS_EASYOCR = False
 
 from bot.core.state_machine import Action, Context
 from bot.core.image import pct_region_to_pixels
 from bot.core import logs
+from bot.core import digits
+from bot.core import ocr as ocr_service
+from bot.core.ocr import HAS_EASYOCR
+import bot.config as config
+
+
+ENGINES = ("easyocr", "digits")
+
+
+def _no_writes() -> None:
+    pass
 
 
 @dataclass
@@ -26,65 +33,135 @@ class ReadText(Action):
     ocr_config: Optional[str] = None
     preprocess: Sequence[str] = ("gray", "thresh")
     langs: Sequence[str] = ("en",)
+    # How long to wait for the shared reader if it is still loading; the read
+    # is skipped (as if no text) rather than stalling the cycle
+    reader_wait_s: float = 0.0
+    # "easyocr", or "digits" for numeric HUD text read against the glyph atlas
+    # in <templates_dir>/glyphs/<atlas>/ (no ML model, about a millisecond)
+    engine: str = "easyocr"
+    atlas: str = "digits"
+    glyph_threshold: float = 0.6
+
+    # Reads the frame/context only; the frame stays fresh for the next step
+    frame_safe: ClassVar[bool] = True
+    # No captures, and its context writes are deferred (run_deferred): may overlap
+    # other such actions in a "parallel" step
+    parallel_safe: ClassVar[bool] = True
+
+    def __post_init__(self) -> None:
+        if self.engine not in ENGINES:
+            raise ValueError(f"engine must be one of {', '.join(ENGINES)}")
+        # Start loading the shared reader as soon as a machine using it is built
+        if self.engine == "easyocr" and HAS_EASYOCR and bool(getattr(config.DEFAULT_CONFIG, "ocr_preload", True)):
+            try:
+                ocr_service.preload(self.langs)
+            except Exception:
+                pass
+
+    def _read_easyocr(self, roi) -> Optional[str]:
+        # Unchanged HUD regions come straight from the result cache
+        started = time.time()
+        key = ocr_service.cache_key(roi, tuple(self.preprocess), ocr_service.lang_key(self.langs))
+        results = ocr_service.cached(key)
+        if results is None:
+            img = roi.copy()
+            for step in self.preprocess:
+                if step == "gray":
+                    img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+                elif step == "thresh":
+                    img = cv2.fastNlMeansDenoising(img) if img.ndim == 2 else img
+                    _, img = cv2.threshold(img, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+                elif step == "invert":
+                    img = cv2.bitwise_not(img)
+            if img.ndim == 2:
+                proc = cv2.cvtColor(img, cv2.COLOR_GRAY2RGB)
+            else:
+                proc = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+            try:
+                results = ocr_service.readtext(proc, self.langs, wait_s=max(0.0, float(self.reader_wait_s)))
+            except Exception as exc:
+                logs.add(f"[OCR] easyocr error in {self.name}: {exc}", level="err")
+                return None
+            if results is None:
+                logs.add(f"[OCR] reader still loading; skipped {self.name}", level="warn")
+                return None
+            ocr_service.remember(key, results, time.time() - started)
+        return " ".join([res[1] for res in results]).strip()
+
+    def _read_digits(self, ctx: Context, roi) -> Optional[str]:
+        folder = Path(ctx.templates_dir) / "glyphs" / self.atlas
+        glyphs = digits.load_atlas(folder)
+        if not glyphs:
+            logs.add(f"[OCR] glyph atlas {folder.as_posix()} is empty for {self.name}", level="err")
+            return None
+        text, worst = digits.read(roi, glyphs, float(self.glyph_threshold))
+        if "?" in text:
+            logs.add(f"[OCR] {self.name}: unrecognized glyph (worst score {worst:.2f})", level="warn")
+        return text
 
     def run(self, ctx: Context) -> Optional[bool]:
-        if not HAS_EASYOCR or easyocr is None:
+        result, commit = self.run_deferred(ctx)
+        commit()
+        return result
+
+    def run_deferred(self, ctx: Context) -> Tuple[Optional[bool], Callable[[], None]]:
+        """Read the region without touching ``ctx``; returns the result and a
+        callable that stores the read on ``ctx``. Parallel steps call the
+        callables after all actions finished, in declaration order."""
+        result = self._read(ctx)
+        if result is None:
+            return None, _no_writes
+        ok, text, value, seconds, ts = result
+
+        def commit() -> None:
+            try:
+                ctx.last_ocr_text = text
+                ctx.last_ocr_int = value
+                ctx.last_ocr_seconds = seconds
+                ctx.ocr_reads[self.name] = {"text": text, "int": value, "seconds": seconds, "ts": ts}
+            except Exception:
+                pass
+
+        return ok, commit
+
+    def _read(self, ctx: Context) -> Optional[tuple]:
+        """(result, text, int, seconds, ts), or None when nothing was read (an
+        ``expected`` read then fails)."""
+        miss = (False, None, None, None, 0.0) if self.expected else None
+        if self.engine == "easyocr" and not HAS_EASYOCR:
             logs.add(f"[OCR] easyocr not available for {self.name}", level="err")
-            return False if self.expected else None
+            return miss
         if ctx.frame_bgr is None:
             logs.add(f"[OCR] frame missing for {self.name}", level="err")
-            return False if self.expected else None
+            return miss
         left, top, width, height = ctx.window_rect
         if width <= 0 or height <= 0:
             logs.add(f"[OCR] invalid window rect for {self.name}", level="err")
-            return False if self.expected else None
+            return miss
         rx, ry, rw, rh = pct_region_to_pixels((width, height), self.region_pct)
         if rw <= 0 or rh <= 0:
             logs.add(f"[OCR] empty region for {self.name}", level="err")
-            return False if self.expected else None
+            return miss
         frame = ctx.frame_bgr
         if ry + rh > frame.shape[0] or rx + rw > frame.shape[1]:
             logs.add(f"[OCR] region outside frame for {self.name}", level="err")
-            return False if self.expected else None
+            return miss
         roi = frame[ry:ry + rh, rx:rx + rw]
-        img = roi.copy()
-        for step in self.preprocess:
-            if step == "gray":
-                img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            elif step == "thresh":
-                img = cv2.fastNlMeansDenoising(img) if img.ndim == 2 else img
-                _, img = cv2.threshold(img, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-            elif step == "invert":
-                img = cv2.bitwise_not(img)
-        if img.ndim == 2:
-            proc = cv2.cvtColor(img, cv2.COLOR_GRAY2RGB)
+        if self.engine == "digits":
+            text = self._read_digits(ctx, roi)
         else:
-            proc = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        reader = getattr(self, "_reader", None)
-        if reader is None:
-            try:
-                langs = list(self.langs) if hasattr(self, "langs") else ["en"]
-                reader = easyocr.Reader(langs, gpu=False)
-                self._reader = reader
-            except Exception as exc:
-                logs.add(f"[OCR] easyocr init failed for {self.name}: {exc}", level="err")
-                return False if self.expected else None
-        try:
-            results = reader.readtext(proc)
-        except Exception as exc:
-            logs.add(f"[OCR] easyocr error in {self.name}: {exc}", level="err")
-            return False if self.expected else None
-        text = " ".join([res[1] for res in results]).strip()
-        try:
-            setattr(ctx, "last_ocr_text", text)
-        except Exception:
-            pass
+            text = self._read_easyocr(roi)
+        if text is None:
+            return miss
+        value = digits.parse_int(text)
+        seconds = digits.parse_duration(text)
+        ts = time.time()
         logs.add(f"[OCR] {self.name} -> '{text}'", level="info")
         if self.expected is None:
-            return None
+            return None, text, value, seconds, ts
         expected_norm = self.expected.strip().lower()
         actual_norm = text.lower()
         ratio = difflib.SequenceMatcher(None, actual_norm, expected_norm).ratio()
         ok = ratio >= self.min_ratio
         logs.add(f"[OCR] compare '{actual_norm}' vs '{expected_norm}' ratio={ratio:.2f}", level="ok" if ok else "err")
-        return ok
+        return ok, text, value, seconds, ts
@@ -1,49 +1,179 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Sequence, Optional
+from typing import ClassVar, Sequence, Optional
+import random
 import time
 
-from bot.core.state_machine import Action, Context
+import numpy as np
+
+from bot.core.state_machine import Action, Context, note_action_ran
+from bot.core.image import pct_region_to_pixels
+from bot.actions.screenshot import StepCapture, _union_region_pct, action_regions
 from bot.core.window import bring_to_front, find_window_by_title_substr
 from bot.core import logs
 
 
+BACKOFF_POLICIES = ("none", "fixed", "exponential", "jittered")
+# Thumbnails are sampled every N pixels in each direction for change detection
+_THUMB_STRIDE = 8
+
+
+def backoff_delay(policy: str, attempt: int, delay_s: float, factor: float, max_delay_s: float) -> float:
+    """Pause before attempt ``attempt + 1`` (``attempt`` counts from 1)."""
+    if policy == "fixed":
+        delay = delay_s
+    elif policy in ("exponential", "jittered"):
+        delay = delay_s * (max(1.0, factor) ** (attempt - 1))
+        if policy == "jittered":
+            # Equal jitter: keep at least half the exponential delay
+            delay *= random.uniform(0.5, 1.0)
+    else:
+        return 0.0
+    return max(0.0, min(float(max_delay_s), delay))
+
+
+def _covers(roi: Optional[Sequence[float]], region: Optional[Sequence[float]]) -> bool:
+    """Whether a frame captured with ``roi`` (None = full client) holds all of ``region``."""
+    if roi is None:
+        return True
+    if region is None:
+        return False
+    rx, ry, rw, rh = (float(v) for v in roi)
+    x, y, w, h = (float(v) for v in region)
+    return rx <= x and ry <= y and x + w <= rx + rw and y + h <= ry + rh
+
+
 @dataclass
 class Retry(Action):
     name: str
     actions: Sequence[Action]
     attempts: int = 3
+    # Optional capture policy run before each attempt ("fresh" | "reuse" | "roi")
+    capture: Optional[str] = None
+    # Pause between attempts: none | fixed | exponential | jittered
+    backoff: str = "none"
+    delay_s: float = 0.5
+    factor: float = 2.0
+    max_delay_s: float = 4.0
+    # Give up once this much time has passed since the first attempt (None = no limit)
+    deadline_s: Optional[float] = None
+    # Fail early when a new capture shows the same screen as the last failed attempt
+    # (mean absolute difference of the inner actions' regions below the tolerance)
+    exit_if_unchanged: bool = False
+    unchanged_tolerance: float = 2.0
+
+    # Inner actions mark the frame stale themselves
+    frame_safe: ClassVar[bool] = True
+
+    def __post_init__(self) -> None:
+        if self.backoff not in BACKOFF_POLICIES:
+            raise ValueError(f"backoff must be one of {', '.join(BACKOFF_POLICIES)}")
+        regions = action_regions(self.actions)
+        self._capture = StepCapture(self.capture, regions) if self.capture else None
+        self._watch_region = _union_region_pct(regions)
+
+    def _thumb(self, ctx: Context) -> Optional[np.ndarray]:
+        frame = ctx.frame_bgr
+        if frame is None:
+            return None
+        # ROI captures are black outside their region; only compare frames that
+        # actually contain the watched pixels (a full capture, or an ROI around them)
+        if not _covers(ctx.frame_roi_pct, self._watch_region):
+            return None
+        try:
+            if self._watch_region is not None:
+                _l, _t, width, height = ctx.window_rect
+                rx, ry, rw, rh = pct_region_to_pixels((width, height), self._watch_region)
+                if rw > 0 and rh > 0:
+                    frame = frame[ry : ry + rh, rx : rx + rw]
+            return frame[::_THUMB_STRIDE, ::_THUMB_STRIDE].astype(np.int16)
+        except Exception:
+            return None
+
+    def _unchanged(self, prev: Optional[np.ndarray], cur: Optional[np.ndarray]) -> bool:
+        if prev is None or cur is None or prev.shape != cur.shape:
+            return False
+        try:
+            return float(np.mean(np.abs(cur - prev))) < float(self.unchanged_tolerance)
+        except Exception:
+            return False
+
+    def _sleep(self, ctx: Context, seconds: float) -> None:
+        end_by = time.time() + seconds
+        while time.time() < end_by:
+            if ctx.stop_event.is_set():
+                return
+            try:
+                if getattr(ctx, "pause_event", None) is not None and ctx.pause_event.is_set():
+                    end_by += 0.05
+                    time.sleep(0.05)
+                    continue
+            except Exception:
+                pass
+            time.sleep(min(0.01, max(0.0, end_by - time.time())))
 
     def run(self, ctx: Context) -> Optional[bool]:
         tries = max(1, int(self.attempts))
+        started = time.time()
+        deadline = started + float(self.deadline_s) if self.deadline_s is not None else None
+        failed_thumb: Optional[np.ndarray] = None
         for i in range(1, tries + 1):
             if ctx.stop_event.is_set():
                 return False
+            if deadline is not None and i > 1 and time.time() >= deadline:
+                try:
+                    logs.add(f"[RetryFail] {self.name} deadline {self.deadline_s:.1f}s reached after {i - 1} attempts", level="err")
+                except Exception:
+                    pass
+                return False
             try:
-                logs.add(f"[Retry] {self.name} attempt {i}/{tries}")
+                logs.event("Retry", "{name} attempt {i}/{tries}", name=self.name, i=i, tries=tries)
             except Exception:
                 pass
             last_result: Optional[bool] = None
-            for act in self.actions:
-                if ctx.stop_event.is_set():
-                    return False
-                # Time the inner action (update telemetry like GraphState)
-                start = time.time()
-                ctx.last_action_name = act.name
+            seen_captures = ctx.captures_taken
+            thumb: Optional[np.ndarray] = None
+            if self._capture is not None:
                 try:
-                    res = act.run(ctx)
+                    self._capture.run(ctx)
                 except Exception as exc:
                     try:
-                        logs.add(f"[ActionError] {act.name} in Retry:{self.name}: {exc}", level="err")
+                        logs.add(f"[ActionError] capture in Retry:{self.name}: {exc}", level="err")
                     except Exception:
                         pass
-                    res = None
-                dur = time.time() - start
-                ctx.last_action_duration_s = dur
-                ctx.last_progress_ts = time.time()
-                if res is not None:
-                    last_result = res
+            for act in [None, *self.actions]:
+                if act is not None:
+                    if ctx.stop_event.is_set():
+                        return False
+                    # Time the inner action (update telemetry like GraphState)
+                    start = time.time()
+                    ctx.last_action_name = act.name
+                    try:
+                        res = act.run(ctx)
+                        note_action_ran(ctx, act, res)
+                    except Exception as exc:
+                        ctx.frame_stale = True
+                        try:
+                            logs.add(f"[ActionError] {act.name} in Retry:{self.name}: {exc}", level="err")
+                        except Exception:
+                            pass
+                        res = None
+                    dur = time.time() - start
+                    ctx.last_action_duration_s = dur
+                    ctx.last_progress_ts = time.time()
+                    if res is not None:
+                        last_result = res
+                # A new frame arrived: compare it with the one the last attempt failed on
+                if self.exit_if_unchanged and ctx.captures_taken != seen_captures:
+                    seen_captures = ctx.captures_taken
+                    thumb = self._thumb(ctx)
+                    if self._unchanged(failed_thumb, thumb):
+                        try:
+                            logs.add(f"[RetryFail] {self.name} screen unchanged on attempt {i}/{tries}; giving up", level="err")
+                        except Exception:
+                            pass
+                        return False
             # Success if any inner action signaled success (commonly the matcher)
             if bool(last_result):
                 try:
@@ -51,6 +181,14 @@ class Retry(Action):
                 except Exception:
                     pass
                 return True
+            if thumb is not None:
+                failed_thumb = thumb
+            if i < tries:
+                delay = backoff_delay(self.backoff, i, float(self.delay_s), float(self.factor), float(self.max_delay_s))
+                if deadline is not None:
+                    delay = min(delay, max(0.0, deadline - time.time()))
+                if delay > 0:
+                    self._sleep(ctx, delay)
         try:
             logs.add(f"[RetryFail] {self.name} failed after {tries} attempts", level="err")
         except Exception:
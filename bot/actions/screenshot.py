@@ -1,26 +1,20 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Optional
+from typing import ClassVar, Optional, Sequence
 from pathlib import Path
 from datetime import datetime
+import time
 
 import mss
 import numpy as np
 
 from bot.core.state_machine import Action, Context
-from bot.core.window import (
-    find_window_by_title_substr,
-    get_client_rect_screen,
-    set_window_client_size,
-    move_window_xy,
-    get_monitor_rect_for_window,
-)
+from bot.core.image import pct_region_to_pixels
+from bot.core import geometry, inputs, window_locator
+from bot.core.window import print_window_client
+from bot.core.window_locator import locate
 import bot.config as config
-try:
-    import win32gui  # type: ignore
-except Exception:  # pragma: no cover - optional at runtime
-    win32gui = None  # type: ignore
 
 
 @dataclass
@@ -30,144 +24,246 @@ class Screenshot(Action):
     # Caching and reusing across start/stop (new threads) can cause attribute errors like
     # "'_thread._local' object has no attribute 'srcdc'". Use a fresh instance per call.
 
+    # Only reads the screen; does not invalidate the frame it produces
+    frame_safe: ClassVar[bool] = True
+
     def run(self, ctx: Context) -> None:
-        hwnd = ctx.hwnd
-        if hwnd is None:
-            hwnd = find_window_by_title_substr(ctx.window_title_substr)
-            if hwnd is None:
-                return  # window not found yet
-            ctx.hwnd = hwnd
-
-        # Try to enforce desired client size once per grab if configured
-        try:
-            target_w = int(getattr(config.DEFAULT_CONFIG, 'force_window_width', 0))
-            target_h = int(getattr(config.DEFAULT_CONFIG, 'force_window_height', 0))
-        except Exception:
-            target_w = target_h = 0
-        try:
-            do_resize = bool(getattr(config.DEFAULT_CONFIG, 'force_window_resize', True))
-        except Exception:
-            do_resize = True
-        if do_resize and target_w > 0 and target_h > 0:
+        # A full frame grabbed moments ago with no click/drag/wait since shows the
+        # same screen (e.g. the previous step's capture); hand it out once instead
+        # of grabbing again
+        me = id(self)
+        if (
+            ctx.frame_bgr is not None
+            and not ctx.frame_stale
+            and ctx.frame_roi_pct is None
+            and me not in ctx.frame_users
+            and time.time() - ctx.frame_ts <= FRESH_FRAME_MAX_AGE_S
+        ):
+            ctx.frame_users.add(me)
             try:
-                rect_now = get_client_rect_screen(hwnd)
-                # Determine desired adjustments
-                needs_resize = (rect_now.width != target_w or rect_now.height != target_h)
-                try:
-                    is_zoomed = bool(win32gui and win32gui.IsZoomed(hwnd))  # maximized
-                except Exception:
-                    is_zoomed = False
-                # If size mismatch OR window is maximized, enforce target client size (also restores)
-                if needs_resize or is_zoomed:
-                    set_window_client_size(hwnd, target_w, target_h)
-                    rect_now = get_client_rect_screen(hwnd)
-                # Independently ensure position is top-left of its monitor, or if it was maximized
-                try:
-                    mon = get_monitor_rect_for_window(hwnd, work_area=False)
-                    needs_move = (rect_now.left != mon.left+100 or rect_now.top != mon.top)
-                except Exception:
-                    mon = None
-                    needs_move = False
-                if (needs_move or is_zoomed) and mon is not None:
-                    try:
-                        move_window_xy(hwnd, mon.left+100, mon.top)
-                        rect_now = get_client_rect_screen(hwnd)
-                    except Exception:
-                        pass
-                rect = rect_now
+                ctx.captures_skipped += 1
             except Exception:
-                rect = get_client_rect_screen(hwnd)
-        else:
-            rect = get_client_rect_screen(hwnd)
-            # If resizing is disabled, log current resolution once for visibility
-            if not do_resize:
-                try:
-                    from bot.core import logs as _logs
-                    if not getattr(ctx, "_res_logged", False):
-                        _logs.add(f"[Resolution] Client area {rect.width}x{rect.height}", level="info")
-                        setattr(ctx, "_res_logged", True)
-                except Exception:
-                    pass
-        if rect.width <= 0 or rect.height <= 0:
+                pass
             return
+        if capture_frame(ctx):
+            ctx.frame_users.add(me)
 
-        monitor = {
-            "left": rect.left,
-            "top": rect.top,
-            "width": rect.width,
-            "height": rect.height,
-        }
-        # Reuse a per-thread mss instance stored in context to avoid GDI leaks
-        # Periodically refresh the handle to prevent long‑running resource buildup on Windows.
-        sct = getattr(ctx, "_mss", None)
-        grab_count = int(getattr(ctx, "_mss_grab_count", 0))
-        # Refresh every N grabs as a stability guard (tunable; conservative default)
-        REFRESH_EVERY = 1200  # ~ every 20–30 minutes depending on loop cadence
-        need_refresh = (sct is not None) and (grab_count >= REFRESH_EVERY)
-        if sct is None or need_refresh:
-            # Dispose old handle if refreshing
-            if need_refresh:
-                try:
-                    sct.close()
-                except Exception:
-                    pass
-                try:
-                    setattr(ctx, "_mss", None)
-                except Exception:
-                    pass
+
+def _union_region_pct(regions: Sequence[Sequence[float]]) -> Optional[tuple[float, float, float, float]]:
+    boxes = []
+    for r in regions:
+        try:
+            x, y, w, h = (float(v) for v in r)
+        except Exception:
+            continue
+        if w > 0 and h > 0:
+            boxes.append((x, y, x + w, y + h))
+    if not boxes:
+        return None
+    x0 = max(0.0, min(b[0] for b in boxes))
+    y0 = max(0.0, min(b[1] for b in boxes))
+    x1 = min(1.0, max(b[2] for b in boxes))
+    y1 = min(1.0, max(b[3] for b in boxes))
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+def action_regions(actions: Sequence[object]) -> list:
+    """region_pct of every action (recursing into Retry-style ``actions``)."""
+    out = []
+    for act in actions:
+        region = getattr(act, "region_pct", None)
+        if region is not None:
+            out.append(region)
+        inner = getattr(act, "actions", None)
+        if inner:
+            out.extend(action_regions(inner))
+    return out
+
+
+# A frame captured with no screen-changing action since counts as fresh for this long
+FRESH_FRAME_MAX_AGE_S = 0.5
+CAPTURE_MODES = ("fresh", "reuse", "roi")
+
+
+class StepCapture:
+    """Step-level capture policy attached to a GraphStep (or run per Retry attempt).
+
+    fresh: full capture unless the current full frame is still fresh.
+    reuse: use whatever frame exists; capture only when there is none.
+    roi:   like fresh, but grab only the union of the step's action regions.
+    """
+
+    __slots__ = ("mode", "region_pct")
+
+    def __init__(self, mode: str, regions: Sequence[Sequence[float]] = ()) -> None:
+        if mode not in CAPTURE_MODES:
+            raise ValueError(f"capture must be one of {', '.join(CAPTURE_MODES)}")
+        self.mode = mode
+        self.region_pct = _union_region_pct(regions) if mode == "roi" else None
+
+    def run(self, ctx: Context) -> None:
+        frame = ctx.frame_bgr
+        if self.mode == "reuse":
+            if frame is None:
+                capture_frame(ctx)
+            return
+        roi = self.region_pct
+        if frame is not None and not ctx.frame_stale and time.time() - ctx.frame_ts <= FRESH_FRAME_MAX_AGE_S:
+            # Skip when the existing frame already covers what this step reads
+            if ctx.frame_roi_pct is None or ctx.frame_roi_pct == roi:
                 try:
-                    from bot.core import logs as _logs
-                    _logs.add("[Screenshot] Refreshed capture handle after periodic threshold", level="info")
+                    ctx.captures_skipped += 1
                 except Exception:
                     pass
-                grab_count = 0
+                return
+        capture_frame(ctx, roi)
+
+
+def _capture_failed(hwnd: int) -> None:
+    # Re-check the cached rect and the cached hwnd itself on the next capture
+    geometry.invalidate(hwnd)
+    window_locator.expire(hwnd)
+
+
+def capture_frame(ctx: Context, roi_pct: Optional[tuple[float, float, float, float]] = None) -> bool:
+    """Grab the game client area into ``ctx.frame_bgr``; True when a frame was captured.
+
+    With ``roi_pct`` only that part of the client area is grabbed; the frame
+    keeps full client size (pixels outside the region are black) so match
+    coordinates stay the same.
+    """
+    # Cached and re-validated by the locator; enumerates only when the window changed
+    hwnd = locate(ctx.window_title_substr, hint=ctx.hwnd, owner=ctx.instance_id or None)
+    if hwnd is None:
+        return False  # window not found yet
+    ctx.hwnd = hwnd
+
+    # Size/position enforcement runs in the geometry watcher; read its cached rect
+    rect = geometry.client_rect(hwnd)
+    # If resizing is disabled, log current resolution once for visibility
+    if not bool(getattr(config.DEFAULT_CONFIG, 'force_window_resize', True)):
+        try:
+            from bot.core import logs as _logs
+            if not getattr(ctx, "_res_logged", False):
+                _logs.add(f"[Resolution] Client area {rect.width}x{rect.height}", level="info")
+                setattr(ctx, "_res_logged", True)
+        except Exception:
+            pass
+    if rect.width <= 0 or rect.height <= 0:
+        # Minimized or gone: re-check on the next capture instead of the next watcher tick
+        _capture_failed(hwnd)
+        return False
+
+    monitor = {
+        "left": rect.left,
+        "top": rect.top,
+        "width": rect.width,
+        "height": rect.height,
+    }
+    roi_xywh = None
+    if roi_pct is not None:
+        rx, ry, rw, rh = pct_region_to_pixels((rect.width, rect.height), roi_pct)
+        if rw > 0 and rh > 0 and (rw, rh) != (rect.width, rect.height):
+            roi_xywh = (rx, ry, rw, rh)
+            monitor = {"left": rect.left + rx, "top": rect.top + ry, "width": rw, "height": rh}
+    if inputs.capture_backend() == "window":
+        # Render the window itself; works while it is covered by other windows.
+        # The whole client area is rendered either way, so keep the full frame.
+        raw = print_window_client(hwnd, rect.width, rect.height)
+        if raw is None:
+            _capture_failed(hwnd)
+            return False
+        return _store_frame(ctx, raw, rect, roi_pct, None)
+    # Reuse a per-thread mss instance stored in context to avoid GDI leaks
+    # Periodically refresh the handle to prevent long‑running resource buildup on Windows.
+    sct = getattr(ctx, "_mss", None)
+    grab_count = int(getattr(ctx, "_mss_grab_count", 0))
+    # Refresh every N grabs as a stability guard (tunable; conservative default)
+    REFRESH_EVERY = 1200  # ~ every 20–30 minutes depending on loop cadence
+    need_refresh = (sct is not None) and (grab_count >= REFRESH_EVERY)
+    if sct is None or need_refresh:
+        # Dispose old handle if refreshing
+        if need_refresh:
             try:
-                sct = mss.mss()
-                setattr(ctx, "_mss", sct)
+                sct.close()
             except Exception:
-                return
+                pass
+            try:
+                setattr(ctx, "_mss", None)
+            except Exception:
+                pass
+            try:
+                from bot.core import logs as _logs
+                _logs.add("[Screenshot] Refreshed capture handle after periodic threshold", level="info")
+            except Exception:
+                pass
+            grab_count = 0
+        try:
+            sct = mss.mss()
+            setattr(ctx, "_mss", sct)
+        except Exception:
+            return False
+    try:
+        raw = np.array(sct.grab(monitor))  # BGRA
+        # Bump grab counter
+        grab_count += 1
+        try:
+            setattr(ctx, "_mss_grab_count", grab_count)
+        except Exception:
+            pass
+    except Exception as exc:
+        try:
+            from bot.core import logs
+            logs.add(f"[ScreenshotError] grab failed: {exc}", level="err")
+        except Exception:
+            pass
+        # On grab failure, try to recreate the mss handle once
         try:
-            raw = np.array(sct.grab(monitor))  # BGRA
-            # Bump grab counter
-            grab_count += 1
+            # Dispose existing first (best effort)
+            try:
+                sct.close()
+            except Exception:
+                pass
+            try:
+                setattr(ctx, "_mss", None)
+            except Exception:
+                pass
+            sct = mss.mss()
+            setattr(ctx, "_mss", sct)
+            raw = np.array(sct.grab(monitor))
+            grab_count = 1
             try:
                 setattr(ctx, "_mss_grab_count", grab_count)
             except Exception:
                 pass
-        except Exception as exc:
+        except Exception as exc2:
             try:
                 from bot.core import logs
-                logs.add(f"[ScreenshotError] grab failed: {exc}", level="err")
+                logs.add(f"[ScreenshotError] recreate failed: {exc2}", level="err")
             except Exception:
                 pass
-            # On grab failure, try to recreate the mss handle once
-            try:
-                # Dispose existing first (best effort)
-                try:
-                    sct.close()
-                except Exception:
-                    pass
-                try:
-                    setattr(ctx, "_mss", None)
-                except Exception:
-                    pass
-                sct = mss.mss()
-                setattr(ctx, "_mss", sct)
-                raw = np.array(sct.grab(monitor))
-                grab_count = 1
-                try:
-                    setattr(ctx, "_mss_grab_count", grab_count)
-                except Exception:
-                    pass
-            except Exception as exc2:
-                try:
-                    from bot.core import logs
-                    logs.add(f"[ScreenshotError] recreate failed: {exc2}", level="err")
-                except Exception:
-                    pass
-                return
+            # The window may have moved off the cached rect
+            _capture_failed(hwnd)
+            return False
+    return _store_frame(ctx, raw, rect, roi_pct, roi_xywh)
+
+
+def _store_frame(ctx: Context, raw: np.ndarray, rect, roi_pct, roi_xywh) -> bool:
+    if roi_xywh is None:
         frame_bgr = raw[:, :, :3]
-        ctx.frame_bgr = frame_bgr
-        ctx.window_rect = rect.to_tuple()
-        # Intentionally do not save raw screenshots here to avoid disk spam.
-        # Use debug saves in matcher actions when an object is actually found.
+    else:
+        rx, ry, rw, rh = roi_xywh
+        frame_bgr = np.zeros((rect.height, rect.width, 3), dtype=np.uint8)
+        frame_bgr[ry : ry + rh, rx : rx + rw] = raw[:rh, :rw, :3]
+    ctx.frame_bgr = frame_bgr
+    ctx.window_rect = rect.to_tuple()
+    ctx.frame_ts = time.time()
+    ctx.frame_stale = False
+    ctx.frame_roi_pct = roi_pct if roi_xywh is not None else None
+    ctx.frame_users = set()
+    ctx.captures_taken += 1
+    # Intentionally do not save raw screenshots here to avoid disk spam.
+    # Use debug saves in matcher actions when an object is actually found.
+    return True
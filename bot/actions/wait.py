@@ -2,10 +2,13 @@ from __future__ import annotations
 
 import time
 from dataclasses import dataclass
+from typing import Optional, Sequence
 import random
 
 from bot.core.state_machine import Action, Context
 from bot.core import logs
+from bot.core import latency
+import bot.config as config
 
 
 @dataclass
@@ -14,25 +17,26 @@ class Wait(Action):
     seconds: float
     # When True (default), add a small random extra delay to feel less robotic
     randomize: bool = True
+    # Adaptive mode: learn how long the game takes to show ``probe_templates``
+    # in ``probe_region_pct`` after the last click, and wait for a high
+    # percentile of that (clamped to [min_seconds, max_seconds]) instead of
+    # ``seconds``. Every ``probe_every``-th run (and every run until enough
+    # samples exist) polls for the template to collect a new sample.
+    adaptive: bool = False
+    probe_templates: Sequence[str] = ()
+    probe_region_pct: Optional[tuple[float, float, float, float]] = None
+    threshold: float = 0.85
+    verify_threshold: float = 0.85
+    min_seconds: float = 0.2
+    max_seconds: Optional[float] = None
+    probe_every: int = 10
 
-    def run(self, ctx: Context) -> None:
-        if bool(self.randomize):
-            jitter = random.uniform(0.0, 2.0)
-        else:
-            jitter = 0.0
-        total = max(0.0, float(self.seconds) + float(jitter))
+    def __post_init__(self) -> None:
+        self._runs = 0
+        self._probe = None
+
+    def _sleep(self, ctx: Context, total: float) -> None:
         end_by = time.time() + total
-        try:
-            if jitter > 0.0:
-                print(f"[Wait] wait {total:.2f}s (base {self.seconds:.2f}s + {jitter:.2f}s)")
-            else:
-                print(f"[Wait] wait {total:.2f}s (no jitter)")
-        except Exception:
-            pass
-        try:
-            logs.add(f"[Wait] {total:.2f}s", level="info")
-        except Exception:
-            pass
         while time.time() < end_by:
             if ctx.stop_event.is_set():
                 break
@@ -44,3 +48,69 @@ class Wait(Action):
             except Exception:
                 pass
             time.sleep(0.01)
+
+    def _adaptive_enabled(self) -> bool:
+        if not self.adaptive or not self.probe_templates or self.probe_region_pct is None:
+            return False
+        return bool(getattr(config.DEFAULT_CONFIG, "adaptive_waits", True))
+
+    def _run_probe(self, ctx: Context, key: str, ceiling: float) -> None:
+        if self._probe is None:
+            from bot.actions.wait_for import WaitFor
+
+            self._probe = WaitFor(
+                name=f"{self.name}_probe",
+                templates=list(self.probe_templates),
+                region_pct=tuple(self.probe_region_pct),  # type: ignore[arg-type]
+                threshold=self.threshold,
+                verify_threshold=self.verify_threshold,
+                min_interval_s=0.05,
+                max_interval_s=0.25,
+            )
+        self._probe.timeout_s = ceiling
+        started = time.time()
+        found = self._probe.run(ctx)
+        if found:
+            # Latency counts from the click that triggered the screen change when
+            # it happened just before this wait, else from the start of the wait
+            since = ctx.last_input_ts if 0.0 < started - ctx.last_input_ts < 5.0 else started
+            latency.record(key, time.time() - since)
+        elif not ctx.stop_event.is_set():
+            # Timed out: the UI took at least the ceiling. Record that (censored)
+            # value so slow responses raise the estimate instead of going unseen
+            latency.record(key, ceiling)
+
+    def run(self, ctx: Context) -> None:
+        base = float(self.seconds)
+        if self._adaptive_enabled():
+            self._runs += 1
+            key = latency.key_for(getattr(ctx, "active_machine_key", None), ctx.current_graph_step, self.name)
+            ceiling = float(self.max_seconds) if self.max_seconds is not None else max(base * 2.0, base + 2.0)
+            if latency.count(key) < latency.MIN_SAMPLES or self._runs % max(1, int(self.probe_every)) == 0:
+                # Probing returns once the template shows (bounded by the ceiling)
+                self._run_probe(ctx, key, ceiling)
+                return None
+            q = float(getattr(config.DEFAULT_CONFIG, "adaptive_wait_percentile", 0.95))
+            base = latency.suggest(key, base, float(self.min_seconds), ceiling, q)
+            # Keep jitter proportional so it doesn't swamp a short learned wait
+            jitter_cap = min(2.0, 0.25 * base)
+        else:
+            jitter_cap = 2.0
+        if bool(self.randomize):
+            jitter = random.uniform(0.0, jitter_cap)
+        else:
+            jitter = 0.0
+        total = max(0.0, base + float(jitter))
+        try:
+            entry = logs.event("Wait", "{total:.2f}s", total=total, base=base, jitter=jitter)
+        except Exception:
+            entry = None
+        if entry is not None:
+            try:
+                if jitter > 0.0:
+                    print(f"[Wait] wait {total:.2f}s (base {base:.2f}s + {jitter:.2f}s)")
+                else:
+                    print(f"[Wait] wait {total:.2f}s (no jitter)")
+            except Exception:
+                pass
+        self._sleep(ctx, total)
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import ClassVar, Optional, Sequence
+import time
+
+import numpy as np
+
+from bot.core.state_machine import Action, Context
+from bot.core.image import (
+    load_template_bgr_mask,
+    match_template,
+    pct_region_to_pixels,
+    masked_zncc,
+)
+from bot.core import logs
+from bot.actions.screenshot import capture_frame
+
+
+def poll_schedule(timeout_s: float, min_interval_s: float, max_interval_s: float, backoff: float) -> list[float]:
+    """Poll offsets (seconds from start) WaitFor uses within ``timeout_s``."""
+    out: list[float] = [0.0]
+    t = 0.0
+    interval = max(0.01, float(min_interval_s))
+    cap = max(interval, float(max_interval_s))
+    while True:
+        t += interval
+        if t > timeout_s:
+            break
+        out.append(t)
+        interval = min(cap, interval * max(1.0, float(backoff)))
+    return out
+
+
+@dataclass
+class WaitFor(Action):
+    """Poll capture + match until one of ``templates`` appears in ``region_pct``.
+
+    Replaces a fixed Wait in front of a screenshot: returns as soon as the UI
+    is ready instead of sleeping for the worst case. Polling starts at
+    ``min_interval_s`` and backs off by ``backoff`` up to ``max_interval_s``
+    (the UI usually answers fast or not for a while). Only the region is
+    grabbed on each poll.
+
+    With ``required`` False the result is None either way, so it paces a step
+    without deciding its outcome.
+    """
+
+    name: str
+    templates: Sequence[str]
+    region_pct: tuple[float, float, float, float]
+    threshold: float
+    verify_threshold: float = 0.85
+    timeout_s: float = 5.0
+    min_interval_s: float = 0.1
+    max_interval_s: float = 0.5
+    backoff: float = 1.5
+    # Extra pause after the template appears (lets open/close animations finish)
+    settle_s: float = 0.0
+    required: bool = True
+
+    _tpl_cache: dict[str, tuple[np.ndarray, Optional[np.ndarray]]] = None  # type: ignore
+
+    # Only grabs and reads; leaves a fresh frame behind
+    frame_safe: ClassVar[bool] = True
+
+    def _load(self, templates_dir, fname: str) -> Optional[tuple[np.ndarray, Optional[np.ndarray]]]:
+        if self._tpl_cache is None:
+            self._tpl_cache = {}
+        if fname in self._tpl_cache:
+            return self._tpl_cache[fname]
+        path = (templates_dir / fname).as_posix()
+        try:
+            pair = load_template_bgr_mask(path)
+        except FileNotFoundError:
+            return None
+        self._tpl_cache[fname] = pair
+        return pair
+
+    def _visible(self, ctx: Context) -> Optional[str]:
+        frame = ctx.frame_bgr
+        if frame is None:
+            return None
+        _left, _top, width, height = ctx.window_rect
+        roi = pct_region_to_pixels((width, height), self.region_pct)
+        for fname in self.templates:
+            pair = self._load(ctx.templates_dir, fname)
+            if pair is None:
+                continue
+            tpl, mask = pair
+            found, top_left_xy, _score = match_template(frame, tpl, self.threshold, roi, mask=mask)
+            if not found:
+                continue
+            try:
+                mx, my = top_left_xy
+                th, tw = tpl.shape[:2]
+                patch = frame[my : my + th, mx : mx + tw]
+                vscore = masked_zncc(patch, tpl, mask) if patch.shape[:2] == (th, tw) else 0.0
+            except Exception:
+                vscore = 0.0
+            if vscore >= float(self.verify_threshold):
+                return fname
+        return None
+
+    def _sleep(self, ctx: Context, seconds: float) -> float:
+        """Sleep ``seconds`` of unpaused time; returns how long was spent paused."""
+        paused = 0.0
+        end_by = time.time() + seconds
+        while time.time() < end_by:
+            if ctx.stop_event.is_set():
+                break
+            try:
+                if getattr(ctx, "pause_event", None) is not None and ctx.pause_event.is_set():
+                    time.sleep(0.05)
+                    paused += 0.05
+                    end_by += 0.05
+                    continue
+            except Exception:
+                pass
+            time.sleep(min(0.01, max(0.0, end_by - time.time())))
+        return paused
+
+    def run(self, ctx: Context) -> Optional[bool]:
+        started = time.time()
+        deadline = started + max(0.0, float(self.timeout_s))
+        interval = max(0.01, float(self.min_interval_s))
+        cap = max(interval, float(self.max_interval_s))
+        polls = 0
+        found: Optional[str] = None
+        while not ctx.stop_event.is_set():
+            polls += 1
+            if capture_frame(ctx, tuple(self.region_pct)):
+                found = self._visible(ctx)
+                if found:
+                    break
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            # Paused time does not count against the timeout
+            deadline += self._sleep(ctx, min(interval, remaining))
+            interval = min(cap, interval * max(1.0, float(self.backoff)))
+        elapsed = time.time() - started
+        try:
+            if found:
+                logs.event("WaitFor", "{name} tpl={tpl} after {elapsed:.2f}s ({polls} polls)",
+                           level="ok", name=self.name, tpl=found, elapsed=elapsed, polls=polls)
+            else:
+                logs.event("WaitFor", "{name} timed out after {elapsed:.2f}s ({polls} polls)",
+                           level="warn", name=self.name, elapsed=elapsed, polls=polls)
+        except Exception:
+            pass
+        if found and self.settle_s > 0:
+            self._sleep(ctx, float(self.settle_s))
+        if not self.required:
+            return None
+        return bool(found)
@@ -12,6 +12,9 @@ from . import settings as settings_store
 class AppConfig:
     # Window identification
     window_title_substr: str = "Call of Dragons"
+    # Bot instances as (id, window title substring) pairs; empty runs a single
+    # "main" instance on window_title_substr
+    instances: tuple[tuple[str, str], ...] = ()
 
     # Capture and matching
     screenshot_period_s: float = 0.7
@@ -76,6 +79,25 @@ class AppConfig:
     # Click behavior
     # When True, restore mouse cursor to its previous position after a click
     click_snap_back: bool = True
+    # Input backend: "cursor" (focus the window, move the real cursor) or
+    # "message" (post mouse messages to the window; no focus change)
+    input_backend: str = "cursor"
+    # Capture backend: "screen" (grab the screen area) or "window" (PrintWindow;
+    # works while the game is covered)
+    capture_backend: str = "screen"
+    # Adaptive waits: learn UI response latency per (machine, step) and wait
+    # for this percentile of it instead of the hard-coded duration
+    adaptive_waits: bool = True
+    adaptive_wait_percentile: float = 0.95
+    # Where learned latency samples persist
+    latency_file: Path = Path("bot.latency.json")
+    # Start loading shared OCR readers in the background when a machine with
+    # ReadText is built, instead of on the first read
+    ocr_preload: bool = True
+    # Run OCR in this many worker processes (0 = in-process reader threads)
+    ocr_workers: int = 0
+    # OCR results kept for recently seen crops (0 disables the cache)
+    ocr_cache_size: int = 256
 
     # UI placement (percent margins relative to game client size)
     # Game launching
@@ -87,12 +109,22 @@ class AppConfig:
     force_window_resize: bool = True
     force_window_width: int = 1765
     force_window_height: int = 993
+    # Seconds between geometry watcher checks (client size/position enforcement)
+    window_watch_interval_s: float = 1.0
 
     # Logging
     log_to_file: bool = True
     log_file: Path = Path("bot.log")
     log_max_bytes: int = 1_048_576  # 1 MB
     log_backups: int = 5            # number of rotated files to keep
+    log_level: str = "info"         # minimum level: debug, info, warn, err
+    log_buffer_size: int = 2000     # entries kept in memory for /api/logs
+    # Per-category minimum levels and entries/second caps, as (category, value) pairs
+    log_category_levels: tuple[tuple[str, str], ...] = ()
+    log_rate_limits: tuple[tuple[str, float], ...] = ()
+
+    # Counters persistence: max seconds between snapshot writes (<= 0 saves on every increment)
+    counters_flush_interval_s: float = 5.0
 
     # Farm cooldown window (seconds) for random delay between farm cycles
     farm_cooldown_min_s: int = 300    # 5 minutes
@@ -138,6 +170,23 @@ def _duration_seconds(value: Optional[object], default: int) -> int:
     return int(default)
 
 
+def _parse_pairs(value: Optional[object]) -> list[tuple[str, str]]:
+    """Parse 'A=1, B=2' (or a mapping) into [(A, '1'), (B, '2')]."""
+    if isinstance(value, dict):
+        return [(str(k).strip(), str(v).strip()) for k, v in value.items() if str(k).strip()]
+    if not isinstance(value, str):
+        return []
+    out: list[tuple[str, str]] = []
+    for part in value.replace(";", ",").split(","):
+        if "=" not in part:
+            continue
+        k, v = part.split("=", 1)
+        k = k.strip()
+        if k:
+            out.append((k, v.strip()))
+    return out
+
+
 def make_config() -> AppConfig:
     settings = settings_store.get_settings()
 
@@ -187,9 +236,23 @@ def make_config() -> AppConfig:
         return default
 
     window_title = _str("WINDOW_TITLE_SUBSTR", "Call of Dragons")
+    instances = tuple((k, v) for k, v in _parse_pairs(settings.get("INSTANCES")) if v)
     match_threshold = _float("MATCH_THRESHOLD", 0.85)
     verify_threshold = _float("VERIFY_THRESHOLD", 0.85)
     click_snap_back = _bool("CLICK_SNAP_BACK", True)
+    input_backend = _str("INPUT_BACKEND", "cursor").strip().lower()
+    if input_backend not in {"cursor", "message"}:
+        input_backend = "cursor"
+    capture_backend = _str("CAPTURE_BACKEND", "screen").strip().lower()
+    if capture_backend not in {"screen", "window"}:
+        capture_backend = "screen"
+    adaptive_waits = _bool("ADAPTIVE_WAITS", True)
+    adaptive_wait_percentile = min(1.0, max(0.5, _float("ADAPTIVE_WAIT_PERCENTILE", 0.95)))
+    latency_file_env = _str("LATENCY_FILE", "bot.latency.json").strip()
+    latency_file = Path(latency_file_env) if latency_file_env else Path("bot.latency.json")
+    ocr_preload = _bool("OCR_PRELOAD", True)
+    ocr_workers = max(0, min(8, _int("OCR_WORKERS", 0)))
+    ocr_cache_size = max(0, _int("OCR_CACHE_SIZE", 256))
     save_shots = _bool("SAVE_SHOTS", False)
     shots_dir_env = _str("SHOTS_DIR", "debug_captures").strip()
     shots_dir = Path(shots_dir_env) if shots_dir_env else Path("debug_captures")
@@ -228,6 +291,7 @@ def make_config() -> AppConfig:
     force_window_resize = _bool("FORCE_WINDOW_RESIZE", True)
     force_window_width = _int("FORCE_WINDOW_WIDTH", 1765)
     force_window_height = _int("FORCE_WINDOW_HEIGHT", 993)
+    window_watch_interval_s = max(0.1, _float("WINDOW_WATCH_INTERVAL", 1.0))
     game_shortcut_env = _str("GAME_SHORTCUT_PATH", "").strip()
     game_shortcut_path: Optional[Path]
     if game_shortcut_env:
@@ -249,6 +313,17 @@ def make_config() -> AppConfig:
     log_file = Path(log_file_env) if log_file_env else Path("bot.log")
     log_max_bytes = _int("LOG_MAX_BYTES", 1_048_576)
     log_backups = _int("LOG_BACKUPS", 5)
+    log_level = _str("LOG_LEVEL", "info").strip().lower() or "info"
+    log_buffer_size = max(100, _int("LOG_BUFFER_SIZE", 2000))
+    log_category_levels = tuple((k, v.lower()) for k, v in _parse_pairs(settings.get("LOG_CATEGORY_LEVELS")))
+    log_rate_limits_list: list[tuple[str, float]] = []
+    for k, v in _parse_pairs(settings.get("LOG_RATE_LIMITS")):
+        try:
+            log_rate_limits_list.append((k, float(v)))
+        except ValueError:
+            continue
+    log_rate_limits = tuple(log_rate_limits_list)
+    counters_flush_interval_s = _float("COUNTERS_FLUSH_INTERVAL", 5.0)
     # Farm cooldown min/max
     cd_min = _duration_seconds(settings.get("FARM_COOLDOWN_MIN"), 300)
     cd_max = _duration_seconds(settings.get("FARM_COOLDOWN_MAX"), 3600)
@@ -268,9 +343,18 @@ def make_config() -> AppConfig:
     max_armies = max(1, _int("MAX_ARMIES", 3))
     return AppConfig(
         window_title_substr=window_title,
+        instances=instances,
         match_threshold=match_threshold,
         verify_threshold=verify_threshold,
         click_snap_back=click_snap_back,
+        input_backend=input_backend,
+        capture_backend=capture_backend,
+        adaptive_waits=adaptive_waits,
+        adaptive_wait_percentile=adaptive_wait_percentile,
+        latency_file=latency_file,
+        ocr_preload=ocr_preload,
+        ocr_workers=ocr_workers,
+        ocr_cache_size=ocr_cache_size,
         save_shots=save_shots,
         shots_dir=shots_dir,
         start_shots_dir=start_shots_dir,
@@ -282,6 +366,7 @@ def make_config() -> AppConfig:
         force_window_resize=force_window_resize,
         force_window_width=force_window_width,
         force_window_height=force_window_height,
+        window_watch_interval_s=window_watch_interval_s,
         farm_cooldown_min_s=cd_min,
         farm_cooldown_max_s=cd_max,
         alliance_help_cooldown_min_s=ah_min,
@@ -293,6 +378,11 @@ def make_config() -> AppConfig:
         log_file=log_file,
         log_max_bytes=log_max_bytes,
         log_backups=log_backups,
+        log_level=log_level,
+        log_buffer_size=log_buffer_size,
+        log_category_levels=log_category_levels,
+        log_rate_limits=log_rate_limits,
+        counters_flush_interval_s=counters_flush_interval_s,
     )
 
 
@@ -1,14 +1,21 @@
 from __future__ import annotations
 
+import atexit
 import json
 import os
 import threading
+import time
+from array import array
 from pathlib import Path
-from typing import Dict
+from typing import Dict, IO, List, Optional, Tuple
 
 
 _lock = threading.Lock()
 _path: Path
+# Write-behind persistence: increments land in memory plus an append-only journal,
+# and a background flusher rewrites the snapshot at most every _flush_interval_s.
+# An interval <= 0 keeps the legacy synchronous save on every increment.
+_flush_interval_s: float = 5.0
 
 try:
     # Allow configuring counters file path via app config if available
@@ -19,6 +26,10 @@ try:
         _path = Path(p)
     else:
         _path = Path("bot.counters.json")
+    try:
+        _flush_interval_s = float(getattr(cfg, "counters_flush_interval_s", _flush_interval_s))
+    except Exception:
+        pass
 except Exception:
     _path = Path("bot.counters.json")
 
@@ -29,6 +40,9 @@ try:
 except Exception:
     pass
 
+_journal_path = _path.with_name(_path.name + ".journal")
+_history_path = _path.with_name(_path.name.replace(".json", "") + ".history.json")
+
 _counters: Dict[str, int] = {
     # Public keys expected by UI/backend
     "troops_trained": 0,
@@ -36,73 +50,374 @@ _counters: Dict[str, int] = {
     "alliance_helps": 0,
 }
 
+_dirty = False
+_history_dirty = False
+_journal_fh: Optional[IO[str]] = None
+_flush_event = threading.Event()
+_flusher: Optional[threading.Thread] = None
+# Serializes flushes; the snapshot files are written outside _lock
+_flush_lock = threading.Lock()
+
+# Every journal record carries a sequence number, and each snapshot file stores
+# the last one it covers (under _SEQ_KEY), so a replay skips records a
+# snapshot already holds even when the journal outlived that snapshot
+_SEQ_KEY = "_journal_seq"
+_seq = 0
+_history_seq = 0
+
+
+# Time-bucketed history -----------------------------------------------------
+#
+# Every increment is also recorded into fixed-size ring buffers at three
+# resolutions (minute/hour/day). Each slot stores the bucket epoch next to its
+# count so stale slots are detected and recycled without a sweep.
+
+_RESOLUTIONS: Dict[str, Tuple[int, int]] = {
+    # name: (bucket seconds, number of buckets)
+    "minute": (60, 24 * 60),     # last 24 hours
+    "hour": (3600, 24 * 30),     # last 30 days
+    "day": (86400, 365),         # last year
+}
+
+
+class _Ring:
+    __slots__ = ("span_s", "counts", "epochs")
+
+    def __init__(self, span_s: int, size: int) -> None:
+        self.span_s = span_s
+        self.counts = array("q", [0]) * size
+        self.epochs = array("q", [-1]) * size
+
+    def add(self, ts: float, by: int) -> None:
+        epoch = int(ts // self.span_s)
+        i = epoch % len(self.counts)
+        if self.epochs[i] != epoch:
+            self.epochs[i] = epoch
+            self.counts[i] = 0
+        self.counts[i] += by
+
+    def total(self, since_ts: float, until_ts: float) -> int:
+        lo = int(since_ts // self.span_s)
+        hi = int(until_ts // self.span_s)
+        out = 0
+        for epoch, count in zip(self.epochs, self.counts):
+            if lo <= epoch <= hi:
+                out += count
+        return out
+
+    def buckets(self, until_ts: float, n: int) -> List[Tuple[int, int]]:
+        hi = int(until_ts // self.span_s)
+        size = len(self.counts)
+        out: List[Tuple[int, int]] = []
+        for epoch in range(hi - min(n, size) + 1, hi + 1):
+            i = epoch % size
+            count = self.counts[i] if self.epochs[i] == epoch else 0
+            out.append((epoch * self.span_s, int(count)))
+        return out
+
+    def dump(self) -> List[List[int]]:
+        return [[int(e), int(c)] for e, c in zip(self.epochs, self.counts) if e >= 0 and c]
+
+    def restore(self, items: List[List[int]]) -> None:
+        for epoch, count in items:
+            i = int(epoch) % len(self.counts)
+            if int(epoch) >= self.epochs[i]:
+                self.epochs[i] = int(epoch)
+                self.counts[i] = int(count)
+
+
+class _Series:
+    __slots__ = ("rings",)
+
+    def __init__(self) -> None:
+        self.rings = {name: _Ring(span, size) for name, (span, size) in _RESOLUTIONS.items()}
+
+    def add(self, ts: float, by: int) -> None:
+        for ring in self.rings.values():
+            ring.add(ts, by)
+
+
+# Keyed by (counter, machine); machine "" aggregates all machines
+_history: Dict[Tuple[str, str], _Series] = {}
+
+
+def _history_add_locked(key: str, by: int, machine: Optional[str], ts: float) -> None:
+    global _history_dirty
+    for m in ("", machine) if machine else ("",):
+        series = _history.get((key, m))
+        if series is None:
+            series = _history[(key, m)] = _Series()
+        series.add(ts, by)
+    _history_dirty = True
+
+
+def _history_clear_locked(key: str) -> None:
+    """Drop ``key``'s history buckets, globally and for every machine."""
+    global _history_dirty
+    for hkey in [hk for hk in _history if hk[0] == key]:
+        del _history[hkey]
+        _history_dirty = True
+
+
+def _resolution_for(window_s: float) -> str:
+    for name, (span, size) in _RESOLUTIONS.items():
+        if window_s <= span * size:
+            return name
+    return "day"
+
+
+def _load_history_locked() -> None:
+    try:
+        if not _history_path.exists():
+            return
+        data = json.loads(_history_path.read_text(encoding="utf-8"))
+    except Exception:
+        return
+    if not isinstance(data, dict):
+        return
+    global _history_seq
+    try:
+        _history_seq = int(data.pop(_SEQ_KEY, 0))
+    except Exception:
+        _history_seq = 0
+    for skey, rings in data.items():
+        try:
+            key, _, machine = str(skey).partition("|")
+            series = _history.setdefault((key, machine), _Series())
+            for name, items in rings.items():
+                if name in series.rings:
+                    series.rings[name].restore(items)
+        except Exception:
+            continue
+
+
+def _history_payload_locked() -> Dict[str, object]:
+    payload: Dict[str, object] = {
+        f"{key}|{machine}": {name: ring.dump() for name, ring in series.rings.items()}
+        for (key, machine), series in _history.items()
+    }
+    payload[_SEQ_KEY] = _seq
+    return payload
+
 
 def _load_locked() -> None:
+    global _seq
     try:
         if not _path.exists():
             return
         data = json.loads(_path.read_text(encoding="utf-8"))
         if isinstance(data, dict):
+            try:
+                _seq = int(data.pop(_SEQ_KEY, 0))
+            except Exception:
+                _seq = 0
             for k, v in data.items():
                 try:
                     _counters[k] = int(v)
                 except Exception:
                     continue
-        # Ensure default keys exist
-        for k in ("troops_trained", "nodes_farmed", "alliance_helps"):
-            _counters.setdefault(k, 0)
     except Exception:
         # Ignore load errors to avoid breaking the app
         pass
+    _replay_journal_locked()
+    # Ensure default keys exist
+    for k in ("troops_trained", "nodes_farmed", "alliance_helps"):
+        _counters.setdefault(k, 0)
 
 
-def _save_locked() -> None:
+def _replay_journal_locked() -> None:
+    """Apply increments journaled after the last snapshot (e.g. before a crash)."""
+    global _dirty, _seq
+    covered = _seq
+    try:
+        if not _journal_path.exists():
+            return
+        lines = _journal_path.read_text(encoding="utf-8").splitlines()
+    except Exception:
+        return
+    for line in lines:
+        try:
+            rec = json.loads(line)
+            k = str(rec["k"])
+            b = int(rec.get("by", 1))
+        except Exception:
+            # A torn final line from a crash mid-write is expected; skip it
+            continue
+        try:
+            s = int(rec.get("s", 0))
+        except Exception:
+            s = 0
+        _seq = max(_seq, s)
+        if rec.get("op") == "reset":
+            if s == 0 or s > covered:
+                _counters[k] = 0
+            if s == 0 or s > _history_seq:
+                _history_clear_locked(k)
+        else:
+            # Records without a sequence number predate it; their snapshot never
+            # outlived them, so they are always pending
+            if s == 0 or s > covered:
+                _counters[k] = int(_counters.get(k, 0)) + b
+            if s == 0 or s > _history_seq:
+                try:
+                    _history_add_locked(k, b, rec.get("m") or None, float(rec.get("t", time.time())))
+                except Exception:
+                    pass
+        _dirty = True
+
+
+def _write_json_atomic(path: Path, payload: object) -> None:
     try:
         # Ensure parent dir exists
-        parent = _path.parent
+        parent = path.parent
         try:
             parent.mkdir(parents=True, exist_ok=True)
         except Exception:
             pass
-        tmp = _path.with_suffix(_path.suffix + ".tmp")
+        tmp = path.with_suffix(path.suffix + ".tmp")
         with open(tmp, "w", encoding="utf-8") as fh:
-            json.dump(_counters, fh, ensure_ascii=False, separators=(",", ":"))
+            json.dump(payload, fh, ensure_ascii=False, separators=(",", ":"))
             try:
                 fh.flush()
                 os.fsync(fh.fileno())
             except Exception:
                 pass
         try:
-            os.replace(tmp, _path)
+            os.replace(tmp, path)
         except Exception:
             # Best effort fallback
             try:
-                if _path.exists():
-                    _path.unlink(missing_ok=True)  # type: ignore[arg-type]
+                if path.exists():
+                    path.unlink(missing_ok=True)  # type: ignore[arg-type]
             except Exception:
                 pass
             try:
-                tmp.replace(_path)
+                tmp.replace(path)
             except Exception:
                 pass
     except Exception:
         pass
 
 
-def inc(key: str, by: int = 1) -> None:
-    """Atomically increment a counter by key and persist to disk.
+def _snapshot_locked() -> Dict[str, object]:
+    out: Dict[str, object] = dict(_counters)
+    out[_SEQ_KEY] = _seq
+    return out
+
+
+def _save_locked() -> None:
+    _write_json_atomic(_path, _snapshot_locked())
+
+
+def _journal_append_locked(record: Dict[str, object]) -> None:
+    global _journal_fh, _seq
+    _seq += 1
+    record["s"] = _seq
+    try:
+        if _journal_fh is None:
+            _journal_fh = open(_journal_path, "a", encoding="utf-8")
+        _journal_fh.write(json.dumps(record, separators=(",", ":")) + "\n")
+        # Hand the bytes to the OS so they survive a process crash; no fsync here
+        _journal_fh.flush()
+    except Exception:
+        pass
+
+
+def _journal_truncate_locked() -> None:
+    global _journal_fh
+    try:
+        if _journal_fh is not None:
+            _journal_fh.close()
+    except Exception:
+        pass
+    _journal_fh = None
+    try:
+        if _journal_path.exists():
+            _journal_path.unlink()
+    except Exception:
+        pass
+
+
+def _flush() -> None:
+    """Write pending snapshot/history files.
+
+    Only the copies and the journal truncation hold ``_lock``; the writes and
+    fsyncs run outside it so increments never wait on the disk.
+    """
+    global _dirty, _history_dirty
+    with _flush_lock:
+        with _lock:
+            history = _history_payload_locked() if _history_dirty else None
+            snapshot = _snapshot_locked() if _dirty else None
+            seq = _seq
+            _history_dirty = False
+            _dirty = False
+        if history is not None:
+            _write_json_atomic(_history_path, history)
+        if snapshot is None:
+            return
+        _write_json_atomic(_path, snapshot)
+        with _lock:
+            # Increments journaled during the write are not in the snapshot: keep
+            # the journal (replay skips what the snapshot covers); the next flush
+            # truncates it
+            if _seq == seq:
+                _journal_truncate_locked()
+
+
+def _flush_loop() -> None:
+    while True:
+        # In synchronous mode only the history is written behind, so relax the cadence
+        interval = _flush_interval_s if _flush_interval_s > 0 else 60.0
+        _flush_event.wait(timeout=max(0.5, interval))
+        _flush_event.clear()
+        try:
+            _flush()
+        except Exception:
+            pass
+
+
+def _ensure_flusher_locked() -> None:
+    global _flusher
+    if _flusher is not None and _flusher.is_alive():
+        return
+    _flusher = threading.Thread(target=_flush_loop, name="counters-flush", daemon=True)
+    _flusher.start()
+
+
+def flush() -> None:
+    """Persist pending increments now (called on stop/quit and at exit)."""
+    _flush()
+
 
-    Unknown keys are created on first use.
+def inc(key: str, by: int = 1, machine: Optional[str] = None) -> None:
+    """Atomically increment a counter by key.
+
+    Unknown keys are created on first use. The increment is also recorded in
+    the time-bucketed history, globally and under ``machine`` when given. With
+    a positive flush interval the snapshot is written behind by a background
+    thread; otherwise it is saved synchronously.
     """
+    global _dirty
     if not key:
         return
     try:
         b = int(by)
     except Exception:
         b = 1
+    now = time.time()
     with _lock:
         _counters[key] = int(_counters.get(key, 0)) + b
-        _save_locked()
+        _history_add_locked(key, b, machine, now)
+        _ensure_flusher_locked()
+        if _flush_interval_s <= 0:
+            _save_locked()
+            return
+        record: Dict[str, object] = {"k": key, "by": b, "t": round(now, 3)}
+        if machine:
+            record["m"] = machine
+        _journal_append_locked(record)
+        _dirty = True
 
 
 def get_all() -> Dict[str, int]:
@@ -111,21 +426,76 @@ def get_all() -> Dict[str, int]:
         return dict(_counters)
 
 
-def reset(keys: list[str] | None = None, persist: bool = True) -> None:
-    """Reset specified counters (or all known counters if keys is None)."""
+def history(
+    key: str,
+    resolution: str = "hour",
+    count: int = 24,
+    machine: Optional[str] = None,
+    now: Optional[float] = None,
+) -> List[Tuple[int, int]]:
+    """Return ``count`` most recent (bucket_start_ts, increments) pairs, oldest first."""
+    if resolution not in _RESOLUTIONS:
+        raise ValueError(f"Unknown resolution '{resolution}'")
+    ts = time.time() if now is None else float(now)
     with _lock:
-        if keys is None:
-            for k in list(_counters.keys()):
-                _counters[k] = 0
-        else:
-            for k in keys:
-                _counters[k] = 0
+        series = _history.get((key, machine or ""))
+        if series is None:
+            span = _RESOLUTIONS[resolution][0]
+            hi = int(ts // span)
+            return [((hi - i) * span, 0) for i in range(max(0, count) - 1, -1, -1)]
+        return series.rings[resolution].buckets(ts, max(0, int(count)))
+
+
+def total_since(key: str, window_s: float, machine: Optional[str] = None, now: Optional[float] = None) -> int:
+    """Return increments of ``key`` over the last ``window_s`` seconds.
+
+    Uses the finest resolution covering the window; the oldest bucket may be
+    partially outside the window.
+    """
+    ts = time.time() if now is None else float(now)
+    window = max(0.0, float(window_s))
+    with _lock:
+        series = _history.get((key, machine or ""))
+        if series is None:
+            return 0
+        ring = series.rings[_resolution_for(window)]
+        return ring.total(ts - window, ts)
+
+
+def rate_per_hour(key: str, window_s: float = 86400.0, machine: Optional[str] = None, now: Optional[float] = None) -> float:
+    """Average increments per hour of ``key`` over the last ``window_s`` seconds."""
+    window = max(1.0, float(window_s))
+    return total_since(key, window, machine=machine, now=now) * 3600.0 / window
+
+
+def reset(keys: list[str] | None = None, persist: bool = True) -> None:
+    """Reset specified counters (or all known counters if keys is None),
+    together with their history buckets."""
+    global _dirty, _history_dirty
+    # Taken first so a flush already writing an older copy can't land after this save
+    with _flush_lock, _lock:
+        targets = list(_counters.keys()) if keys is None else list(keys)
+        for k in targets:
+            _counters[k] = 0
+            _history_clear_locked(k)
+        if keys is None and _history:
+            _history.clear()
+            _history_dirty = True
         if persist:
             _save_locked()
+            _write_json_atomic(_history_path, _history_payload_locked())
+            _history_dirty = False
+            _journal_truncate_locked()
+            _dirty = False
+        elif _flush_interval_s > 0 and _dirty:
+            # Keep a crash replay consistent with what the next flush would write
+            for k in targets:
+                _journal_append_locked({"op": "reset", "k": k})
 
 
 # Load persisted counters on import
 with _lock:
+    _load_history_locked()
     _load_locked()
     # Persist file creation if it didn't exist
     try:
@@ -133,4 +503,11 @@ with _lock:
             _save_locked()
     except Exception:
         pass
+# Fold any replayed journal into the snapshot
+try:
+    _flush()
+except Exception:
+    pass
+
+atexit.register(flush)
 
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+# Template-based reader for numeric HUD text (counts, timers, amounts).
+#
+# A glyph atlas is a folder of small images, one per character, cut from the
+# game's own rendering at the scale it is read at (margins are trimmed). The
+# file stem names the character: "0".."9", single letters such as "k", "m",
+# "d", "h", "s", or one of the names in _NAMED_GLYPHS. "7_2.png" is a second
+# sample of "7".
+#
+# Reading binarizes the crop, splits it into glyphs at empty columns, scales
+# each glyph's bounding box into a fixed square (keeping its aspect) and
+# picks the atlas glyph with the best overlap, weighted by how well the
+# glyph's height relative to the line matches (so "." is not a small "0").
+# No ML model; a read takes about a millisecond.
+
+_NAMED_GLYPHS = {
+    "colon": ":",
+    "comma": ",",
+    "period": ".",
+    "dot": ".",
+    "slash": "/",
+    "percent": "%",
+    "plus": "+",
+    "minus": "-",
+    "space": " ",
+}
+# Side of the square every glyph cell is scaled to before comparison
+_CELL = 16
+# Column runs narrower/smaller than this are noise
+_MIN_GLYPH_PIXELS = 2
+
+
+@dataclass(frozen=True)
+class _Glyph:
+    char: str
+    cell: np.ndarray  # _CELL x _CELL float32 in {0, 1}
+    rel_h: float  # height relative to the tallest glyph in the atlas
+
+
+_atlas_lock = threading.Lock()
+_atlases: Dict[str, Tuple[Tuple[Tuple[str, int], ...], List[_Glyph]]] = {}
+
+
+def binarize(img_bgr: np.ndarray) -> np.ndarray:
+    """Otsu threshold with text as 1; the minority class is taken as text."""
+    gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY) if img_bgr.ndim == 3 else img_bgr
+    _, bw = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    if bw.mean() > 0.5:
+        bw = 1 - bw
+    return bw.astype(np.uint8)
+
+
+def _trim(binary: np.ndarray) -> np.ndarray:
+    rows = np.flatnonzero(binary.any(axis=1))
+    cols = np.flatnonzero(binary.any(axis=0))
+    if rows.size == 0 or cols.size == 0:
+        return binary[:0, :0]
+    return binary[rows[0] : rows[-1] + 1, cols[0] : cols[-1] + 1]
+
+
+def _cell(binary: np.ndarray) -> np.ndarray:
+    """Centre ``binary`` (one trimmed glyph) in a square and scale to _CELL."""
+    h, w = binary.shape[:2]
+    side = max(h, w)
+    canvas = np.zeros((side, side), dtype=np.uint8)
+    x0 = (side - w) // 2
+    y0 = (side - h) // 2
+    canvas[y0 : y0 + h, x0 : x0 + w] = binary
+    scaled = cv2.resize(canvas * 255, (_CELL, _CELL), interpolation=cv2.INTER_AREA)
+    return (scaled >= 96).astype(np.float32)
+
+
+def _char_for(stem: str) -> Optional[str]:
+    base = stem.split("_", 1)[0]
+    if base.lower() in _NAMED_GLYPHS:
+        return _NAMED_GLYPHS[base.lower()]
+    if len(base) == 1:
+        return base.lower()
+    return None
+
+
+def _files_signature(folder: Path) -> Tuple[Tuple[str, int], ...]:
+    try:
+        return tuple(sorted((p.name, p.stat().st_mtime_ns) for p in folder.glob("*.png")))
+    except Exception:
+        return ()
+
+
+def load_atlas(folder: Path) -> List[_Glyph]:
+    """Glyphs in ``folder``; reloaded when its files change."""
+    key = str(folder)
+    sig = _files_signature(folder)
+    with _atlas_lock:
+        cached = _atlases.get(key)
+        if cached is not None and cached[0] == sig:
+            return cached[1]
+    shapes: List[Tuple[str, np.ndarray]] = []
+    for name, _mtime in sig:
+        char = _char_for(Path(name).stem)
+        if char is None:
+            continue
+        img = cv2.imread(str(folder / name), cv2.IMREAD_UNCHANGED)
+        if img is None:
+            continue
+        if img.ndim == 3 and img.shape[2] == 4:
+            # Transparent background: alpha is the glyph
+            bw = (img[:, :, 3] > 127).astype(np.uint8)
+        else:
+            bw = binarize(img[:, :, :3] if img.ndim == 3 else img)
+        bw = _trim(bw)
+        if bw.size:
+            shapes.append((char, bw))
+    tallest = max((bw.shape[0] for _c, bw in shapes), default=1)
+    glyphs = [_Glyph(char=c, cell=_cell(bw), rel_h=bw.shape[0] / tallest) for c, bw in shapes]
+    with _atlas_lock:
+        _atlases[key] = (sig, glyphs)
+    return glyphs
+
+
+def _segments(binary: np.ndarray) -> List[Tuple[int, int]]:
+    """Column runs containing text, as (start, end) with end exclusive."""
+    occupied = binary.any(axis=0)
+    runs: List[Tuple[int, int]] = []
+    start = -1
+    for x, on in enumerate(occupied):
+        if on and start < 0:
+            start = x
+        elif not on and start >= 0:
+            runs.append((start, x))
+            start = -1
+    if start >= 0:
+        runs.append((start, len(occupied)))
+    return runs
+
+
+def read(img_bgr: np.ndarray, glyphs: List[_Glyph], min_score: float = 0.6) -> Tuple[str, float]:
+    """Text in ``img_bgr`` and the lowest per-glyph score.
+
+    Glyphs scoring under ``min_score`` read as "?"; a gap wider than half the
+    line height reads as a space.
+    """
+    if not glyphs:
+        return "", 0.0
+    bw = binarize(img_bgr)
+    rows = np.flatnonzero(bw.any(axis=1))
+    if rows.size == 0:
+        return "", 1.0
+    line = bw[rows[0] : rows[-1] + 1]
+    line_h = line.shape[0]
+    atlas = np.stack([g.cell for g in glyphs])
+    atlas_px = atlas.reshape(len(glyphs), -1).sum(axis=1)
+    atlas_h = np.array([g.rel_h for g in glyphs], dtype=np.float32)
+    out: List[str] = []
+    worst = 1.0
+    prev_end: Optional[int] = None
+    for x0, x1 in _segments(line):
+        glyph = line[:, x0:x1]
+        if int(glyph.sum()) < _MIN_GLYPH_PIXELS:
+            continue
+        if prev_end is not None and x0 - prev_end > 0.5 * line_h:
+            out.append(" ")
+        prev_end = x1
+        glyph = _trim(glyph)
+        cell = _cell(glyph)
+        rel_h = glyph.shape[0] / line_h
+        # Dice overlap against every atlas glyph at once, scaled down by the
+        # difference in relative height
+        inter = (atlas * cell).reshape(len(glyphs), -1).sum(axis=1)
+        scores = 2.0 * inter / np.maximum(1.0, atlas_px + cell.sum())
+        scores = scores * np.clip(1.0 - np.abs(atlas_h - rel_h), 0.0, 1.0)
+        best = int(np.argmax(scores))
+        score = float(scores[best])
+        worst = min(worst, score)
+        out.append(glyphs[best].char if score >= min_score else "?")
+    return "".join(out), worst
+
+
+_MULTIPLIERS = {"k": 1_000, "m": 1_000_000, "b": 1_000_000_000}
+_UNIT_SECONDS = {"d": 86400, "h": 3600, "m": 60, "s": 1}
+# "[1d ]hh:mm[:ss]", not part of a longer number
+_CLOCK_RE = re.compile(r"(?<![\d.,])(?:(\d+)\s*[dD]\s*)?(\d+):(\d{1,2})(?::(\d{1,2}))?(?![\d.,:])")
+# "1d 2h 5m 30s"-style runs; a unit letter followed by more letters is a word
+_UNIT_RUN_RE = re.compile(r"(?<![\w.,])(?:\d+\s*[dhmsDHMS](?![A-Za-z])\s*)+")
+_UNIT_GROUP_RE = re.compile(r"(\d+)\s*([dhmsDHMS])")
+
+
+def parse_int(text: str) -> Optional[int]:
+    """Integer in ``text``: "12,345" -> 12345, "1.5K" -> 1500, "3M" -> 3000000."""
+    s = text.strip().lower().replace(" ", "")
+    m = re.search(r"(\d+(?:[.,]\d+)*)([kmb]?)", s)
+    if not m:
+        return None
+    number, suffix = m.group(1), m.group(2)
+    if suffix:
+        # With a suffix, the separator is a decimal point ("1.5k")
+        try:
+            return int(round(float(number.replace(",", ".")) * _MULTIPLIERS[suffix]))
+        except Exception:
+            return None
+    try:
+        return int(re.sub(r"[.,]", "", number))
+    except Exception:
+        return None
+
+
+def parse_duration(text: str) -> Optional[int]:
+    """Seconds in a timer: "01:02:03", "02:03", "1d 02:03:04", "1h 5m", "45s".
+
+    Only timer-shaped text counts: a clock, or a run of distinct unit groups.
+    A single group needs a lowercase unit, so an amount such as "3M" (see
+    parse_int) is not read as three minutes.
+    """
+    clock = _CLOCK_RE.search(text)
+    if clock:
+        days, first, second, third = clock.groups()
+        total = int(days or 0) * 86400
+        if third is None:
+            return total + int(first) * 60 + int(second)
+        return total + int(first) * 3600 + int(second) * 60 + int(third)
+    for run in _UNIT_RUN_RE.finditer(text):
+        groups = _UNIT_GROUP_RE.findall(run.group(0))
+        units = [unit.lower() for _value, unit in groups]
+        if len(set(units)) != len(units):
+            continue
+        if len(groups) == 1 and not groups[0][1].islower():
+            continue
+        return sum(int(value) * _UNIT_SECONDS[unit] for (value, _u), unit in zip(groups, units))
+    return None
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from .window import (
+    WindowRect,
+    get_client_rect_screen,
+    get_monitor_rect_for_window,
+    move_window_xy,
+    set_window_client_size,
+    win32gui,
+)
+from . import logs
+import bot.config as config
+
+
+# Client-area geometry of the game window(s), kept by a low-rate watcher.
+#
+# Captures used to query the client rect, IsZoomed and the monitor rect and
+# possibly resize/move the window before every grab: 4-6 Win32 round trips
+# that almost never change anything. Now a daemon thread checks each watched
+# window every WINDOW_WATCH_INTERVAL seconds, enforces the configured client
+# size and position, and publishes the resulting rect. Readers get the cached
+# rect; a change bumps the entry's version so callers can tell.
+
+# Windows not read for this long stop being watched
+_FORGET_AFTER_S = 60.0
+# Client origin is kept this far right of the monitor's left edge
+_LEFT_OFFSET_PX = 100
+
+
+@dataclass
+class _Watched:
+    rect: WindowRect
+    version: int
+    checked_ts: float
+    read_ts: float
+
+
+_lock = threading.Lock()
+_watched: Dict[int, _Watched] = {}
+_thread: Optional[threading.Thread] = None
+_wake = threading.Event()
+
+
+def _interval_s() -> float:
+    try:
+        return max(0.1, float(getattr(config.DEFAULT_CONFIG, "window_watch_interval_s", 1.0)))
+    except Exception:
+        return 1.0
+
+
+def enforce(hwnd: int) -> WindowRect:
+    """Apply the configured client size/position to ``hwnd`` if it drifted; returns the client rect."""
+    try:
+        target_w = int(getattr(config.DEFAULT_CONFIG, 'force_window_width', 0))
+        target_h = int(getattr(config.DEFAULT_CONFIG, 'force_window_height', 0))
+    except Exception:
+        target_w = target_h = 0
+    try:
+        do_resize = bool(getattr(config.DEFAULT_CONFIG, 'force_window_resize', True))
+    except Exception:
+        do_resize = True
+    if not (do_resize and target_w > 0 and target_h > 0):
+        return get_client_rect_screen(hwnd)
+    try:
+        rect_now = get_client_rect_screen(hwnd)
+        # Determine desired adjustments
+        needs_resize = (rect_now.width != target_w or rect_now.height != target_h)
+        try:
+            is_zoomed = bool(win32gui.IsZoomed(hwnd))  # maximized
+        except Exception:
+            is_zoomed = False
+        # If size mismatch OR window is maximized, enforce target client size (also restores)
+        if needs_resize or is_zoomed:
+            set_window_client_size(hwnd, target_w, target_h)
+            rect_now = get_client_rect_screen(hwnd)
+        # Independently ensure position is top-left of its monitor, or if it was maximized
+        try:
+            mon = get_monitor_rect_for_window(hwnd, work_area=False)
+            needs_move = (rect_now.left != mon.left + _LEFT_OFFSET_PX or rect_now.top != mon.top)
+        except Exception:
+            mon = None
+            needs_move = False
+        if (needs_move or is_zoomed) and mon is not None:
+            try:
+                move_window_xy(hwnd, mon.left + _LEFT_OFFSET_PX, mon.top)
+                rect_now = get_client_rect_screen(hwnd)
+            except Exception:
+                pass
+        return rect_now
+    except Exception:
+        return get_client_rect_screen(hwnd)
+
+
+def _check(hwnd: int) -> None:
+    try:
+        rect = enforce(hwnd)
+    except Exception:
+        rect = WindowRect(0, 0, 0, 0)
+    now = time.time()
+    with _lock:
+        entry = _watched.get(hwnd)
+        if entry is None:
+            return
+        if rect.to_tuple() != entry.rect.to_tuple():
+            entry.rect = rect
+            entry.version += 1
+            try:
+                logs.add(f"[Geometry] window {hwnd} client {rect.width}x{rect.height} at {rect.left},{rect.top}", level="debug")
+            except Exception:
+                pass
+        entry.checked_ts = now
+
+
+def _watch_loop() -> None:
+    while True:
+        _wake.wait(_interval_s())
+        _wake.clear()
+        now = time.time()
+        with _lock:
+            for hwnd in [h for h, e in _watched.items() if now - e.read_ts > _FORGET_AFTER_S]:
+                _watched.pop(hwnd, None)
+            hwnds = list(_watched)
+        for hwnd in hwnds:
+            _check(hwnd)
+
+
+def _ensure_thread() -> None:
+    global _thread
+    if _thread is not None and _thread.is_alive():
+        return
+    _thread = threading.Thread(target=_watch_loop, name="window-geometry", daemon=True)
+    _thread.start()
+
+
+def client_rect(hwnd: int) -> WindowRect:
+    """Cached client rect of ``hwnd``; the first read (and one after invalidate) checks synchronously."""
+    now = time.time()
+    with _lock:
+        entry = _watched.get(hwnd)
+        if entry is not None and entry.checked_ts > 0:
+            entry.read_ts = now
+            return entry.rect
+        if entry is None:
+            _watched[hwnd] = _Watched(rect=WindowRect(0, 0, 0, 0), version=0, checked_ts=0.0, read_ts=now)
+    _ensure_thread()
+    _check(hwnd)
+    with _lock:
+        entry = _watched.get(hwnd)
+        return entry.rect if entry is not None else WindowRect(0, 0, 0, 0)
+
+
+def version(hwnd: int) -> int:
+    """Bumped every time the watcher sees ``hwnd``'s client rect change."""
+    with _lock:
+        entry = _watched.get(hwnd)
+        return entry.version if entry is not None else 0
+
+
+def invalidate(hwnd: Optional[int] = None) -> None:
+    """Force a synchronous re-check on the next read (e.g. after a failed grab)."""
+    with _lock:
+        for h, entry in _watched.items():
+            if hwnd is None or h == hwnd:
+                entry.checked_ts = 0.0
+    _wake.set()
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import math
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from .window import (
+    bring_to_front,
+    click_screen_xy,
+    drag_screen_xy,
+    post_click_client,
+    post_drag_client,
+)
+import bot.config as config
+
+
+# Clicks and drags issued by actions, routed to the configured input backend.
+#
+# cursor:  raise the game window, wait for it to take focus, then move the
+#          real cursor and press (the original behaviour; works everywhere).
+# message: post mouse messages to the game window at client coordinates. No
+#          focus change, no cursor movement and no settle delay, so the PC
+#          stays usable while the bot runs; the game must accept window
+#          messages for this to work.
+#
+# Callers pass screen coordinates (what matching produces); the message
+# backend converts them using the context's client rect.
+#
+# Cursor input uses one global cursor and one foreground window, so with
+# several instances running their clicks would interleave (one instance
+# focuses its window, another moves the cursor). Cursor clicks and drags are
+# therefore queued to a single input thread that runs each one whole: focus,
+# move, press/release, restore the cursor. Callers block only for their own
+# request; capture and matching in other instances keep running meanwhile.
+# Posted messages target one window each and skip the queue.
+
+INPUT_BACKENDS = ("cursor", "message")
+CAPTURE_BACKENDS = ("screen", "window")
+
+# Time the window gets to take focus before cursor input
+_FOCUS_SETTLE_S = 0.05
+
+
+# Queue-wait / execution samples kept for stats()
+_MAX_SAMPLES = 256
+# How often a waiting caller checks its context's stop event
+_POLL_S = 0.05
+
+
+@dataclass
+class _Request:
+    owner: str
+    run: Callable[[], None]
+    queued_ts: float = field(default_factory=time.time)
+    done: threading.Event = field(default_factory=threading.Event)
+    started: bool = False
+    cancelled: bool = False
+    error: Optional[BaseException] = None
+
+
+class InputArbiter:
+    """Runs cursor input requests one at a time, in submission order."""
+
+    def __init__(self) -> None:
+        self._queue: "queue.Queue[_Request]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._waits: Deque[float] = deque(maxlen=_MAX_SAMPLES)
+        self._execs: Deque[float] = deque(maxlen=_MAX_SAMPLES)
+        self._by_owner: Dict[str, List[float]] = {}  # owner -> [count, total wait]
+        self.executed = 0
+        self.cancelled = 0
+        self.failed = 0
+
+    def _ensure_thread(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._loop, name="input-arbiter", daemon=True)
+            self._thread.start()
+
+    def _loop(self) -> None:
+        while True:
+            req = self._queue.get()
+            with self._lock:
+                if not req.cancelled:
+                    req.started = True
+            if req.cancelled:
+                req.done.set()
+                continue
+            started = time.time()
+            try:
+                req.run()
+            except BaseException as exc:  # surfaced to the caller
+                req.error = exc
+            finished = time.time()
+            with self._lock:
+                wait = started - req.queued_ts
+                self._waits.append(wait)
+                self._execs.append(finished - started)
+                slot = self._by_owner.setdefault(req.owner, [0.0, 0.0])
+                slot[0] += 1
+                slot[1] += wait
+                self.executed += 1
+                if req.error is not None:
+                    self.failed += 1
+            req.done.set()
+
+    def submit(self, run: Callable[[], None], ctx: object = None) -> bool:
+        """Queue ``run`` and block until it ran; False when ``ctx`` stopped first.
+
+        Raises whatever ``run`` raised, as a direct call would.
+        """
+        self._ensure_thread()
+        req = _Request(owner=str(getattr(ctx, "instance_id", "") or "-"), run=run)
+        self._queue.put(req)
+        stop_event = getattr(ctx, "stop_event", None)
+        while not req.done.wait(_POLL_S):
+            if stop_event is not None and stop_event.is_set():
+                # Not started yet: drop it; the input thread skips cancelled requests.
+                # Once started it runs to completion (no half-done drags).
+                with self._lock:
+                    if not req.started and not req.cancelled:
+                        req.cancelled = True
+                        self.cancelled += 1
+                if req.cancelled:
+                    return False
+        if req.error is not None:
+            raise req.error
+        return not req.cancelled
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            waits = sorted(self._waits)
+            execs = list(self._execs)
+            by_owner = {
+                owner: {"count": int(n), "avg_wait_ms": round(1000.0 * total / n, 1) if n else 0.0}
+                for owner, (n, total) in self._by_owner.items()
+            }
+            executed, cancelled, failed = self.executed, self.cancelled, self.failed
+        p95 = waits[min(len(waits), max(1, math.ceil(0.95 * len(waits)))) - 1] if waits else 0.0
+        return {
+            "queued": self._queue.qsize(),
+            "executed": executed,
+            "cancelled": cancelled,
+            "failed": failed,
+            "wait_ms": {
+                "avg": round(1000.0 * sum(waits) / len(waits), 1) if waits else 0.0,
+                "p95": round(1000.0 * p95, 1),
+                "max": round(1000.0 * waits[-1], 1) if waits else 0.0,
+            },
+            "exec_ms_avg": round(1000.0 * sum(execs) / len(execs), 1) if execs else 0.0,
+            "by_instance": by_owner,
+        }
+
+
+_arbiter = InputArbiter()
+
+
+def stats() -> Dict[str, object]:
+    """Input backend and arbiter queue statistics (for /api/metrics)."""
+    out = _arbiter.stats()
+    out["backend"] = input_backend()
+    return out
+
+
+def input_backend() -> str:
+    try:
+        name = str(getattr(config.DEFAULT_CONFIG, "input_backend", "cursor"))
+    except Exception:
+        name = "cursor"
+    return name if name in INPUT_BACKENDS else "cursor"
+
+
+def capture_backend() -> str:
+    try:
+        name = str(getattr(config.DEFAULT_CONFIG, "capture_backend", "screen"))
+    except Exception:
+        name = "screen"
+    return name if name in CAPTURE_BACKENDS else "screen"
+
+
+def _to_client(ctx: object, x: int, y: int) -> Tuple[int, int]:
+    left, top, _w, _h = getattr(ctx, "window_rect", (0, 0, 0, 0))
+    return int(x) - int(left), int(y) - int(top)
+
+
+def _message_target(ctx: object) -> Optional[int]:
+    if input_backend() != "message":
+        return None
+    return getattr(ctx, "hwnd", None)
+
+
+def click(ctx: object, x: int, y: int) -> None:
+    """Left-click screen point (x, y) in the context's game window."""
+    hwnd = _message_target(ctx)
+    if hwnd is not None:
+        cx, cy = _to_client(ctx, x, y)
+        post_click_client(hwnd, cx, cy)
+        return
+    hwnd = getattr(ctx, "hwnd", None)
+
+    def _run() -> None:
+        if hwnd is not None:
+            bring_to_front(hwnd)
+            time.sleep(_FOCUS_SETTLE_S)
+        click_screen_xy(x, y)
+
+    _arbiter.submit(_run, ctx)
+
+
+def drag(ctx: object, sx: int, sy: int, ex: int, ey: int, duration_s: float = 0.15, steps: int = 8) -> None:
+    """Left-drag between screen points in the context's game window."""
+    hwnd = _message_target(ctx)
+    if hwnd is not None:
+        csx, csy = _to_client(ctx, sx, sy)
+        cex, cey = _to_client(ctx, ex, ey)
+        post_drag_client(hwnd, csx, csy, cex, cey, duration_s, steps)
+        return
+    hwnd = getattr(ctx, "hwnd", None)
+
+    def _run() -> None:
+        if hwnd is not None:
+            bring_to_front(hwnd)
+            time.sleep(_FOCUS_SETTLE_S)
+        drag_screen_xy(sx, sy, ex, ey, duration_s, steps)
+
+    _arbiter.submit(_run, ctx)
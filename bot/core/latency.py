@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, List, Optional
+
+
+# Observed UI response latencies (seconds from the last input until the
+# expected template became detectable), keyed "machine/step/name". Adaptive
+# Waits size themselves from a high percentile of these samples.
+
+_lock = threading.Lock()
+try:
+    import bot.config as config  # type: ignore
+
+    _path: Path = Path(getattr(config.DEFAULT_CONFIG, "latency_file", None) or "bot.latency.json")
+except Exception:
+    _path = Path("bot.latency.json")
+try:
+    if not _path.is_absolute():
+        _path = Path.cwd() / _path
+except Exception:
+    pass
+
+# Samples kept per key; old ones roll off so the estimate follows game/PC changes
+_MAX_SAMPLES = 200
+# Below this many samples the configured duration is used as is
+MIN_SAMPLES = 8
+# Added on top of the percentile so the wait ends just after the UI is ready
+_MARGIN_S = 0.1
+_SAVE_INTERVAL_S = 60.0
+
+_samples: Dict[str, Deque[float]] = {}
+_dirty = False
+_last_save = 0.0
+
+
+def key_for(machine: Optional[str], step: Optional[str], name: str) -> str:
+    return f"{machine or '-'}/{step or '-'}/{name}"
+
+
+def _load_locked() -> None:
+    try:
+        if not _path.exists():
+            return
+        with _path.open("r", encoding="utf-8") as fh:
+            data = json.load(fh)
+        if isinstance(data, dict):
+            for key, values in data.items():
+                if isinstance(values, list):
+                    ring: Deque[float] = deque(maxlen=_MAX_SAMPLES)
+                    for v in values[-_MAX_SAMPLES:]:
+                        try:
+                            ring.append(float(v))
+                        except Exception:
+                            continue
+                    _samples[str(key)] = ring
+    except Exception:
+        pass
+
+
+def _save_locked() -> None:
+    global _dirty, _last_save
+    payload = {k: [round(v, 3) for v in ring] for k, ring in _samples.items()}
+    tmp = _path.with_name(_path.name + ".tmp")
+    try:
+        _path.parent.mkdir(parents=True, exist_ok=True)
+        with tmp.open("w", encoding="utf-8") as fh:
+            json.dump(payload, fh, separators=(",", ":"))
+        os.replace(tmp, _path)
+        _dirty = False
+        _last_save = time.time()
+    except Exception:
+        pass
+
+
+def record(key: str, seconds: float) -> None:
+    """Add one observed latency for ``key``; persisted at most once a minute."""
+    global _dirty
+    try:
+        value = float(seconds)
+    except Exception:
+        return
+    if not math.isfinite(value) or value < 0:
+        return
+    with _lock:
+        ring = _samples.get(key)
+        if ring is None:
+            ring = deque(maxlen=_MAX_SAMPLES)
+            _samples[key] = ring
+        ring.append(value)
+        _dirty = True
+        if time.time() - _last_save >= _SAVE_INTERVAL_S:
+            _save_locked()
+
+
+def count(key: str) -> int:
+    with _lock:
+        ring = _samples.get(key)
+        return len(ring) if ring else 0
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    # Nearest-rank percentile: never below an actually observed value
+    rank = max(1, math.ceil(q * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def percentile(key: str, q: float) -> Optional[float]:
+    with _lock:
+        ring = _samples.get(key)
+        values = list(ring) if ring else []
+    if not values:
+        return None
+    return _percentile(values, q)
+
+
+def suggest(key: str, default: float, lo: float, hi: float, q: float = 0.95) -> float:
+    """Learned wait for ``key``: percentile ``q`` plus a small margin, clamped to [lo, hi].
+
+    Falls back to ``default`` until MIN_SAMPLES observations exist.
+    """
+    with _lock:
+        ring = _samples.get(key)
+        values = list(ring) if ring and len(ring) >= MIN_SAMPLES else None
+    if values is None:
+        return float(default)
+    return min(float(hi), max(float(lo), _percentile(values, q) + _MARGIN_S))
+
+
+def snapshot(q: float = 0.95) -> Dict[str, Dict[str, float]]:
+    """Per-key sample count, median and percentile ``q`` (for the web API)."""
+    with _lock:
+        items = [(k, list(ring)) for k, ring in _samples.items()]
+    out: Dict[str, Dict[str, float]] = {}
+    for key, values in items:
+        if not values:
+            continue
+        out[key] = {
+            "n": len(values),
+            "p50": round(_percentile(values, 0.5), 3),
+            "pq": round(_percentile(values, q), 3),
+            "max": round(max(values), 3),
+        }
+    return out
+
+
+def reset(key: Optional[str] = None) -> None:
+    global _dirty
+    with _lock:
+        if key is None:
+            _samples.clear()
+        else:
+            _samples.pop(key, None)
+        _dirty = True
+        _save_locked()
+
+
+def flush() -> None:
+    with _lock:
+        if _dirty:
+            _save_locked()
+
+
+with _lock:
+    _load_locked()
+atexit.register(flush)
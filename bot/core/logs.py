@@ -1,32 +1,158 @@
 from __future__ import annotations
 
+import atexit
+import datetime as _dt
+import json
+import os
+import queue
 import threading
 import time
-from collections import deque
-from dataclasses import dataclass, asdict
-from typing import Deque, Dict, List, Literal, Optional, IO
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Literal, Mapping, Optional, IO, Sequence, Tuple
 from pathlib import Path
 
 
-Level = Literal["info", "ok", "err"]
+Level = Literal["debug", "info", "ok", "pink", "warn", "err"]
+
+# Severity used for level filtering; ok/pink are styled variants of info
+_LEVEL_RANK: Dict[str, int] = {"debug": 0, "info": 1, "ok": 1, "pink": 1, "warn": 2, "err": 3}
 
 
 @dataclass
 class LogEntry:
+    """A log record. Structured entries keep a format string plus fields and
+    only render ``text`` when something reads it (UI poll or file writer)."""
+
     id: int
     ts: float
     level: Level
-    text: str
+    category: str = ""
+    fmt: str = ""
+    fields: Optional[Dict[str, Any]] = None
+    suppressed: int = 0
+    # Bot instance whose thread recorded it ("" = process-wide)
+    instance: str = ""
+    _text: Optional[str] = field(default=None, repr=False)
+    _json: Optional[str] = field(default=None, repr=False)
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            try:
+                body = self.fmt.format(**(self.fields or {}))
+            except Exception:
+                body = f"{self.fmt} {self.fields}"
+            self._text = f"[{self.category}] {body}" if self.category else body
+            if self.suppressed:
+                self._text += f" (+{self.suppressed} suppressed)"
+        return self._text
+
+    def to_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "id": self.id,
+            "ts": self.ts,
+            "level": self.level,
+            "text": self.text,
+        }
+        if self.category:
+            out["category"] = self.category
+        if self.instance:
+            out["instance"] = self.instance
+        if self.fields:
+            out["fields"] = self.fields
+        return out
+
+    def to_json(self) -> str:
+        # Serialized once, then reused by every /api/logs poll
+        if self._json is None:
+            self._json = json.dumps(self.to_dict(), ensure_ascii=False, default=str)
+        return self._json
+
+
+class _LogRing:
+    """Fixed-capacity ring of entries with contiguous, increasing ids.
+
+    Because ids are assigned sequentially at append time, the entry for a
+    given id sits at a computable offset from the oldest one, so "newer than
+    id N" is a direct slice instead of a scan.
+    """
+
+    __slots__ = ("_items", "_head", "_size")
+
+    def __init__(self, capacity: int) -> None:
+        self._items: List[Optional[LogEntry]] = [None] * max(1, int(capacity))
+        self._head = 0  # index of the oldest entry
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return len(self._items)
+
+    def append(self, entry: LogEntry) -> None:
+        cap = len(self._items)
+        if self._size < cap:
+            self._items[(self._head + self._size) % cap] = entry
+            self._size += 1
+        else:
+            self._items[self._head] = entry
+            self._head = (self._head + 1) % cap
+
+    def _slice(self, offset: int) -> List[LogEntry]:
+        cap = len(self._items)
+        start = (self._head + offset) % cap
+        count = self._size - offset
+        end = start + count
+        if end <= cap:
+            out = self._items[start:end]
+        else:
+            out = self._items[start:] + self._items[: end - cap]
+        return out  # type: ignore[return-value]
+
+    def since(self, since_id: int) -> List[LogEntry]:
+        if not self._size:
+            return []
+        first_id = self._items[self._head].id  # type: ignore[union-attr]
+        offset = max(0, int(since_id) - first_id + 1)
+        if offset >= self._size:
+            return []
+        return self._slice(offset)
+
+    def tail(self, n: int) -> List[LogEntry]:
+        return self._slice(max(0, self._size - max(0, int(n))))
+
+    def resized(self, capacity: int) -> "_LogRing":
+        ring = _LogRing(capacity)
+        for entry in self.tail(ring.capacity):
+            ring.append(entry)
+        return ring
 
 
 _lock = threading.Lock()
-_buf: Deque[LogEntry] = deque(maxlen=400)
+_DEFAULT_BUFFER_SIZE = 2000
+_buf = _LogRing(_DEFAULT_BUFFER_SIZE)
 _next_id = 1
 _fh: Optional[IO[str]] = None
 _log_path_base: Optional[Path] = None
 _log_max_bytes: int = 1_048_576
 _log_backups: int = 5
 _file_lock = threading.Lock()
+# Asynchronous file sink: add() only enqueues; a writer thread formats, writes
+# and flushes in batches, tracking the file size itself instead of stat-ing.
+_queue: "queue.SimpleQueue[LogEntry]" = queue.SimpleQueue()
+_writer: Optional[threading.Thread] = None
+_file_bytes: int = 0
+_WRITE_INTERVAL_S = 0.25
+_BATCH_MAX = 1000
+# Filtering: global minimum level, per-category minimum levels, and per-category
+# rate limits (entries/second) applied before anything is formatted or buffered.
+_min_rank: int = _LEVEL_RANK["info"]
+_category_ranks: Dict[str, int] = {}
+_rate_limits: Dict[str, float] = {}
+# category -> [tokens, last_refill_ts, suppressed_since_last_admit]
+_rate_state: Dict[str, List[float]] = {}
 
 try:
     # Configure file logging from app config if available
@@ -48,6 +174,8 @@ try:
             # Small header on startup
             _fh.write("\n=== bot start ===\n")
             _fh.flush()
+            # Only stat once; afterwards the writer counts bytes as it goes
+            _file_bytes = p.stat().st_size
         except Exception:
             _fh = None
 except Exception:
@@ -55,8 +183,96 @@ except Exception:
     _fh = None
 
 
+def configure(
+    level: str = "info",
+    category_levels: Sequence[Tuple[str, str]] | Mapping[str, str] = (),
+    rate_limits: Sequence[Tuple[str, float]] | Mapping[str, float] = (),
+    buffer_size: Optional[int] = None,
+) -> None:
+    """Set level filters, per-category rate limits and the in-memory buffer
+    size (safe to call at runtime)."""
+    global _min_rank, _category_ranks, _rate_limits, _buf
+    items_lv = category_levels.items() if isinstance(category_levels, Mapping) else category_levels
+    items_rl = rate_limits.items() if isinstance(rate_limits, Mapping) else rate_limits
+    ranks: Dict[str, int] = {}
+    for cat, lv in items_lv:
+        rank = _LEVEL_RANK.get(str(lv).strip().lower())
+        if cat and rank is not None:
+            ranks[str(cat)] = rank
+    limits: Dict[str, float] = {}
+    for cat, rate in items_rl:
+        try:
+            r = float(rate)
+        except Exception:
+            continue
+        if cat and r > 0:
+            limits[str(cat)] = r
+    with _lock:
+        _min_rank = _LEVEL_RANK.get(str(level).strip().lower(), _LEVEL_RANK["info"])
+        _category_ranks = ranks
+        _rate_limits = limits
+        _rate_state.clear()
+        if buffer_size is not None and int(buffer_size) > 0 and int(buffer_size) != _buf.capacity:
+            _buf = _buf.resized(int(buffer_size))
+
+
+def configure_from(cfg: Any) -> None:
+    configure(
+        level=str(getattr(cfg, "log_level", "info")),
+        category_levels=getattr(cfg, "log_category_levels", ()),
+        rate_limits=getattr(cfg, "log_rate_limits", ()),
+        buffer_size=getattr(cfg, "log_buffer_size", None),
+    )
+
+
+try:
+    configure_from(config.DEFAULT_CONFIG)  # type: ignore[name-defined]
+except Exception:
+    pass
+
+
+def enabled(category: str, level: Level = "info") -> bool:
+    """Cheap pre-check so callers can skip building expensive fields."""
+    rank = _LEVEL_RANK.get(level, 1)
+    return rank >= _category_ranks.get(category, _min_rank)
+
+
+def _admit_locked(category: str, level: Level, now: float) -> Optional[int]:
+    """Token bucket per rate-limited category; errors always pass and use no tokens.
+
+    Returns the number of entries suppressed since the last admitted one, or
+    None when this entry should be dropped.
+    """
+    rate = _rate_limits.get(category)
+    if rate is None or level == "err":
+        return 0
+    state = _rate_state.get(category)
+    burst = max(1.0, rate)
+    if state is None:
+        state = _rate_state[category] = [burst, now, 0]
+    tokens = min(burst, state[0] + (now - state[1]) * rate)
+    state[1] = now
+    if tokens < 1.0:
+        state[0] = tokens
+        state[2] += 1
+        return None
+    state[0] = tokens - 1.0
+    suppressed = int(state[2])
+    state[2] = 0
+    return suppressed
+
+
+def _category_of(text: str) -> str:
+    # Legacy messages carry their category as a "[Name]" prefix
+    if text.startswith("["):
+        end = text.find("]", 1, 48)
+        if end > 1:
+            return text[1:end]
+    return ""
+
+
 def _rotate_locked() -> None:
-    global _fh
+    global _fh, _file_bytes
     if _fh is None or _log_path_base is None:
         return
     try:
@@ -65,72 +281,408 @@ def _rotate_locked() -> None:
             _fh.close()
         except Exception:
             pass
-        # Rotate existing files: base.(n-1)->base.n ... base.1->base.2, base->base.1
+        # Seal the index of the file being rotated out
+        _close_block_locked()
+        # Rotate existing files (and their index sidecars):
+        # base.(n-1)->base.n ... base.1->base.2, base->base.1
         base = _log_path_base
         for i in range(_log_backups - 1, 0, -1):
             src = base.with_name(base.name + f".{i}")
             dst = base.with_name(base.name + f".{i+1}")
+            for s_path, d_path in ((src, dst), (_index_path(src), _index_path(dst))):
+                try:
+                    if s_path.exists():
+                        if d_path.exists():
+                            d_path.unlink()
+                        s_path.rename(d_path)
+                except Exception:
+                    pass
+        first = base.with_name(base.name + ".1")
+        for s_path, d_path in ((base, first), (_index_path(base), _index_path(first))):
             try:
-                if src.exists():
-                    if dst.exists():
-                        dst.unlink()
-                    src.rename(dst)
+                if d_path.exists():
+                    d_path.unlink()
+                if s_path.exists():
+                    s_path.rename(d_path)
             except Exception:
                 pass
-        try:
-            first = base.with_name(base.name + ".1")
-            if first.exists():
-                first.unlink()
-            if base.exists():
-                base.rename(first)
-        except Exception:
-            pass
         # Reopen base
         try:
             _fh = open(base, "a", encoding="utf-8")
-            _fh.write("\n=== log rotate ===\n")
+            header = "\n=== log rotate ===\n"
+            _fh.write(header)
             _fh.flush()
+            _file_bytes = _encoded_len(header)
         except Exception:
             _fh = None
     except Exception:
         pass
 
 
-def add(text: str, level: Level = "info") -> None:
+# On-disk index ---------------------------------------------------------------
+#
+# Each log file gets a "<name>.idx" sidecar with one JSON line per block of
+# written entries: byte range, time range, and the levels/categories present.
+# Searches use it to read only the byte ranges that can match.
+
+_INDEX_BLOCK_BYTES = 64 * 1024
+_INDEX_BLOCK_AGE_S = 60.0
+# Current open block: start/end offsets, time range, levels and categories seen
+_blk: Optional[Dict[str, Any]] = None
+
+
+def _index_path(p: Path) -> Path:
+    return p.with_name(p.name + ".idx")
+
+
+def _note_line_locked(entry: LogEntry, offset: int) -> None:
+    global _blk
+    if _blk is None:
+        _blk = {"s": offset, "t0": entry.ts, "t1": entry.ts, "lv": set(), "cat": set()}
+    _blk["t1"] = entry.ts
+    _blk["lv"].add(entry.level)
+    if entry.category:
+        _blk["cat"].add(entry.category)
+
+
+def _close_block_locked() -> None:
+    global _blk
+    blk = _blk
+    _blk = None
+    if blk is None or _log_path_base is None or _file_bytes <= blk["s"]:
+        return
+    record = {
+        "s": blk["s"],
+        "e": _file_bytes,
+        "t0": round(blk["t0"], 3),
+        "t1": round(blk["t1"], 3),
+        "lv": sorted(blk["lv"]),
+        "cat": sorted(blk["cat"]),
+    }
+    try:
+        with open(_index_path(_log_path_base), "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(record, separators=(",", ":")) + "\n")
+    except Exception:
+        pass
+
+
+def _maybe_close_block_locked() -> None:
+    if _blk is None:
+        return
+    if _file_bytes - _blk["s"] >= _INDEX_BLOCK_BYTES or time.time() - _blk["t0"] >= _INDEX_BLOCK_AGE_S:
+        _close_block_locked()
+
+
+def _encoded_len(data: str) -> int:
+    n = len(data.encode("utf-8", errors="replace"))
+    if os.name == "nt":
+        # Text mode writes CRLF on Windows
+        n += data.count("\n")
+    return n
+
+
+def _format_line(entry: LogEntry) -> str:
+    # Timestamp: YYYY-MM-DD HH:MM:SS.mmm
+    t = _dt.datetime.fromtimestamp(entry.ts)
+    stamp = t.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+    return f"[{stamp}] {entry.level.upper()}: {entry.text}\n"
+
+
+def _write_batch_locked(batch: List[LogEntry]) -> None:
+    if _fh is None:
+        return
+    chunk: List[str] = []
+    chunk_bytes = 0
+    for entry in batch:
+        try:
+            line = _format_line(entry)
+        except Exception:
+            continue
+        _note_line_locked(entry, _file_bytes + chunk_bytes)
+        chunk.append(line)
+        chunk_bytes += _encoded_len(line)
+        # Rotate at the exact entry that crosses the limit
+        if _log_path_base is not None and _log_max_bytes > 0 and _file_bytes + chunk_bytes >= _log_max_bytes:
+            _write_chunk_locked(chunk, chunk_bytes)
+            chunk, chunk_bytes = [], 0
+            _rotate_locked()
+            if _fh is None:
+                return
+    if chunk:
+        _write_chunk_locked(chunk, chunk_bytes)
+    _maybe_close_block_locked()
+
+
+def _write_chunk_locked(chunk: List[str], chunk_bytes: int) -> None:
+    global _file_bytes
+    if _fh is None or not chunk:
+        return
+    try:
+        _fh.write("".join(chunk))
+        _fh.flush()
+        _file_bytes += chunk_bytes
+    except Exception:
+        pass
+
+
+def _drain(limit: int) -> List[LogEntry]:
+    batch: List[LogEntry] = []
+    while len(batch) < limit:
+        try:
+            batch.append(_queue.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+
+def _writer_loop() -> None:
+    while True:
+        first = _queue.get()
+        batch = [first] + _drain(_BATCH_MAX - 1)
+        with _file_lock:
+            _write_batch_locked(batch)
+        # Let the next batch accumulate instead of waking per entry
+        time.sleep(_WRITE_INTERVAL_S)
+
+
+def flush() -> None:
+    """Write every queued entry to the log file now (shutdown/quit)."""
+    if _fh is None:
+        return
+    with _file_lock:
+        while True:
+            batch = _drain(_BATCH_MAX)
+            if not batch:
+                break
+            _write_batch_locked(batch)
+        _close_block_locked()
+
+
+if _fh is not None:
+    _writer = threading.Thread(target=_writer_loop, name="log-writer", daemon=True)
+    _writer.start()
+    atexit.register(flush)
+
+
+# Instance the calling thread works for, stamped on its entries (set_instance)
+_thread_instance = threading.local()
+
+
+def set_instance(instance: Optional[str]) -> None:
+    """Tag entries recorded by the calling thread with bot instance ``instance``
+    (None or "" for process-wide entries)."""
+    _thread_instance.value = str(instance or "")
+
+
+def _record(
+    category: str,
+    level: Level,
+    fmt: str,
+    fields: Optional[Dict[str, Any]],
+    text: Optional[str],
+) -> Optional[LogEntry]:
     global _next_id
+    if _LEVEL_RANK.get(level, 1) < _category_ranks.get(category, _min_rank):
+        return None
     now = time.time()
     # First, update in-memory buffer under lock
     with _lock:
-        entry = LogEntry(id=_next_id, ts=now, level=level, text=text)
+        suppressed = _admit_locked(category, level, now)
+        if suppressed is None:
+            return None
+        entry = LogEntry(
+            id=_next_id,
+            ts=now,
+            level=level,
+            category=category,
+            fmt=fmt,
+            fields=fields,
+            suppressed=suppressed,
+            instance=getattr(_thread_instance, "value", ""),
+            _text=text,
+        )
         _buf.append(entry)
         _next_id += 1
-    # Then, write to file outside the lock to avoid blocking other threads
+    # Then hand off to the file writer; the caller never waits on disk
     if _fh is not None:
-        with _file_lock:
-            try:
-                # Timestamp: YYYY-MM-DD HH:MM:SS.mmm
-                import datetime as _dt
-                t = _dt.datetime.fromtimestamp(now)
-                ts = t.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-                _fh.write(f"[{ts}] {level.upper()}: {text}\n")
-                _fh.flush()
-                # Rotate if file exceeds max bytes
-                if _log_path_base is not None and _log_max_bytes > 0:
-                    try:
-                        size = _log_path_base.stat().st_size
-                        if size >= _log_max_bytes:
-                            _rotate_locked()
-                    except Exception:
-                        pass
-            except Exception:
-                pass
+        _queue.put(entry)
+    return entry
+
+
+def add(text: str, level: Level = "info") -> None:
+    """Record a preformatted message; its "[Category]" prefix drives filtering."""
+    _record(_category_of(text), level, "", None, text)
+
 
+def event(category: str, fmt: str, /, level: Level = "info", **fields: Any) -> Optional[LogEntry]:
+    """Record a structured entry rendered lazily as "[category] fmt.format(**fields)".
 
-def get_since(since_id: Optional[int]) -> List[Dict]:
+    Returns the entry when it passed level and rate filters, else None.
+    """
+    return _record(category, level, fmt, fields, None)
+
+
+_TAIL_ON_FIRST_POLL = 100
+
+
+def _entries_since(since_id: Optional[int], instance: Optional[str] = None) -> List[LogEntry]:
+    first_poll = since_id is None or since_id <= 0
     with _lock:
-        if not _buf:
-            return []
-        if since_id is None or since_id <= 0:
-            # Return a snapshot of the tail
-            return [asdict(e) for e in list(_buf)[-100:]]
-        return [asdict(e) for e in _buf if e.id > since_id]
+        if first_poll:
+            # Return a snapshot of the tail (of the whole ring when filtering)
+            entries = _buf.tail(_TAIL_ON_FIRST_POLL if instance is None else len(_buf))
+        else:
+            entries = _buf.since(since_id)
+    if instance is None:
+        return entries
+    # An instance's view keeps process-wide entries (OCR, window locator, web)
+    entries = [e for e in entries if e.instance in ("", instance)]
+    return entries[-_TAIL_ON_FIRST_POLL:] if first_poll else entries
+
+
+def get_since(since_id: Optional[int], instance: Optional[str] = None) -> List[Dict]:
+    return [e.to_dict() for e in _entries_since(since_id, instance)]
+
+
+def get_since_json(since_id: Optional[int], instance: Optional[str] = None) -> str:
+    """JSON array of entries newer than ``since_id``, built from cached per-entry JSON.
+
+    With ``instance``, only that instance's entries and process-wide ones.
+    """
+    # Serialize outside the lock; each entry caches its own JSON string
+    return "[" + ",".join(e.to_json() for e in _entries_since(since_id, instance)) + "]"
+
+
+# Archive search --------------------------------------------------------------
+
+_LINE_TS_FMT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+def _archive_files() -> List[Path]:
+    """Log files oldest first: base.N ... base.1, base."""
+    if _log_path_base is None:
+        return []
+    base = _log_path_base
+    files: List[Path] = []
+    for i in range(_log_backups, 0, -1):
+        p = base.with_name(base.name + f".{i}")
+        if p.exists():
+            files.append(p)
+    if base.exists():
+        files.append(base)
+    return files
+
+
+def _load_index(p: Path) -> List[Dict[str, Any]]:
+    blocks: List[Dict[str, Any]] = []
+    try:
+        with open(_index_path(p), "r", encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    blocks.append(json.loads(line))
+                except Exception:
+                    continue
+    except Exception:
+        pass
+    return blocks
+
+
+def _candidate_ranges(
+    p: Path,
+    since_ts: Optional[float],
+    until_ts: Optional[float],
+    levels: Optional[set],
+    category: Optional[str],
+) -> List[Tuple[int, Optional[int]]]:
+    """Byte ranges of ``p`` that may contain matches (end None = to EOF)."""
+    blocks = _load_index(p)
+    ranges: List[Tuple[int, Optional[int]]] = []
+    indexed_end = 0
+    for b in blocks:
+        try:
+            start, end = int(b["s"]), int(b["e"])
+            t0, t1 = float(b["t0"]), float(b["t1"])
+        except Exception:
+            continue
+        indexed_end = max(indexed_end, end)
+        if since_ts is not None and t1 < since_ts:
+            continue
+        if until_ts is not None and t0 > until_ts:
+            continue
+        if levels and not levels.intersection(b.get("lv") or ()):
+            continue
+        if category and category not in (b.get("cat") or ()):
+            continue
+        if ranges and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((start, end))
+    # Entries written after the last sealed block (or files without an index)
+    ranges.append((indexed_end, None))
+    return ranges
+
+
+def _parse_line(line: str) -> Optional[Tuple[float, str, str]]:
+    # "[YYYY-MM-DD HH:MM:SS.mmm] LEVEL: text"
+    if not line.startswith("[") or len(line) < 27 or line[24:26] != "] ":
+        return None
+    sep = line.find(": ", 26)
+    if sep < 0:
+        return None
+    try:
+        ts = _dt.datetime.strptime(line[1:24], _LINE_TS_FMT).timestamp()
+    except ValueError:
+        return None
+    return ts, line[26:sep].lower(), line[sep + 2 :]
+
+
+def search(
+    since_ts: Optional[float] = None,
+    until_ts: Optional[float] = None,
+    levels: Optional[Sequence[str]] = None,
+    category: Optional[str] = None,
+    text: Optional[str] = None,
+    limit: int = 500,
+) -> Dict[str, Any]:
+    """Search the rotated log files, oldest match first.
+
+    Time range, level and category narrow the byte ranges through the index
+    sidecars; ``text`` is a case-insensitive substring filter on the message.
+    """
+    level_set = {str(lv).strip().lower() for lv in levels if str(lv).strip()} if levels else None
+    needle = text.lower() if text else None
+    limit = max(1, int(limit))
+    out: List[Dict[str, Any]] = []
+    scanned_bytes = 0
+    for p in _archive_files():
+        try:
+            fh = open(p, "rb")
+        except Exception:
+            continue
+        with fh:
+            for start, end in _candidate_ranges(p, since_ts, until_ts, level_set, category):
+                try:
+                    fh.seek(start)
+                    data = fh.read() if end is None else fh.read(max(0, end - start))
+                except Exception:
+                    continue
+                scanned_bytes += len(data)
+                for raw in data.decode("utf-8", errors="replace").splitlines():
+                    parsed = _parse_line(raw)
+                    if parsed is None:
+                        continue
+                    ts, level, msg = parsed
+                    if since_ts is not None and ts < since_ts:
+                        continue
+                    if until_ts is not None and ts > until_ts:
+                        continue
+                    if level_set and level not in level_set:
+                        continue
+                    if category and _category_of(msg) != category:
+                        continue
+                    if needle and needle not in msg.lower():
+                        continue
+                    out.append({"ts": ts, "level": level, "text": msg, "file": p.name})
+                    if len(out) >= limit:
+                        return {"results": out, "truncated": True, "scanned_bytes": scanned_bytes}
+    return {"results": out, "truncated": False, "scanned_bytes": scanned_bytes}
@@ -0,0 +1,647 @@
+from __future__ import annotations
+
+import atexit
+import hashlib
+import importlib.util
+import itertools
+import multiprocessing
+import multiprocessing.connection
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+# easyocr (and torch behind it) is imported on the first in-process load, so
+# with worker processes this process never pays for it
+try:
+    HAS_EASYOCR = importlib.util.find_spec("easyocr") is not None
+except Exception:  # pragma: no cover
+    HAS_EASYOCR = False
+
+from . import logs
+
+
+# Process-wide easyocr readers, one per language set. A reader takes seconds
+# and hundreds of MB to load, so all ReadText actions share it and it
+# survives machine rebuilds. easyocr readers are not thread-safe: inference
+# on one reader is serialized by its own lock.
+#
+# With OCR_WORKERS > 0 the readers live in worker processes instead
+# (bot.core.ocr_worker), so inference neither holds this process's GIL nor
+# grows its memory. Crops travel through shared memory; requests arriving
+# within a few milliseconds of each other go to a worker as one batch.
+
+LangKey = Tuple[str, ...]
+
+
+@dataclass
+class _Slot:
+    langs: LangKey
+    reader: Any = None
+    error: Optional[str] = None
+    failed_ts: float = 0.0
+    load_s: float = 0.0
+    reads: int = 0
+    read_s: float = 0.0
+    loaded: threading.Event = field(default_factory=threading.Event)
+    infer_lock: threading.Lock = field(default_factory=threading.Lock)
+    loading: bool = False
+
+
+_lock = threading.Lock()
+_slots: Dict[LangKey, _Slot] = {}
+
+# Collect requests for this long (or until _BATCH_MAX) before sending a batch
+_BATCH_WINDOW_S = 0.005
+_BATCH_MAX = 8
+# A worker that has not answered by then is treated as hung
+_RESULT_TIMEOUT_S = 60.0
+# A worker that exits fails its batches at once and is respawned, but no
+# sooner than this after its previous start (a worker crashing on load
+# would otherwise restart in a loop); _WATCH_INTERVAL_S bounds the wait
+_RESPAWN_MIN_S = 5.0
+_WATCH_INTERVAL_S = 1.0
+# A failed reader load is not retried before this; reads meanwhile fail fast
+_LOAD_RETRY_S = 60.0
+
+
+class _ResultCache:
+    """Bounded LRU of OCR results keyed by crop content and read settings."""
+
+    def __init__(self) -> None:
+        self._items: "OrderedDict[str, Tuple[List[Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_s = 0.0
+
+    def get(self, key: str) -> Optional[List[Any]]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            # A hit saves what the original preprocess + inference cost
+            self.saved_s += item[1]
+            return item[0]
+
+    def put(self, key: str, results: List[Any], cost_s: float, capacity: int) -> None:
+        with self._lock:
+            self._items[key] = (results, float(cost_s))
+            self._items.move_to_end(key)
+            while len(self._items) > capacity:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def stats(self, capacity: int) -> Dict[str, object]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._items),
+                "capacity": capacity,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "saved_s": round(self.saved_s, 2),
+            }
+
+
+_cache = _ResultCache()
+
+
+def lang_key(langs: Optional[Sequence[str]]) -> LangKey:
+    """Normalized language set: order kept (easyocr weighs the first), duplicates dropped."""
+    out: List[str] = []
+    for lang in langs or ("en",):
+        s = str(lang).strip()
+        if s and s not in out:
+            out.append(s)
+    return tuple(out) or ("en",)
+
+
+def _load(slot: _Slot) -> None:
+    started = time.time()
+    try:
+        import easyocr  # type: ignore
+
+        reader = easyocr.Reader(list(slot.langs), gpu=False)
+        slot.reader = reader
+        slot.load_s = time.time() - started
+        try:
+            logs.add(f"[OCR] reader {'+'.join(slot.langs)} loaded in {slot.load_s:.1f}s", level="info")
+        except Exception:
+            pass
+    except Exception as exc:
+        slot.error = str(exc)
+        slot.failed_ts = time.time()
+        try:
+            logs.add(f"[OCR] easyocr init failed for {'+'.join(slot.langs)}: {exc}", level="err")
+        except Exception:
+            pass
+    finally:
+        slot.loading = False
+        slot.loaded.set()
+
+
+def _slot(langs: Optional[Sequence[str]], background: bool) -> Optional[_Slot]:
+    """Slot for ``langs``, starting its load (on a daemon thread when ``background``)."""
+    if not HAS_EASYOCR:
+        return None
+    key = lang_key(langs)
+    with _lock:
+        slot = _slots.get(key)
+        start = slot is None or (
+            slot.error is not None and not slot.loading and time.time() - slot.failed_ts >= _LOAD_RETRY_S
+        )
+        if start:
+            slot = _Slot(langs=key, loading=True)
+            _slots[key] = slot
+    if start:
+        if background:
+            threading.Thread(target=_load, args=(slot,), name=f"ocr-load-{'+'.join(key)}", daemon=True).start()
+        else:
+            _load(slot)
+    return slot
+
+
+class _ProcessPool:
+    """easyocr readers in ``workers`` spawned processes, fed batches of shared-memory crops."""
+
+    def __init__(self, workers: int) -> None:
+        mp = multiprocessing.get_context("spawn")
+        from . import ocr_worker
+
+        self.size = workers
+        self._mp = mp
+        self._worker_main = ocr_worker.worker_main
+        self._results = mp.Queue()
+        self._requests: List[Any] = [None] * workers
+        self._procs: List[Any] = [None] * workers
+        self._started_ts = [0.0] * workers
+        # Workers found dead whose batches were failed; respawned when due
+        self._down: Set[int] = set()
+        self.respawns = 0
+        self._state_lock = threading.Lock()
+        for i in range(workers):
+            self._spawn(i)
+        self._pending: "queue.Queue[Optional[Tuple[Any, LangKey, Future]]]" = queue.Queue()
+        # batch id -> (worker, [(shared memory, future), ...])
+        self._inflight: Dict[int, Tuple[int, List[Tuple[shared_memory.SharedMemory, Future]]]] = {}
+        self._outstanding = [0] * workers
+        self._ready: Dict[LangKey, Set[int]] = {}
+        self._ready_events: Dict[LangKey, threading.Event] = {}
+        self._errors: Dict[LangKey, str] = {}
+        self._failed_ts: Dict[LangKey, float] = {}
+        self._load_s: Dict[LangKey, float] = {}
+        self._reads: Dict[LangKey, Tuple[int, float]] = {}
+        self._ids = itertools.count(1)
+        self.batches = 0
+        self.batched_items = 0
+        self._closed = False
+        threading.Thread(target=self._dispatch_loop, name="ocr-dispatch", daemon=True).start()
+        threading.Thread(target=self._collect_loop, name="ocr-collect", daemon=True).start()
+        threading.Thread(target=self._watch_loop, name="ocr-watch", daemon=True).start()
+
+    def _spawn(self, worker: int) -> None:
+        # A fresh request queue: the old one may hold batches that were already failed
+        requests = self._mp.Queue()
+        proc = self._mp.Process(
+            target=self._worker_main,
+            args=(worker, requests, self._results),
+            name=f"ocr-worker-{worker}",
+            daemon=True,
+        )
+        proc.start()
+        with self._state_lock:
+            old = self._requests[worker]
+            self._requests[worker] = requests
+            self._procs[worker] = proc
+            self._started_ts[worker] = time.time()
+        if old is not None:
+            try:
+                old.cancel_join_thread()
+            except Exception:
+                pass
+
+    def preload(self, key: LangKey) -> threading.Event:
+        with self._state_lock:
+            event = self._ready_events.get(key)
+            if event is not None and key not in self._errors:
+                return event
+            if event is not None and time.time() - self._failed_ts.get(key, 0.0) < _LOAD_RETRY_S:
+                # Failed recently: keep failing fast instead of reloading on every read
+                return event
+            event = threading.Event()
+            self._ready_events[key] = event
+            self._errors.pop(key, None)
+        for q in self._requests:
+            q.put(("load", key))
+        return event
+
+    def submit(self, image: np.ndarray, key: LangKey) -> Future:
+        future: Future = Future()
+        self._pending.put((np.ascontiguousarray(image), key, future))
+        return future
+
+    def _pick_worker(self, key: LangKey) -> Optional[int]:
+        with self._state_lock:
+            ready = [i for i in self._ready.get(key, ()) if self._procs[i].is_alive()]
+            if not ready:
+                return None
+            return min(ready, key=lambda i: self._outstanding[i])
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            first = self._pending.get()
+            if first is None:
+                return
+            batch = [first]
+            window_end = time.time() + _BATCH_WINDOW_S
+            while len(batch) < _BATCH_MAX:
+                try:
+                    nxt = self._pending.get(timeout=max(0.0, window_end - time.time()))
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    self._pending.put(None)
+                    break
+                batch.append(nxt)
+            by_key: Dict[LangKey, List[Tuple[Any, LangKey, Future]]] = {}
+            for item in batch:
+                by_key.setdefault(item[1], []).append(item)
+            for key, items in by_key.items():
+                self._send(key, items)
+
+    def _send(self, key: LangKey, items: List[Tuple[Any, LangKey, Future]]) -> None:
+        worker = self._pick_worker(key)
+        if worker is None:
+            with self._state_lock:
+                reason = self._errors.get(key, "no OCR worker ready")
+            for _img, _key, future in items:
+                future.set_exception(RuntimeError(reason))
+            return
+        batch_id = next(self._ids)
+        entries: List[Tuple[shared_memory.SharedMemory, Future]] = []
+        payload = []
+        for image, _key, future in items:
+            try:
+                shm = shared_memory.SharedMemory(create=True, size=max(1, image.nbytes))
+                np.ndarray(image.shape, dtype=image.dtype, buffer=shm.buf)[...] = image
+            except Exception as exc:
+                future.set_exception(exc)
+                continue
+            entries.append((shm, future))
+            payload.append((shm.name, tuple(image.shape), image.dtype.str, key))
+        if not entries:
+            return
+        with self._state_lock:
+            down = worker in self._down
+            if not down:
+                self._inflight[batch_id] = (worker, entries)
+                self._outstanding[worker] += 1
+                self.batches += 1
+                self.batched_items += len(entries)
+                requests = self._requests[worker]
+        if down:
+            # Died after it was picked; the watcher already failed its other batches
+            self._fail(entries, f"OCR worker {worker} exited")
+            return
+        requests.put(("batch", batch_id, payload))
+
+    def _collect_loop(self) -> None:
+        while True:
+            try:
+                msg = self._results.get()
+            except Exception:
+                return
+            if msg is None:
+                return
+            if msg[0] == "loaded":
+                _kind, worker, langs, load_s, error = msg
+                key = tuple(langs)
+                with self._state_lock:
+                    event = self._ready_events.setdefault(key, threading.Event())
+                    if error is None:
+                        self._ready.setdefault(key, set()).add(worker)
+                        self._load_s[key] = max(self._load_s.get(key, 0.0), float(load_s))
+                    elif not self._ready.get(key):
+                        self._errors[key] = str(error)
+                        self._failed_ts[key] = time.time()
+                try:
+                    if error is None:
+                        logs.add(f"[OCR] worker {worker} loaded {'+'.join(key)} in {load_s:.1f}s", level="info")
+                    else:
+                        logs.add(f"[OCR] worker {worker} failed to load {'+'.join(key)}: {error}", level="err")
+                except Exception:
+                    pass
+                event.set()
+                continue
+            _kind, worker, batch_id, outputs = msg
+            with self._state_lock:
+                # Missing when the worker was already declared dead
+                _worker, entries = self._inflight.pop(batch_id, (worker, []))
+                self._outstanding[worker] = max(0, self._outstanding[worker] - 1)
+            for (shm, future), (status, value) in zip(entries, outputs):
+                try:
+                    shm.close()
+                    shm.unlink()
+                except Exception:
+                    pass
+                if status == "ok":
+                    future.set_result(value)
+                else:
+                    future.set_exception(RuntimeError(str(value)))
+
+    def _watch_loop(self) -> None:
+        while not self._closed:
+            with self._state_lock:
+                procs = list(self._procs)
+            alive = [proc.sentinel for proc in procs if proc.is_alive()]
+            try:
+                if alive:
+                    # Returns as soon as any worker exits
+                    multiprocessing.connection.wait(alive, timeout=_WATCH_INTERVAL_S)
+                else:
+                    time.sleep(_WATCH_INTERVAL_S)
+            except Exception:
+                time.sleep(_WATCH_INTERVAL_S)
+            if self._closed:
+                return
+            for worker in range(self.size):
+                try:
+                    self._check_worker(worker)
+                except Exception:
+                    pass
+
+    def _check_worker(self, worker: int) -> None:
+        """Fail the batches of a worker that exited and respawn it when due."""
+        with self._state_lock:
+            proc = self._procs[worker]
+            if self._closed or proc.is_alive():
+                return
+            newly_down = worker not in self._down
+            failed: List[Tuple[shared_memory.SharedMemory, Future]] = []
+            if newly_down:
+                self._down.add(worker)
+                for batch_id in [b for b, (w, _e) in self._inflight.items() if w == worker]:
+                    failed.extend(self._inflight.pop(batch_id)[1])
+                self._outstanding[worker] = 0
+                for key, ready in self._ready.items():
+                    ready.discard(worker)
+                    if not ready and key not in self._errors:
+                        # No reader left: reads wait (or skip) as while loading
+                        self._ready_events[key] = threading.Event()
+            due = time.time() - self._started_ts[worker] >= _RESPAWN_MIN_S
+            keys = [k for k in self._ready_events if k not in self._errors] if due else []
+        if newly_down:
+            try:
+                logs.add(
+                    f"[OCR] worker {worker} exited (code {proc.exitcode}); failed {len(failed)} pending read(s)",
+                    level="err",
+                )
+            except Exception:
+                pass
+            self._fail(failed, f"OCR worker {worker} exited")
+        if not due:
+            return
+        self._spawn(worker)
+        with self._state_lock:
+            self._down.discard(worker)
+            self.respawns += 1
+            requests = self._requests[worker]
+        for key in keys:
+            requests.put(("load", key))
+
+    @staticmethod
+    def _fail(entries: List[Tuple[shared_memory.SharedMemory, Future]], reason: str) -> None:
+        for shm, future in entries:
+            try:
+                shm.close()
+                shm.unlink()
+            except Exception:
+                pass
+            if not future.done():
+                future.set_exception(RuntimeError(reason))
+
+    def note_read(self, key: LangKey, seconds: float) -> None:
+        with self._state_lock:
+            n, total = self._reads.get(key, (0, 0.0))
+            self._reads[key] = (n + 1, total + seconds)
+
+    def status(self) -> List[Dict[str, object]]:
+        with self._state_lock:
+            keys = list(self._ready_events)
+            out = []
+            for key in keys:
+                ready = len(self._ready.get(key, ()))
+                n, total = self._reads.get(key, (0, 0.0))
+                out.append({
+                    "langs": list(key),
+                    "state": "ready" if ready else ("failed" if key in self._errors else "loading"),
+                    "error": self._errors.get(key),
+                    "workers_ready": ready,
+                    "load_s": round(self._load_s.get(key, 0.0), 2),
+                    "reads": n,
+                    "avg_read_ms": round(1000.0 * total / n, 1) if n else 0.0,
+                })
+        return out
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._pending.put(None)
+        for q in self._requests:
+            try:
+                q.put(None)
+            except Exception:
+                pass
+        for proc in self._procs:
+            try:
+                proc.join(timeout=1.0)
+                if proc.is_alive():
+                    proc.terminate()
+            except Exception:
+                pass
+        try:
+            self._results.put(None)
+        except Exception:
+            pass
+        with self._state_lock:
+            inflight = list(self._inflight.values())
+            self._inflight.clear()
+        for _worker, entries in inflight:
+            self._fail(entries, "OCR workers shut down")
+
+
+_pool: Optional[_ProcessPool] = None
+
+
+def _configured_workers() -> int:
+    try:
+        import bot.config as config
+
+        return max(0, int(getattr(config.DEFAULT_CONFIG, "ocr_workers", 0)))
+    except Exception:
+        return 0
+
+
+def _process_pool() -> Optional[_ProcessPool]:
+    """The worker pool when OCR_WORKERS > 0 (restarted when the count changes), else None."""
+    global _pool
+    workers = _configured_workers() if HAS_EASYOCR else 0
+    with _lock:
+        if _pool is not None and _pool.size != workers:
+            _pool.close()
+            _pool = None
+        if _pool is None and workers > 0:
+            try:
+                _pool = _ProcessPool(workers)
+            except Exception as exc:
+                try:
+                    logs.add(f"[OCR] worker processes unavailable, using in-process OCR: {exc}", level="err")
+                except Exception:
+                    pass
+                return None
+        return _pool
+
+
+def _cache_capacity() -> int:
+    try:
+        import bot.config as config
+
+        return max(0, int(getattr(config.DEFAULT_CONFIG, "ocr_cache_size", 256)))
+    except Exception:
+        return 256
+
+
+def cache_key(crop: np.ndarray, *settings: Any) -> str:
+    """Digest of ``crop``'s pixels plus the settings that shape its reading
+    (preprocessing steps, languages). Preprocessing is deterministic, so the raw
+    crop stands in for the preprocessed one and a hit also skips denoising."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((crop.shape, crop.dtype.str, settings)).encode("utf-8"))
+    h.update(np.ascontiguousarray(crop).data)
+    return h.hexdigest()
+
+
+def cached(key: str) -> Optional[List[Any]]:
+    """Results stored for ``key`` (counts a hit or miss), or None."""
+    if _cache_capacity() <= 0:
+        return None
+    return _cache.get(key)
+
+
+def remember(key: str, results: List[Any], cost_s: float) -> None:
+    """Store ``results`` for ``key``; ``cost_s`` is what producing them took."""
+    capacity = _cache_capacity()
+    if capacity > 0:
+        _cache.put(key, results, cost_s, capacity)
+
+
+def shutdown() -> None:
+    """Stop OCR worker processes (call before os._exit, which skips atexit)."""
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+
+
+def preload(langs: Optional[Sequence[str]] = None, background: bool = True) -> None:
+    """Start loading the reader for ``langs`` unless it is loaded or loading."""
+    pool = _process_pool()
+    if pool is not None:
+        pool.preload(lang_key(langs))
+        return
+    _slot(langs, background)
+
+
+def ready(langs: Optional[Sequence[str]] = None) -> bool:
+    key = lang_key(langs)
+    pool = _process_pool()
+    if pool is not None:
+        return any(s["state"] == "ready" for s in pool.status() if tuple(s["langs"]) == key)
+    with _lock:
+        slot = _slots.get(key)
+    return slot is not None and slot.reader is not None
+
+
+def readtext(image: Any, langs: Optional[Sequence[str]] = None, wait_s: Optional[float] = 0.0) -> Optional[List[Any]]:
+    """Run easyocr on ``image`` (RGB array) with the shared reader for ``langs``.
+
+    When the reader is still loading, waits up to ``wait_s`` seconds (None =
+    until loaded) and returns None if it is not ready by then, so a runner
+    thread can skip the read instead of stalling. Raises on a failed load or
+    an inference error.
+    """
+    pool = _process_pool()
+    if pool is not None:
+        key = lang_key(langs)
+        if not pool.preload(key).wait(wait_s):
+            return None
+        started = time.time()
+        try:
+            return pool.submit(image, key).result(timeout=_RESULT_TIMEOUT_S)
+        finally:
+            pool.note_read(key, time.time() - started)
+    slot = _slot(langs, background=True)
+    if slot is None:
+        raise RuntimeError("easyocr not available")
+    if not slot.loaded.wait(wait_s):
+        return None
+    if slot.reader is None:
+        raise RuntimeError(slot.error or "easyocr reader failed to load")
+    with slot.infer_lock:
+        started = time.time()
+        try:
+            return slot.reader.readtext(image)
+        finally:
+            slot.reads += 1
+            slot.read_s += time.time() - started
+
+
+def status() -> Dict[str, object]:
+    """Backend, per-language-set load state and inference totals (for metrics)."""
+    pool = _pool
+    if pool is not None:
+        return {
+            "backend": "process",
+            "cache": _cache.stats(_cache_capacity()),
+            "workers": pool.size,
+            "batches": pool.batches,
+            "avg_batch": round(pool.batched_items / pool.batches, 2) if pool.batches else 0.0,
+            "respawns": pool.respawns,
+            "readers": pool.status(),
+        }
+    with _lock:
+        slots = list(_slots.values())
+    return {
+        "backend": "thread",
+        "cache": _cache.stats(_cache_capacity()),
+        "readers": [
+            {
+                "langs": list(s.langs),
+                "state": "ready" if s.reader is not None else ("loading" if s.loading else "failed"),
+                "error": s.error,
+                "load_s": round(s.load_s, 2),
+                "reads": s.reads,
+                "avg_read_ms": round(1000.0 * s.read_s / s.reads, 1) if s.reads else 0.0,
+            }
+            for s in slots
+        ],
+    }
+
+
+atexit.register(shutdown)
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import time
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+
+# Entry point of OCR worker processes (see bot.core.ocr). Kept free of bot
+# imports so a spawned worker only loads numpy and easyocr.
+#
+# Requests on the worker's own queue:
+#   ("load", langs)                          -> ("loaded", worker, langs, load_s, error)
+#   ("batch", batch_id, [(shm, shape, dtype, langs), ...])
+#                                            -> ("batch", worker, batch_id, [("ok", results) | ("err", msg), ...])
+#   None                                     -> exit
+
+
+def _plain(results: Any) -> List[Tuple[List[List[float]], str, float]]:
+    """easyocr output with numpy scalars converted so it pickles cheaply."""
+    out = []
+    for bbox, text, conf in results:
+        try:
+            box = [[float(x), float(y)] for x, y in bbox]
+        except Exception:
+            box = []
+        out.append((box, str(text), float(conf)))
+    return out
+
+
+def _attach(name: str, shape: Tuple[int, ...], dtype: str) -> np.ndarray:
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        return np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf).copy()
+    finally:
+        shm.close()
+
+
+def worker_main(index: int, requests: Any, results: Any) -> None:
+    import easyocr  # type: ignore
+
+    readers: Dict[Tuple[str, ...], Any] = {}
+
+    def reader_for(langs: Tuple[str, ...]) -> Any:
+        reader = readers.get(langs)
+        if reader is None:
+            reader = easyocr.Reader(list(langs), gpu=False)
+            readers[langs] = reader
+        return reader
+
+    while True:
+        msg = requests.get()
+        if msg is None:
+            return
+        if msg[0] == "load":
+            langs = tuple(msg[1])
+            started = time.time()
+            try:
+                reader_for(langs)
+                results.put(("loaded", index, langs, time.time() - started, None))
+            except Exception as exc:
+                results.put(("loaded", index, langs, time.time() - started, str(exc)))
+            continue
+        _kind, batch_id, items = msg
+        out: List[Any] = [("err", "not processed")] * len(items)
+        # Group by language set so same-sized crops can share one inference call
+        groups: Dict[Tuple[str, ...], List[int]] = {}
+        images: List[Any] = [None] * len(items)
+        for i, (name, shape, dtype, langs) in enumerate(items):
+            try:
+                images[i] = _attach(name, tuple(shape), dtype)
+                groups.setdefault(tuple(langs), []).append(i)
+            except Exception as exc:
+                out[i] = ("err", f"shared memory: {exc}")
+        for langs, idxs in groups.items():
+            try:
+                reader = reader_for(langs)
+            except Exception as exc:
+                for i in idxs:
+                    out[i] = ("err", str(exc))
+                continue
+            shapes = {images[i].shape for i in idxs}
+            if len(idxs) > 1 and len(shapes) == 1 and hasattr(reader, "readtext_batched"):
+                try:
+                    batched = reader.readtext_batched([images[i] for i in idxs])
+                    for i, res in zip(idxs, batched):
+                        out[i] = ("ok", _plain(res))
+                    continue
+                except Exception:
+                    pass
+            for i in idxs:
+                try:
+                    out[i] = ("ok", _plain(reader.readtext(images[i])))
+                except Exception as exc:
+                    out[i] = ("err", str(exc))
+        results.put(("batch", index, batch_id, out))
@@ -1,13 +1,17 @@
 from __future__ import annotations
 
+import os
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional, Protocol, Sequence, Dict, List
+from typing import Callable, Optional, Protocol, Sequence, Dict, List, Set, Tuple
 
 import numpy as np
-from .window import bring_to_front, find_window_by_title_substr
+from .window import bring_to_front
+from .window_locator import locate
+from . import inputs
 from . import logs
 from . import counters as _counters
 
@@ -29,6 +33,9 @@ class Context:
     # Window and capture
     window_title_substr: str
     hwnd: Optional[int] = None
+    # Bot instance this context belongs to ("" outside multi-instance runs);
+    # its window lookups skip windows bound to other instances
+    instance_id: str = ""
     window_rect: tuple[int, int, int, int] = (0, 0, 0, 0)  # left, top, width, height
     frame_bgr: Optional[np.ndarray] = None
 
@@ -54,6 +61,24 @@ class Context:
     last_progress_ts: float = 0.0
     current_state_name: str = ""
     current_graph_step: str = ""
+    # Frame freshness for step-level capture: when frame_bgr was grabbed, whether a
+    # screen-changing action ran since, and the region grabbed (None = full client)
+    frame_ts: float = 0.0
+    frame_stale: bool = True
+    frame_roi_pct: Optional[tuple[float, float, float, float]] = None
+    captures_taken: int = 0
+    captures_skipped: int = 0
+    # Screenshot actions (by id) that already handed out frame_bgr; each one reuses
+    # a given frame at most once, so a loop through it still captures every pass
+    frame_users: Set[int] = field(default_factory=set)
+    # When the last click/drag was sent (adaptive waits measure UI latency from it)
+    last_input_ts: float = 0.0
+    # Last ReadText result, with the integer and timer (seconds) parsed from it
+    # when the text holds one; ocr_reads keeps the latest per ReadText name
+    last_ocr_text: str = ""
+    last_ocr_int: Optional[int] = None
+    last_ocr_seconds: Optional[int] = None
+    ocr_reads: Dict[str, Dict[str, object]] = field(default_factory=dict)
 
 
 class Action(Protocol):
@@ -63,6 +88,48 @@ class Action(Protocol):
         ...
 
 
+def note_action_ran(ctx: Context, action: object, result: Optional[bool] = None) -> None:
+    """Mark the current frame stale unless the action only reads state (``frame_safe``),
+    and stamp ``last_input_ts`` when an input action (``sends_input``) did not fail."""
+    if not getattr(action, "frame_safe", False):
+        ctx.frame_stale = True
+    if result is not False and getattr(action, "sends_input", False):
+        ctx.last_input_ts = time.time()
+
+
+PARALLEL_MERGE_RULES = ("all", "any", "first")
+
+_parallel_lock = threading.Lock()
+_parallel_pool: Optional[ThreadPoolExecutor] = None
+
+
+def parallel_pool() -> ThreadPoolExecutor:
+    """Process-wide pool for the actions of ``parallel`` graph steps."""
+    global _parallel_pool
+    with _parallel_lock:
+        if _parallel_pool is None:
+            workers = max(2, min(8, os.cpu_count() or 2))
+            _parallel_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="step-par")
+        return _parallel_pool
+
+
+def merge_results(results: Sequence[Optional[bool]], rule: str) -> Optional[bool]:
+    """Combine the results of actions that ran concurrently.
+
+    ``all``: every action that reported a result succeeded; ``any``: at least
+    one did; ``first``: the earliest-listed action that reported a result
+    decides. Actions returning None do not vote; None when none reported.
+    """
+    votes = [bool(r) for r in results if r is not None]
+    if not votes:
+        return None
+    if rule == "any":
+        return any(votes)
+    if rule == "first":
+        return votes[0]
+    return all(votes)
+
+
 class State(Protocol):
     name: str
 
@@ -106,7 +173,8 @@ class SequenceState:
             try:
                 start = time.time()
                 ctx.last_action_name = action.name
-                _ = action.run(ctx)
+                res = action.run(ctx)
+                note_action_ran(ctx, action, res)
                 dur = time.time() - start
                 ctx.last_action_duration_s = dur
                 ctx.last_progress_ts = time.time()
@@ -159,15 +227,14 @@ class StateMachine:
                 ctx.active_machine_key = key
         except Exception:
             pass
-        # Bring the target window to foreground once at start
+        # Bring the target window to foreground once at start (message input
+        # drives it in the background, so leave focus alone)
         try:
-            hwnd = ctx.hwnd
-            if hwnd is None:
-                hwnd = find_window_by_title_substr(ctx.window_title_substr)
-                if hwnd is not None:
-                    ctx.hwnd = hwnd
+            hwnd = locate(ctx.window_title_substr, hint=ctx.hwnd, owner=ctx.instance_id or None)
             if hwnd is not None:
-                bring_to_front(hwnd)
+                ctx.hwnd = hwnd
+                if inputs.input_backend() != "message":
+                    bring_to_front(hwnd)
         except Exception:
             pass
         self._thread = threading.Thread(target=self._run_loop, args=(ctx,), daemon=True)
@@ -200,6 +267,7 @@ class StateMachine:
             pass
 
     def _run_loop(self, ctx: Context) -> None:
+        logs.set_instance(ctx.instance_id)
         while not ctx.stop_event.is_set():
             # If paused, idle here but remain responsive to stop
             try:
@@ -216,12 +284,9 @@ class StateMachine:
             ctx.pause_event.set()
             # Bring target window to foreground when pausing, per user preference
             try:
-                hwnd = ctx.hwnd
-                if hwnd is None:
-                    hwnd = find_window_by_title_substr(ctx.window_title_substr)
-                    if hwnd is not None:
-                        ctx.hwnd = hwnd
+                hwnd = locate(ctx.window_title_substr, hint=ctx.hwnd, owner=ctx.instance_id or None)
                 if hwnd is not None:
+                    ctx.hwnd = hwnd
                     bring_to_front(hwnd)
             except Exception:
                 pass
@@ -235,12 +300,9 @@ class StateMachine:
             ctx.last_progress_ts = time.time()
             # Bring target window to foreground when resuming
             try:
-                hwnd = ctx.hwnd
-                if hwnd is None:
-                    hwnd = find_window_by_title_substr(ctx.window_title_substr)
-                    if hwnd is not None:
-                        ctx.hwnd = hwnd
+                hwnd = locate(ctx.window_title_substr, hint=ctx.hwnd, owner=ctx.instance_id or None)
                 if hwnd is not None:
+                    ctx.hwnd = hwnd
                     bring_to_front(hwnd)
             except Exception:
                 pass
@@ -257,33 +319,169 @@ class StateMachine:
 # Branching graph-based state machine
 
 class GraphStep:
+    __slots__ = (
+        "name",
+        "actions",
+        "on_success",
+        "on_failure",
+        # Optional step-level capture policy (object with run(ctx)), run before actions
+        "capture",
+        # Run the (read-only) actions concurrently and combine results by ``merge``
+        "parallel",
+        "merge",
+        # Filled in by GraphState: index in the step table and successor indices
+        "id",
+        "success_id",
+        "failure_id",
+        # Cycle-boundary markers: the transition lands on the start step from
+        # another step (a start-step self-loop does not complete a cycle)
+        "success_wraps",
+        "failure_wraps",
+    )
+
     def __init__(
         self,
         name: str,
         actions: Sequence[Action],
         on_success: Optional[str] = None,
         on_failure: Optional[str] = None,
+        capture: Optional[Action] = None,
+        parallel: bool = False,
+        merge: str = "all",
     ) -> None:
         self.name = name
         self.actions = list(actions)
         self.on_success = on_success
         self.on_failure = on_failure
+        self.capture = capture
+        self.parallel = parallel
+        self.merge = merge
+        self.id = -1
+        self.success_id = -1
+        self.failure_id = -1
+        self.success_wraps = False
+        self.failure_wraps = False
 
 
 class GraphState:
+    """Branching state machine over a precompiled step table.
+
+    Steps are addressed by integer id; each step carries the ids of its
+    successors (unknown or missing targets stay on the same step), so a
+    transition is an attribute read rather than a name lookup.
+    """
+
     def __init__(self, steps: Sequence[GraphStep], start: str, loop_sleep_s: float = 0.05) -> None:
         self.name = "graph_state"
-        self._steps: Dict[str, GraphStep] = {s.name: s for s in steps}
-        if start not in self._steps:
+        table: List[GraphStep] = []
+        ids: Dict[str, int] = {}
+        for s in steps:
+            if s.name in ids:
+                # Last definition wins, as with the former name-keyed dict
+                table[ids[s.name]] = s
+                continue
+            ids[s.name] = len(table)
+            table.append(s)
+        if start not in ids:
             raise ValueError(f"Start step '{start}' not in steps")
-        self._current: str = start
+        start_id = ids[start]
+        for i, s in enumerate(table):
+            s.id = i
+            s.success_id = ids.get(s.on_success, i) if s.on_success else i
+            s.failure_id = ids.get(s.on_failure, i) if s.on_failure else i
+            s.success_wraps = s.success_id == start_id and i != start_id
+            s.failure_wraps = s.failure_id == start_id and i != start_id
+        self._table: List[GraphStep] = table
+        self._ids: Dict[str, int] = ids
+        self._start_id: int = start_id
+        self._current_id: int = start_id
         self._loop_sleep_s = loop_sleep_s
+        # Per-step counters indexed by step id
+        self._step_runs: List[int] = [0] * len(table)
+        self._step_successes: List[int] = [0] * len(table)
+        self._step_time_s: List[float] = [0.0] * len(table)
+        # Set by run_once when its transition completed a cycle (see GraphStep
+        # success_wraps); orchestrators end a machine's turn on it
+        self.wrapped: bool = False
+
+    @property
+    def _current(self) -> str:
+        return self._table[self._current_id].name
+
+    @property
+    def current_id(self) -> int:
+        return self._current_id
+
+    @property
+    def start_id(self) -> int:
+        return self._start_id
+
+    def step_id(self, name: str) -> Optional[int]:
+        return self._ids.get(name)
+
+    def step_stats(self) -> List[Dict[str, object]]:
+        """Runs, successes and cumulative time per step, in step-id order."""
+        return [
+            {
+                "id": i,
+                "name": step.name,
+                "runs": self._step_runs[i],
+                "successes": self._step_successes[i],
+                "time_s": round(self._step_time_s[i], 3),
+            }
+            for i, step in enumerate(self._table)
+        ]
+
+    def _run_parallel(self, ctx: Context, step: GraphStep) -> Optional[bool]:
+        """Run all of ``step``'s actions on the shared pool against the current frame.
+
+        Actions that write the context expose ``run_deferred(ctx)`` returning
+        ``(result, commit)``; the commits run after the join, in declaration
+        order, so concurrent actions never race on context fields.
+        """
+
+        def call(action: Action) -> Tuple[Optional[bool], Optional[Callable[[], None]]]:
+            # Pool threads serve every instance; log under this step's
+            logs.set_instance(ctx.instance_id)
+            try:
+                deferred = getattr(action, "run_deferred", None)
+                if deferred is not None:
+                    return deferred(ctx)
+                return action.run(ctx), None
+            except Exception as exc:
+                try:
+                    logs.add(f"[ActionError] {action.name} in step {step.name}: {exc}", level="err")
+                except Exception:
+                    pass
+                return None, None
+
+        start = time.time()
+        ctx.last_action_name = "+".join(a.name for a in step.actions)
+        pool = parallel_pool()
+        futures = [pool.submit(call, action) for action in step.actions]
+        outcomes = [f.result() for f in futures]
+        results = [res for res, _commit in outcomes]
+        for action, (res, commit) in zip(step.actions, outcomes):
+            if commit is not None:
+                try:
+                    commit()
+                except Exception:
+                    pass
+            note_action_ran(ctx, action, res)
+        dur = time.time() - start
+        ctx.last_action_duration_s = dur
+        ctx.last_progress_ts = time.time()
+        if dur > 2.0:
+            try:
+                logs.add(f"[ActionSlow] {ctx.last_action_name} took {dur:.2f}s in {self.name}:{step.name}", level="info")
+            except Exception:
+                pass
+        return merge_results(results, step.merge)
 
     def run_once(self, ctx: Context) -> None:
-        step = self._steps.get(self._current)
-        if not step:
-            time.sleep(self._loop_sleep_s)
-            return
+        step = self._table[self._current_id]
+        step_started = time.time()
+        self.wrapped = False
         last_result: Optional[bool] = None
         try:
             key = getattr(self, "_machine_key", None)
@@ -301,7 +499,21 @@ class GraphState:
                 time.sleep(0.05)
         except Exception:
             pass
-        for action in step.actions:
+        if step.capture is not None:
+            try:
+                step.capture.run(ctx)
+            except Exception as exc:
+                try:
+                    logs.add(f"[ActionError] capture in step {step.name}: {exc}", level="err")
+                except Exception:
+                    pass
+        sequential: Sequence[Action] = step.actions
+        if step.parallel and len(step.actions) > 1:
+            if ctx.stop_event.is_set():
+                return
+            last_result = self._run_parallel(ctx, step)
+            sequential = ()
+        for action in sequential:
             if ctx.stop_event.is_set():
                 return
             # Honor pause between actions
@@ -316,6 +528,7 @@ class GraphState:
                 start = time.time()
                 ctx.last_action_name = action.name
                 res = action.run(ctx)
+                note_action_ran(ctx, action, res)
                 dur = time.time() - start
                 ctx.last_action_duration_s = dur
                 ctx.last_progress_ts = time.time()
@@ -327,6 +540,7 @@ class GraphState:
                 if res is not None:
                     last_result = res
             except Exception as exc:
+                ctx.frame_stale = True
                 try:
                     print(f"[ActionError] {action.name} in step {step.name}: {exc}")
                 except Exception:
@@ -341,18 +555,26 @@ class GraphState:
         if success:
             try:
                 # Map specific step names to counter keys
+                machine = getattr(self, "_machine_key", None)
                 if step.name == "ClickTrain":
-                    _counters.inc("troops_trained", 1)
+                    _counters.inc("troops_trained", 1, machine=machine)
                 elif step.name == "March":
-                    _counters.inc("nodes_farmed", 1)
+                    _counters.inc("nodes_farmed", 1, machine=machine)
                 elif step.name == "ClickHelp":
-                    _counters.inc("alliance_helps", 1)
+                    _counters.inc("alliance_helps", 1, machine=machine)
             except Exception:
                 # Never let metrics affect control flow
                 pass
-        next_name: Optional[str] = step.on_success if success else step.on_failure
-        if next_name and next_name in self._steps:
-            self._current = next_name
+        sid = step.id
+        self._step_runs[sid] += 1
+        self._step_time_s[sid] += time.time() - step_started
+        if success:
+            self._step_successes[sid] += 1
+            self._current_id = step.success_id
+            self.wrapped = step.success_wraps
+        else:
+            self._current_id = step.failure_id
+            self.wrapped = step.failure_wraps
         ctx.cycle_count += 1
         # Pace
         if self._loop_sleep_s > 0:
@@ -7,11 +7,14 @@ import random
 import time
 import sys
 
+import numpy as np
+
 if sys.platform == "win32":
     import win32api
     import win32con
     import win32gui
     import win32process
+    import win32ui
 else:  # pragma: no cover - platform-specific fallback
     class _Win32Unavailable:
         """Stub object used when Win32 bindings are unavailable."""
@@ -23,6 +26,7 @@ else:  # pragma: no cover - platform-specific fallback
     win32con = _Win32Unavailable()  # type: ignore[assignment]
     win32gui = _Win32Unavailable()  # type: ignore[assignment]
     win32process = _Win32Unavailable()  # type: ignore[assignment]
+    win32ui = _Win32Unavailable()  # type: ignore[assignment]
 
 import bot.config as config
 
@@ -295,6 +299,154 @@ def click_screen_xy(x: int, y: int) -> None:
                 pass
 
 
+def drag_screen_xy(sx: int, sy: int, ex: int, ey: int, duration_s: float = 0.15, steps: int = 8) -> None:
+    """Press at (sx, sy), move to (ex, ey) in ``steps`` moves over ``duration_s``, release."""
+    # Remember cursor and clamp to virtual desktop
+    try:
+        prev_pos = win32api.GetCursorPos()
+    except Exception:
+        prev_pos = None
+    try:
+        # Clamp helpers
+        try:
+            vx = win32api.GetSystemMetrics(76)
+            vy = win32api.GetSystemMetrics(77)
+            vw = win32api.GetSystemMetrics(78)
+            vh = win32api.GetSystemMetrics(79)
+            max_x = vx + max(0, vw - 1)
+            max_y = vy + max(0, vh - 1)
+        except Exception:
+            vx = 0
+            vy = 0
+            max_x = 65535
+            max_y = 65535
+        sx = max(vx, min(sx, max_x))
+        sy = max(vy, min(sy, max_y))
+        ex = max(vx, min(ex, max_x))
+        ey = max(vy, min(ey, max_y))
+        # Go to start, press, interpolate moves, release
+        win32api.SetCursorPos((sx, sy))
+        time.sleep(0.01)
+        win32api.mouse_event(win32con.MOUSEEVENTF_LEFTDOWN, 0, 0, 0, 0)
+        n = max(1, int(steps))
+        delay = max(0.0, float(duration_s)) / float(n)
+        dx = (ex - sx) / float(n)
+        dy = (ey - sy) / float(n)
+        cx = float(sx)
+        cy = float(sy)
+        for _ in range(n):
+            cx += dx
+            cy += dy
+            win32api.SetCursorPos((int(cx), int(cy)))
+            time.sleep(delay)
+        win32api.SetCursorPos((ex, ey))
+        time.sleep(0.01)
+        win32api.mouse_event(win32con.MOUSEEVENTF_LEFTUP, 0, 0, 0, 0)
+    finally:
+        # Optionally restore the cursor to its previous position
+        if getattr(config.DEFAULT_CONFIG, 'click_snap_back', True) and prev_pos is not None:
+            try:
+                win32api.SetCursorPos(prev_pos)
+            except Exception:
+                pass
+
+
+def _make_lparam(x: int, y: int) -> int:
+    return ((int(y) & 0xFFFF) << 16) | (int(x) & 0xFFFF)
+
+
+def post_click_client(hwnd: int, x: int, y: int) -> None:
+    """Click client coords (x, y) of ``hwnd`` by posting mouse messages.
+
+    Neither the cursor nor the foreground window change. Whether the click
+    lands depends on the target reading window messages rather than raw input.
+    """
+    try:
+        dx = random.randint(-3, 3)
+        dy = random.randint(-3, 3)
+    except Exception:
+        dx = 0
+        dy = 0
+    try:
+        _l, _t, right_c, bottom_c = win32gui.GetClientRect(hwnd)
+        rx = max(0, min(int(x) + dx, max(0, right_c - 1)))
+        ry = max(0, min(int(y) + dy, max(0, bottom_c - 1)))
+    except Exception:
+        rx = max(0, int(x) + dx)
+        ry = max(0, int(y) + dy)
+    lparam = _make_lparam(rx, ry)
+    win32gui.PostMessage(hwnd, win32con.WM_MOUSEMOVE, 0, lparam)
+    win32gui.PostMessage(hwnd, win32con.WM_LBUTTONDOWN, win32con.MK_LBUTTON, lparam)
+    win32gui.PostMessage(hwnd, win32con.WM_LBUTTONUP, 0, lparam)
+
+
+def post_drag_client(hwnd: int, sx: int, sy: int, ex: int, ey: int, duration_s: float = 0.15, steps: int = 8) -> None:
+    """Drag between client coords of ``hwnd`` with posted mouse messages."""
+    win32gui.PostMessage(hwnd, win32con.WM_MOUSEMOVE, 0, _make_lparam(sx, sy))
+    win32gui.PostMessage(hwnd, win32con.WM_LBUTTONDOWN, win32con.MK_LBUTTON, _make_lparam(sx, sy))
+    n = max(1, int(steps))
+    delay = max(0.0, float(duration_s)) / float(n)
+    for i in range(1, n + 1):
+        cx = sx + (ex - sx) * i / float(n)
+        cy = sy + (ey - sy) * i / float(n)
+        win32gui.PostMessage(hwnd, win32con.WM_MOUSEMOVE, win32con.MK_LBUTTON, _make_lparam(int(cx), int(cy)))
+        time.sleep(delay)
+    win32gui.PostMessage(hwnd, win32con.WM_LBUTTONUP, 0, _make_lparam(ex, ey))
+
+
+def print_window_client(hwnd: int, width: int, height: int) -> Optional[np.ndarray]:
+    """Client area of ``hwnd`` rendered with PrintWindow, as a BGRA array.
+
+    Works while the window is covered by other windows (not while it is
+    minimized). Returns None when the window could not be rendered.
+    """
+    if width <= 0 or height <= 0:
+        return None
+    hwnd_dc = None
+    src_dc = None
+    mem_dc = None
+    bitmap = None
+    try:
+        hwnd_dc = win32gui.GetWindowDC(hwnd)
+        src_dc = win32ui.CreateDCFromHandle(hwnd_dc)
+        mem_dc = src_dc.CreateCompatibleDC()
+        bitmap = win32ui.CreateBitmap()
+        bitmap.CreateCompatibleBitmap(src_dc, int(width), int(height))
+        mem_dc.SelectObject(bitmap)
+        # PW_CLIENTONLY (1) | PW_RENDERFULLCONTENT (2): also renders DirectX/GPU surfaces
+        ok = ctypes.windll.user32.PrintWindow(hwnd, mem_dc.GetSafeHdc(), 3)
+        if not ok:
+            return None
+        buf = bitmap.GetBitmapBits(True)
+        img = np.frombuffer(buf, dtype=np.uint8)
+        if img.size != int(width) * int(height) * 4:
+            return None
+        return img.reshape((int(height), int(width), 4))
+    except Exception:
+        return None
+    finally:
+        try:
+            if bitmap is not None:
+                win32gui.DeleteObject(bitmap.GetHandle())
+        except Exception:
+            pass
+        try:
+            if mem_dc is not None:
+                mem_dc.DeleteDC()
+        except Exception:
+            pass
+        try:
+            if src_dc is not None:
+                src_dc.DeleteDC()
+        except Exception:
+            pass
+        try:
+            if hwnd_dc is not None:
+                win32gui.ReleaseDC(hwnd, hwnd_dc)
+        except Exception:
+            pass
+
+
 def enable_dpi_awareness() -> None:
     """Make process DPI aware so Win32 and pixel coords match on scaled displays."""
     try:
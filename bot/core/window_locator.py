@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Protocol, Tuple
+
+from .window import win32gui
+
+
+# Finds the game window by title substring without enumerating every
+# top-level window on each call. The last hwnd found per substring is kept
+# and re-validated cheaply (IsWindow, visible, title still matches) at most
+# every VALIDATE_EVERY_S, or on the next lookup after a capture of it failed
+# (expire); only a failed validation falls back to a full enumeration. The Win32 calls sit behind a small backend interface so the
+# logic can run against a fake window list off Windows.
+#
+# With several bot instances, each lookup passes its instance id as ``owner``.
+# The first window an owner finds is claimed for it and skipped by every
+# other owner, so two game clients with the same title bind to different
+# instances. Lookups without an owner ignore claims.
+
+# Trust a validated hwnd for this long before checking it again
+VALIDATE_EVERY_S = 1.0
+
+
+class WindowBackend(Protocol):
+    def enum_windows(self) -> List[Tuple[int, str]]:
+        """Visible top-level windows as (hwnd, title), in Z-order."""
+        ...
+
+    def is_window(self, hwnd: int) -> bool:
+        ...
+
+    def is_visible(self, hwnd: int) -> bool:
+        ...
+
+    def title(self, hwnd: int) -> str:
+        ...
+
+
+class Win32Backend:
+    def enum_windows(self) -> List[Tuple[int, str]]:
+        out: List[Tuple[int, str]] = []
+
+        def _enum_handler(hwnd, _):
+            if win32gui.IsWindowVisible(hwnd):
+                out.append((hwnd, win32gui.GetWindowText(hwnd) or ""))
+
+        win32gui.EnumWindows(_enum_handler, None)
+        return out
+
+    def is_window(self, hwnd: int) -> bool:
+        return bool(win32gui.IsWindow(hwnd))
+
+    def is_visible(self, hwnd: int) -> bool:
+        return bool(win32gui.IsWindowVisible(hwnd))
+
+    def title(self, hwnd: int) -> str:
+        return win32gui.GetWindowText(hwnd) or ""
+
+
+class FakeBackend:
+    """In-memory window list for tests and non-Windows runs."""
+
+    def __init__(self, windows: Optional[Dict[int, str]] = None) -> None:
+        self.windows: Dict[int, str] = dict(windows or {})
+        self.hidden: set = set()
+        self.enumerations = 0
+
+    def enum_windows(self) -> List[Tuple[int, str]]:
+        self.enumerations += 1
+        return [(h, t) for h, t in self.windows.items() if h not in self.hidden]
+
+    def is_window(self, hwnd: int) -> bool:
+        return hwnd in self.windows
+
+    def is_visible(self, hwnd: int) -> bool:
+        return hwnd in self.windows and hwnd not in self.hidden
+
+    def title(self, hwnd: int) -> str:
+        return self.windows.get(hwnd, "")
+
+
+@dataclass
+class _Entry:
+    hwnd: int
+    validated_ts: float
+
+
+class WindowLocator:
+    def __init__(self, backend: Optional[WindowBackend] = None) -> None:
+        self._backend: WindowBackend = backend or Win32Backend()
+        self._lock = threading.Lock()
+        self._cache: Dict[Tuple[str, Optional[str]], _Entry] = {}
+        # hwnd -> owner (instance id) that claimed it
+        self._claims: Dict[int, str] = {}
+        self.hits = 0
+        self.validations = 0
+        self.enumerations = 0
+
+    @property
+    def backend(self) -> WindowBackend:
+        return self._backend
+
+    def _free(self, hwnd: int, owner: Optional[str]) -> bool:
+        if owner is None:
+            return True
+        with self._lock:
+            return self._claims.get(hwnd, owner) == owner
+
+    def _valid(self, hwnd: int, needle: str) -> bool:
+        try:
+            return (
+                self._backend.is_window(hwnd)
+                and self._backend.is_visible(hwnd)
+                and needle in self._backend.title(hwnd).lower()
+            )
+        except Exception:
+            return False
+
+    def find(self, substr: str, hint: Optional[int] = None, owner: Optional[str] = None) -> Optional[int]:
+        """hwnd of a visible window whose title contains ``substr`` (case-insensitive).
+
+        ``hint`` (e.g. the hwnd a context already holds) is tried before the
+        cache. Enumerates all windows only when neither validates; like the
+        plain enumeration, the last match in Z-order wins. With ``owner``,
+        windows claimed by other owners are skipped and the result is claimed.
+        """
+        needle = str(substr or "").lower()
+        key = (needle, owner)
+        now = time.time()
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and (hint is None or hint == entry.hwnd):
+                if now - entry.validated_ts < VALIDATE_EVERY_S:
+                    self.hits += 1
+                    return entry.hwnd
+        cached_hwnd = entry.hwnd if entry is not None else None
+        for candidate in (hint, cached_hwnd if cached_hwnd != hint else None):
+            if candidate is None or not self._free(candidate, owner):
+                continue
+            with self._lock:
+                self.validations += 1
+            if self._valid(candidate, needle):
+                self._remember(key, candidate, now)
+                return candidate
+        with self._lock:
+            self.enumerations += 1
+        match: Optional[int] = None
+        for hwnd, title in self._backend.enum_windows():
+            if needle in (title or "").lower() and self._free(hwnd, owner):
+                match = hwnd
+        if match is None:
+            with self._lock:
+                self._cache.pop(key, None)
+        else:
+            self._remember(key, match, time.time())
+        return match
+
+    def _remember(self, key: Tuple[str, Optional[str]], hwnd: int, ts: float) -> None:
+        owner = key[1]
+        with self._lock:
+            self._cache[key] = _Entry(hwnd, ts)
+            if owner is not None:
+                # One window per owner: drop whatever it held before
+                for h in [h for h, o in self._claims.items() if o == owner and h != hwnd]:
+                    self._claims.pop(h, None)
+                self._claims[hwnd] = owner
+
+    def owner_of(self, hwnd: int) -> Optional[str]:
+        with self._lock:
+            return self._claims.get(hwnd)
+
+    def release(self, owner: str) -> None:
+        """Drop ``owner``'s claim (its instance stopped) so others may bind the window."""
+        with self._lock:
+            for h in [h for h, o in self._claims.items() if o == owner]:
+                self._claims.pop(h, None)
+            for key in [k for k in self._cache if k[1] == owner]:
+                self._cache.pop(key, None)
+
+    def invalidate(self, substr: Optional[str] = None) -> None:
+        with self._lock:
+            if substr is None:
+                self._cache.clear()
+            else:
+                needle = str(substr).lower()
+                for key in [k for k in self._cache if k[0] == needle]:
+                    self._cache.pop(key, None)
+
+    def expire(self, hwnd: int) -> None:
+        """Stop trusting ``hwnd`` (e.g. a capture of it failed); the next lookup
+        re-validates it, and enumerates again if it is gone."""
+        with self._lock:
+            for entry in self._cache.values():
+                if entry.hwnd == hwnd:
+                    entry.validated_ts = 0.0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "cached": len(self._cache),
+                "claimed": len(self._claims),
+                "hits": self.hits,
+                "validations": self.validations,
+                "enumerations": self.enumerations,
+            }
+
+
+_locator = WindowLocator()
+
+
+def get_locator() -> WindowLocator:
+    return _locator
+
+
+def set_backend(backend: WindowBackend) -> WindowLocator:
+    """Replace the process-wide locator with one over ``backend`` (tests, fakes)."""
+    global _locator
+    _locator = WindowLocator(backend)
+    return _locator
+
+
+def locate(substr: str, hint: Optional[int] = None, owner: Optional[str] = None) -> Optional[int]:
+    return _locator.find(substr, hint, owner)
+
+
+def expire(hwnd: int) -> None:
+    _locator.expire(hwnd)
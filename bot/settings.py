@@ -24,6 +24,14 @@ SETTINGS_SCHEMA: List[Dict[str, Any]] = [
         "default": "Call of Dragons",
         "description": "Substring used to find the Call of Dragons client window.",
     },
+    {
+        "key": "INSTANCES",
+        "label": "Bot instances",
+        "type": "string",
+        "category": "Window & Launch",
+        "default": "",
+        "description": "Run several accounts from one bot, as 'id=window title' pairs, e.g. 'main=Call of Dragons, alt=Call of Dragons'. Empty runs one instance on the window title above.",
+    },
     {
         "key": "MATCH_THRESHOLD",
         "label": "Match threshold",
@@ -54,6 +62,78 @@ SETTINGS_SCHEMA: List[Dict[str, Any]] = [
         "default": _bool_default(True),
         "description": "Return the cursor to its previous location after each click.",
     },
+    {
+        "key": "INPUT_BACKEND",
+        "label": "Input backend",
+        "type": "string",
+        "category": "Interaction",
+        "default": "cursor",
+        "description": "How clicks reach the game: 'cursor' focuses the window and moves the mouse; 'message' posts clicks to the window without taking focus.",
+    },
+    {
+        "key": "CAPTURE_BACKEND",
+        "label": "Capture backend",
+        "type": "string",
+        "category": "Capture & Matching",
+        "default": "screen",
+        "description": "How frames are captured: 'screen' grabs the visible window area; 'window' renders the window itself, so it may be covered.",
+    },
+    {
+        "key": "ADAPTIVE_WAITS",
+        "label": "Adaptive waits",
+        "type": "bool",
+        "category": "Interaction",
+        "default": _bool_default(True),
+        "description": "Learn how long the game takes to respond after clicks and shorten adaptive waits to match.",
+    },
+    {
+        "key": "ADAPTIVE_WAIT_PERCENTILE",
+        "label": "Adaptive wait percentile",
+        "type": "float",
+        "category": "Interaction",
+        "default": 0.95,
+        "description": "Percentile of observed response times an adaptive wait uses (higher is safer, slower).",
+        "min": 0.5,
+        "max": 1.0,
+        "step": 0.01,
+    },
+    {
+        "key": "LATENCY_FILE",
+        "label": "Latency file",
+        "type": "string",
+        "category": "Interaction",
+        "default": "bot.latency.json",
+        "description": "Where adaptive waits keep the response times they learned.",
+    },
+    {
+        "key": "OCR_PRELOAD",
+        "label": "Preload OCR",
+        "type": "bool",
+        "category": "Capture & Matching",
+        "default": _bool_default(True),
+        "description": "Load the shared OCR model in the background when a machine that reads text starts.",
+    },
+    {
+        "key": "OCR_WORKERS",
+        "label": "OCR worker processes",
+        "type": "int",
+        "category": "Capture & Matching",
+        "default": 0,
+        "description": "Run text recognition in this many separate processes (0 runs it inside the bot process).",
+        "min": 0,
+        "max": 8,
+        "step": 1,
+    },
+    {
+        "key": "OCR_CACHE_SIZE",
+        "label": "OCR cache entries",
+        "type": "int",
+        "category": "Capture & Matching",
+        "default": 256,
+        "description": "Remember text read from this many recent regions; an identical crop is not read again (0 disables).",
+        "min": 0,
+        "step": 1,
+    },
     {
         "key": "SAVE_SHOTS",
         "label": "Save debug shots",
@@ -110,6 +190,16 @@ SETTINGS_SCHEMA: List[Dict[str, Any]] = [
         "default": 993,
         "description": "Height of the client area when resizing (pixels).",
     },
+    {
+        "key": "WINDOW_WATCH_INTERVAL",
+        "label": "Window geometry check interval",
+        "type": "float",
+        "category": "Window & Launch",
+        "default": 1.0,
+        "description": "Seconds between background checks of the game window's size and position.",
+        "min": 0.1,
+        "step": 0.1,
+    },
     {
         "key": "GAME_SHORTCUT_PATH",
         "label": "Game shortcut path",
@@ -217,6 +307,49 @@ SETTINGS_SCHEMA: List[Dict[str, Any]] = [
         "default": 5,
         "description": "Number of rotated log files to retain.",
     },
+    {
+        "key": "LOG_BUFFER_SIZE",
+        "label": "Log buffer size",
+        "type": "int",
+        "category": "Logging",
+        "default": 2000,
+        "description": "Number of recent log entries kept in memory for the web UI.",
+        "min": 100,
+    },
+    {
+        "key": "LOG_LEVEL",
+        "label": "Log level",
+        "type": "string",
+        "category": "Logging",
+        "default": "info",
+        "description": "Minimum level recorded in the UI buffer and log file (debug, info, warn, err).",
+    },
+    {
+        "key": "LOG_CATEGORY_LEVELS",
+        "label": "Log category levels",
+        "type": "string",
+        "category": "Logging",
+        "default": "",
+        "description": "Per-category minimum levels, e.g. 'CheckTemplate=warn, Wait=err'.",
+    },
+    {
+        "key": "LOG_RATE_LIMITS",
+        "label": "Log rate limits",
+        "type": "string",
+        "category": "Logging",
+        "default": "FindAndClick=4, CheckTemplate=4, CheckTemplatesCount=2, Wait=2",
+        "description": "Max entries per second for high-frequency categories; excess entries are dropped and counted.",
+    },
+    {
+        "key": "COUNTERS_FLUSH_INTERVAL",
+        "label": "Counters flush interval",
+        "type": "float",
+        "category": "Logging",
+        "default": 5.0,
+        "description": "Seconds between counter snapshot writes; increments are journaled in between (0 saves on every increment).",
+        "min": 0.0,
+        "step": 1.0,
+    },
     {
         "key": "WEB_BIND_HOST",
         "label": "Web bind host",
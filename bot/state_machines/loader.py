@@ -1,15 +1,18 @@
 from __future__ import annotations
 
 import json
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Callable, Dict, Iterable, List, Mapping, MutableMapping, Optional, Sequence, Tuple
 
 from bot.config import AppConfig
-from bot.core.state_machine import Context, GraphState, GraphStep, SequenceState, State
+from bot.core.state_machine import PARALLEL_MERGE_RULES, Context, GraphState, GraphStep, SequenceState, State
 from bot.actions import (
     Screenshot,
     Wait,
+    WaitFor,
     ClickPercent,
     DragPercent,
     SpiralCameraMoveStep,
@@ -21,14 +24,18 @@ from bot.actions import (
     CooldownGate,
     SetCooldown,
     SetCooldownRandom,
+    SetCooldownFromText,
     Retry,
     ReadText,
 )
+from bot.actions.screenshot import CAPTURE_MODES, StepCapture, action_regions
+from bot.actions.wait_for import poll_schedule
 
 
 _ACTION_REGISTRY = {
     "Screenshot": Screenshot,
     "Wait": Wait,
+    "WaitFor": WaitFor,
     "ClickPercent": ClickPercent,
     "DragPercent": DragPercent,
     "SpiralCameraMoveStep": SpiralCameraMoveStep,
@@ -40,6 +47,7 @@ _ACTION_REGISTRY = {
     "CooldownGate": CooldownGate,
     "SetCooldown": SetCooldown,
     "SetCooldownRandom": SetCooldownRandom,
+    "SetCooldownFromText": SetCooldownFromText,
     "Retry": Retry,
     "ReadText": ReadText,
 }
@@ -166,7 +174,40 @@ def _farm_common_template(cfg: AppConfig, options: Mapping[str, Any], data: Mapp
     wait_after_legions = float(options.get("wait_after_legions_s", 1.0))
     cooldown_key = str(options.get("cooldown_key") or resource_key)
     loop_sleep = float(options.get("loop_sleep_s", data.get("loop_sleep_s", 0.05) or 0.05))
+    condition_waits = bool(options.get("condition_waits", True))
     full = [0.0, 0.0, 1.0, 1.0]
+
+    def wait_until(name: str, seconds: float, templates: List[str], region: Dict[str, Any]) -> Dict[str, Any]:
+        # Wait for the next screen's template instead of sleeping; the timeout
+        # matches the old worst case (seconds + up to 2 s of jitter).
+        if not condition_waits:
+            return {"type": "Wait", "name": name, "seconds": seconds, "randomize": True}
+        return {
+            "type": "WaitFor",
+            "name": name,
+            "templates": templates,
+            "region_pct": region,
+            "threshold": _cfg_ref("match_threshold"),
+            "verify_threshold": _cfg_ref("verify_threshold"),
+            "timeout_s": seconds + 2.0,
+            "settle_s": 0.2,
+            "required": False,
+        }
+
+    def adaptive_wait(name: str, seconds: float, templates: List[str], region: Dict[str, Any]) -> Dict[str, Any]:
+        # Fixed wait whose length is learned from how fast ``templates`` show up
+        return {
+            "type": "Wait",
+            "name": name,
+            "seconds": seconds,
+            "randomize": True,
+            "adaptive": True,
+            "probe_templates": templates,
+            "probe_region_pct": region,
+            "threshold": _cfg_ref("match_threshold"),
+            "verify_threshold": _cfg_ref("verify_threshold"),
+            "max_seconds": seconds + 2.0,
+        }
     unit_icons = [
         "MiningIcon.png",
         "GoingIcon.png",
@@ -243,12 +284,7 @@ def _farm_common_template(cfg: AppConfig, options: Mapping[str, Any], data: Mapp
             {
                 "name": "OpenMagnifier",
                 "actions": [
-                    {
-                        "type": "Wait",
-                        "name": "wait_before_screenshot",
-                        "seconds": 2.0,
-                        "randomize": True,
-                    },
+                    wait_until("wait_before_screenshot", 2.0, ["Magnifier.png"], _cfg_ref("magifier_region_pct")),
                     {"type": "Screenshot", "name": f"{resource_key}_cap_open_1"},
                     {
                         "type": "FindAndClick",
@@ -258,12 +294,12 @@ def _farm_common_template(cfg: AppConfig, options: Mapping[str, Any], data: Mapp
                         "threshold": _cfg_ref("match_threshold"),
                         "verify_threshold": _cfg_ref("verify_threshold"),
                     },
-                    {
-                        "type": "Wait",
-                        "name": "wait_after_magnifier",
-                        "seconds": 1.0,
-                        "randomize": True,
-                    },
+                    adaptive_wait(
+                        "wait_after_magnifier",
+                        1.0,
+                        resource_templates,
+                        _cfg_ref("resource_search_selection_region_pct"),
+                    ),
                 ],
                 "on_success": step_label,
                 "on_failure": "ClickMapIcon",
@@ -280,12 +316,7 @@ def _farm_common_template(cfg: AppConfig, options: Mapping[str, Any], data: Mapp
                         "threshold": _cfg_ref("match_threshold"),
                         "verify_threshold": _cfg_ref("verify_threshold"),
                     },
-                    {
-                        "type": "Wait",
-                        "name": "wait_after_map",
-                        "seconds": 1.0,
-                        "randomize": True,
-                    },
+                    wait_until("wait_after_map", 1.0, ["Magnifier.png"], _cfg_ref("magifier_region_pct")),
                 ],
                 "on_success": "MagnifierAfterMap",
                 "on_failure": "MagnifierAfterMap",
@@ -302,12 +333,12 @@ def _farm_common_template(cfg: AppConfig, options: Mapping[str, Any], data: Mapp
                         "threshold": _cfg_ref("match_threshold"),
                         "verify_threshold": _cfg_ref("verify_threshold"),
                     },
-                    {
-                        "type": "Wait",
-                        "name": "wait_after_magnifier2",
-                        "seconds": 1.0,
-                        "randomize": True,
-                    },
+                    adaptive_wait(
+                        "wait_after_magnifier2",
+                        1.0,
+                        resource_templates,
+                        _cfg_ref("resource_search_selection_region_pct"),
+                    ),
                 ],
                 "on_success": step_label,
                 "on_failure": "EndNoLegions",
@@ -324,12 +355,12 @@ def _farm_common_template(cfg: AppConfig, options: Mapping[str, Any], data: Mapp
                         "threshold": _cfg_ref("match_threshold"),
                         "verify_threshold": _cfg_ref("verify_threshold"),
                     },
-                    {
-                        "type": "Wait",
-                        "name": f"wait_after_{resource_key}",
-                        "seconds": 1.0,
-                        "randomize": True,
-                    },
+                    adaptive_wait(
+                        f"wait_after_{resource_key}",
+                        1.0,
+                        ["SearchFarmButton.png"],
+                        _cfg_ref("resource_search_button_region_pct"),
+                    ),
                 ],
                 "on_success": "SearchFarmButton",
                 "on_failure": "EndNoLegions",
@@ -351,12 +382,12 @@ def _farm_common_template(cfg: AppConfig, options: Mapping[str, Any], data: Mapp
                                 "threshold": _cfg_ref("match_threshold"),
                                 "verify_threshold": _cfg_ref("verify_threshold"),
                             },
-                            {
-                                "type": "Wait",
-                                "name": "wait_after_search",
-                                "seconds": 2.0,
-                                "randomize": True,
-                            },
+                            wait_until(
+                                "wait_after_search",
+                                2.0,
+                                ["GatherButton.png"],
+                                _cfg_ref("gather_button_region_pct"),
+                            ),
                         ],
                     }
                 ],
@@ -375,12 +406,12 @@ def _farm_common_template(cfg: AppConfig, options: Mapping[str, Any], data: Mapp
                         "threshold": _cfg_ref("match_threshold"),
                         "verify_threshold": _cfg_ref("verify_threshold"),
                     },
-                    {
-                        "type": "Wait",
-                        "name": "wait_after_gather",
-                        "seconds": 1.0,
-                        "randomize": True,
-                    },
+                    wait_until(
+                        "wait_after_gather",
+                        1.0,
+                        ["CreateLegionsButton.png"],
+                        _cfg_ref("create_legions_button_region_pct"),
+                    ),
                 ],
                 "on_success": "CreateLegionsButton",
                 "on_failure": "TapCenterThenGather",
@@ -544,10 +575,28 @@ def list_definitions() -> List[str]:
     return entries
 
 
-def load_definition(key: str) -> Mapping[str, Any]:
-    path = _BASE_DIR / f"{key}.json"
-    if not path.exists():
-        raise FileNotFoundError(f"State machine '{key}' not found at {path}")
+# Parsed JSON files keyed by path -> ((mtime_ns, size), data); callers get clones
+_FILE_CACHE: Dict[Path, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+# Compiled machines keyed by (key, mtime_ns, size, cfg); AppConfig is frozen and hashable
+_COMPILED_CACHE: "OrderedDict[Tuple[Any, ...], _CompiledMachine]" = OrderedDict()
+_COMPILED_CACHE_MAX = 64
+_cache_lock = threading.Lock()
+
+
+def _file_stamp(path: Path) -> Tuple[int, int]:
+    st = path.stat()
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _read_definition_file(path: Path) -> Tuple[Tuple[int, int], Dict[str, Any]]:
+    try:
+        stamp = _file_stamp(path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"State machine '{path.stem}' not found at {path}") from None
+    with _cache_lock:
+        cached = _FILE_CACHE.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached
     with path.open("r", encoding="utf-8") as fh:
         try:
             data = json.load(fh)
@@ -555,10 +604,29 @@ def load_definition(key: str) -> Mapping[str, Any]:
             raise DefinitionError(f"Invalid JSON in {path}: {exc}") from exc
     if not isinstance(data, MutableMapping):
         raise DefinitionError(f"Definition {path} must be a JSON object")
+    entry = (stamp, data)
+    with _cache_lock:
+        _FILE_CACHE[path] = entry
+    return entry
+
+
+def load_definition(key: str) -> Mapping[str, Any]:
+    path = _BASE_DIR / f"{key}.json"
+    if not path.exists():
+        raise FileNotFoundError(f"State machine '{key}' not found at {path}")
+    _, cached = _read_definition_file(path)
+    data = _deep_clone(cached)
     data.setdefault("key", key)
     return data
 
 
+def clear_cache() -> None:
+    """Drop parsed files and compiled machines (next build recompiles)."""
+    with _cache_lock:
+        _FILE_CACHE.clear()
+        _COMPILED_CACHE.clear()
+
+
 def resolve_definition(
     cfg: AppConfig,
     raw: Mapping[str, Any] | None = None,
@@ -599,102 +667,230 @@ def get_state_dir() -> Path:
     return _BASE_DIR
 
 
+@dataclass(frozen=True)
+class _ActionSpec:
+    """An action with its type looked up and its arguments already resolved.
+
+    Specs are shared between builds; every build instantiates fresh actions
+    from clones of the arguments, so per-run action state never leaks.
+    """
+
+    cls: Any
+    kwargs: Tuple[Tuple[str, Any], ...]
+    children: Optional[Tuple["_ActionSpec", ...]] = None
+
+    def instantiate(self) -> Any:
+        kwargs = {k: _deep_clone(v) for k, v in self.kwargs}
+        if self.children is not None:
+            kwargs["actions"] = [child.instantiate() for child in self.children]
+        return self.cls(**kwargs)
+
+
+@dataclass(frozen=True)
+class _StepSpec:
+    name: str
+    actions: Tuple[_ActionSpec, ...]
+    on_success: Optional[str]
+    on_failure: Optional[str]
+    capture: Optional[str] = None
+    parallel: bool = False
+    merge: str = "all"
+
+    def instantiate(self) -> GraphStep:
+        actions = [spec.instantiate() for spec in self.actions]
+        capture = StepCapture(self.capture, action_regions(actions)) if self.capture else None
+        return GraphStep(
+            name=self.name,
+            actions=actions,
+            on_success=self.on_success,
+            on_failure=self.on_failure,
+            capture=capture,
+            parallel=self.parallel,
+            merge=self.merge,
+        )
+
+
+@dataclass(frozen=True)
+class _CompiledMachine:
+    """Template-expanded, config-resolved definition ready to instantiate."""
+
+    data: Mapping[str, Any]
+    key: str
+    label: Any
+    # None means the default context built from cfg
+    context_kwargs: Optional[Tuple[Tuple[str, Any], ...]]
+    cfg: AppConfig
+    stype: str
+    steps: Tuple[_StepSpec, ...] = ()
+    start: str = ""
+    actions: Tuple[_ActionSpec, ...] = ()
+    seq_name: str = ""
+    loop_sleep_s: float = 0.05
+
+    def build(self) -> tuple[State, Context, Mapping[str, Any]]:
+        if self.context_kwargs is None:
+            ctx = _default_context(self.cfg)
+        else:
+            ctx = Context(**{k: _deep_clone(v) for k, v in self.context_kwargs})
+        if self.stype == "graph":
+            steps = [step.instantiate() for step in self.steps]
+            state: State = GraphState(steps=steps, start=self.start, loop_sleep_s=self.loop_sleep_s)
+        else:
+            state = SequenceState(
+                name=self.seq_name,
+                actions=[spec.instantiate() for spec in self.actions],
+                loop_sleep_s=self.loop_sleep_s,
+            )
+        state._label = self.label  # type: ignore[attr-defined]
+        try:
+            setattr(state, "_machine_key", self.key)
+        except Exception:
+            pass
+        try:
+            setattr(ctx, "machine_key", self.key)
+            setattr(ctx, "active_machine_key", self.key)
+        except Exception:
+            pass
+        return state, ctx, dict(self.data)
+
+
 def build_state_from_json(cfg: AppConfig, key: str) -> tuple[State, Context, Mapping[str, Any]]:
-    data = load_definition(key)
-    return build_state_from_dict(cfg, data, key=key)
+    path = _BASE_DIR / f"{key}.json"
+    if not path.exists():
+        raise FileNotFoundError(f"State machine '{key}' not found at {path}")
+    stamp, raw = _read_definition_file(path)
+    cache_key = (key, stamp, cfg)
+    with _cache_lock:
+        compiled = _COMPILED_CACHE.get(cache_key)
+        if compiled is not None:
+            _COMPILED_CACHE.move_to_end(cache_key)
+    if compiled is None:
+        data = _deep_clone(raw)
+        data.setdefault("key", key)
+        compiled = _compile(cfg, data, key)
+        with _cache_lock:
+            _COMPILED_CACHE[cache_key] = compiled
+            while len(_COMPILED_CACHE) > _COMPILED_CACHE_MAX:
+                _COMPILED_CACHE.popitem(last=False)
+    return compiled.build()
 
 
 def build_state_from_dict(cfg: AppConfig, raw: Mapping[str, Any], key: str | None = None) -> tuple[State, Context, Mapping[str, Any]]:
+    return _compile(cfg, raw, key).build()
+
+
+def _compile(cfg: AppConfig, raw: Mapping[str, Any], key: str | None) -> _CompiledMachine:
     data = _apply_templates(cfg, raw)
     data = dict(data)
     if key:
         data.setdefault("key", key)
-    ctx = _build_context(cfg, data.get("context"))
+    context_kwargs = _compile_context(cfg, data.get("context"))
     stype = str(data.get("type") or "").strip().lower()
     if not stype:
         raise DefinitionError(f"State machine '{data.get('key', key)}' missing 'type'")
-    if stype == "graph":
-        state = _build_graph_state(cfg, data)
-    elif stype == "sequence":
-        state = _build_sequence_state(cfg, data)
-    else:
-        raise DefinitionError(f"State machine '{data.get('key', key)}' has unsupported type '{stype}'")
-    state._label = data.get("label") or data.get("key") or key  # type: ignore[attr-defined]
+    label = data.get("label") or data.get("key") or key
     machine_key = str(data.get("key") or key or "").strip()
-    try:
-        setattr(state, "_machine_key", machine_key)
-    except Exception:
-        pass
-    try:
-        setattr(ctx, "machine_key", machine_key)
-        setattr(ctx, "active_machine_key", machine_key)
-    except Exception:
-        pass
-    return state, ctx, data
+    common = dict(data=data, key=machine_key, label=label, context_kwargs=context_kwargs, cfg=cfg, stype=stype)
+    if stype == "graph":
+        start, steps, loop_sleep = _compile_graph(cfg, data)
+        return _CompiledMachine(steps=steps, start=start, loop_sleep_s=loop_sleep, **common)
+    if stype == "sequence":
+        actions, name, loop_sleep = _compile_sequence(cfg, data)
+        return _CompiledMachine(actions=actions, seq_name=name, loop_sleep_s=loop_sleep, **common)
+    raise DefinitionError(f"State machine '{data.get('key', key)}' has unsupported type '{stype}'")
 
 
-def _build_context(cfg: AppConfig, spec: Any) -> Context:
+def _default_context(cfg: AppConfig) -> Context:
+    return Context(
+        window_title_substr=cfg.window_title_substr,
+        templates_dir=cfg.templates_dir,
+        save_shots=cfg.save_shots,
+        shots_dir=cfg.shots_dir,
+    )
+
+
+def _compile_context(cfg: AppConfig, spec: Any) -> Optional[Tuple[Tuple[str, Any], ...]]:
     if spec in (None, "default"):
-        return Context(
-            window_title_substr=cfg.window_title_substr,
-            templates_dir=cfg.templates_dir,
-            save_shots=cfg.save_shots,
-            shots_dir=cfg.shots_dir,
-        )
+        return None
     if not isinstance(spec, Mapping):
         raise DefinitionError("Context definition must be an object or 'default'")
-    kwargs: Dict[str, Any] = {}
-    for key, value in spec.items():
-        kwargs[key] = _resolve_value(cfg, value)
-    return Context(**kwargs)
+    return tuple((key, _resolve_value(cfg, value)) for key, value in spec.items())
 
 
-def _build_graph_state(cfg: AppConfig, data: Mapping[str, Any]) -> GraphState:
+def _compile_graph(cfg: AppConfig, data: Mapping[str, Any]) -> Tuple[str, Tuple[_StepSpec, ...], float]:
     start = data.get("start")
     if not isinstance(start, str) or not start:
         raise DefinitionError("Graph state requires non-empty 'start'")
     steps_data = data.get("steps")
     if not isinstance(steps_data, Sequence) or not steps_data:
         raise DefinitionError("Graph state requires non-empty 'steps' array")
-    steps: List[GraphStep] = []
+    steps: List[_StepSpec] = []
     for entry in steps_data:
         if not isinstance(entry, Mapping):
             raise DefinitionError("Each step must be an object")
         name = entry.get("name")
         if not isinstance(name, str) or not name:
             raise DefinitionError("Graph step missing 'name'")
-        actions_def = entry.get("actions", [])
-        actions = _build_actions(cfg, actions_def)
+        actions = _compile_actions(cfg, entry.get("actions", []))
         on_success = entry.get("on_success")
         on_failure = entry.get("on_failure")
-        steps.append(GraphStep(name=name, actions=actions, on_success=on_success, on_failure=on_failure))
+        capture = entry.get("capture")
+        if capture is not None and capture not in CAPTURE_MODES:
+            raise DefinitionError(
+                f"Step '{name}' capture must be one of {', '.join(CAPTURE_MODES)}"
+            )
+        parallel = bool(entry.get("parallel", False))
+        merge = entry.get("merge", "all")
+        if merge not in PARALLEL_MERGE_RULES:
+            raise DefinitionError(
+                f"Step '{name}' merge must be one of {', '.join(PARALLEL_MERGE_RULES)}"
+            )
+        if parallel:
+            unsafe = [spec.cls.__name__ for spec in actions if not getattr(spec.cls, "parallel_safe", False)]
+            if unsafe:
+                raise DefinitionError(
+                    f"Step '{name}' is parallel but {', '.join(unsafe)} cannot run concurrently "
+                    "(only read-only checks such as CheckTemplate and ReadText can)"
+                )
+        steps.append(
+            _StepSpec(
+                name=name,
+                actions=actions,
+                on_success=on_success,
+                on_failure=on_failure,
+                capture=capture,
+                parallel=parallel,
+                merge=merge,
+            )
+        )
+    names = {step.name for step in steps}
+    for step in steps:
+        for field, target in (("on_success", step.on_success), ("on_failure", step.on_failure)):
+            if target and target not in names:
+                raise DefinitionError(f"Step '{step.name}' {field} points to unknown step '{target}'")
     loop_sleep = float(data.get("loop_sleep_s", 0.05))
-    return GraphState(steps=steps, start=start, loop_sleep_s=loop_sleep)
+    return start, tuple(steps), loop_sleep
 
 
-def _build_sequence_state(cfg: AppConfig, data: Mapping[str, Any]) -> SequenceState:
+def _compile_sequence(cfg: AppConfig, data: Mapping[str, Any]) -> Tuple[Tuple[_ActionSpec, ...], str, float]:
     actions_def = data.get("actions")
     if not isinstance(actions_def, Sequence) or not actions_def:
         raise DefinitionError("Sequence state requires 'actions' array")
-    actions = _build_actions(cfg, actions_def)
+    actions = _compile_actions(cfg, actions_def)
     loop_sleep = float(data.get("loop_sleep_s", 0.05))
     name = data.get("name")
-    seq = SequenceState(name=name or "sequence_state", actions=actions, loop_sleep_s=loop_sleep)
-    return seq
+    return actions, name or "sequence_state", loop_sleep
 
 
-def _build_actions(cfg: AppConfig, entries: Any) -> List[Any]:
+def _compile_actions(cfg: AppConfig, entries: Any) -> Tuple[_ActionSpec, ...]:
     if entries is None:
-        return []
+        return ()
     if not isinstance(entries, Sequence):
         raise DefinitionError("Actions definition must be an array")
-    result: List[Any] = []
-    for raw in entries:
-        result.append(_build_action(cfg, raw))
-    return result
+    return tuple(_compile_action(cfg, raw) for raw in entries)
 
 
-def _build_action(cfg: AppConfig, raw: Any) -> Any:
+def _compile_action(cfg: AppConfig, raw: Any) -> _ActionSpec:
     if not isinstance(raw, Mapping):
         raise DefinitionError("Action must be an object")
     atype = raw.get("type")
@@ -703,15 +899,346 @@ def _build_action(cfg: AppConfig, raw: Any) -> Any:
     cls = _ACTION_REGISTRY.get(atype)
     if cls is None:
         raise UnknownActionError(f"Unknown action type '{atype}'")
-    kwargs: Dict[str, Any] = {}
+    kwargs: List[Tuple[str, Any]] = []
+    children: Optional[Tuple[_ActionSpec, ...]] = None
     for key, value in raw.items():
         if key == "type":
             continue
         if key == "actions":
-            kwargs[key] = _build_actions(cfg, value)
+            children = _compile_actions(cfg, value)
             continue
-        kwargs[key] = _resolve_value(cfg, value)
-    return cls(**kwargs)
+        kwargs.append((key, _resolve_value(cfg, value)))
+    return _ActionSpec(cls=cls, kwargs=tuple(kwargs), children=children)
+
+
+# Static analysis --------------------------------------------------------------
+
+# Actions that take real time per run, so a loop through them cannot spin
+_PACING_ACTIONS = {"Wait", "WaitFor", "Screenshot"}
+# Template-matching actions; each listed template is one match per run
+_MATCH_ACTIONS = {"FindAndClick", "CheckTemplate", "CheckTemplatesCountAtLeast"}
+_OCR_ACTIONS = {"ReadText", "SetCooldownFromText"}
+# Orchestrators end a cycle at EndCycle, and at CooldownGate when it fails (cooldown active)
+_CYCLE_END_ACTIONS = {"EndCycle"}
+_CYCLE_END_ON_FAILURE_ACTIONS = {"CooldownGate"}
+# Step/Retry capture policies that grab a frame (at most once per run)
+_CAPTURING_MODES = {"fresh", "roi"}
+# Bound on simple paths explored for the per-cycle worst case
+_MAX_CYCLE_PATHS = 20000
+
+
+def _action_cost(cfg: AppConfig, raw: Any) -> Dict[str, Any]:
+    """Captures, template matches and OCR reads one run of ``raw`` can perform."""
+    cost = {"captures": 0, "matches": 0, "ocr": 0, "paced": False}
+    if not isinstance(raw, Mapping):
+        return cost
+    atype = raw.get("type")
+    if atype == "Screenshot":
+        cost["captures"] = 1
+    elif atype in _MATCH_ACTIONS:
+        templates = raw.get("templates")
+        cost["matches"] = len(templates) if isinstance(templates, Sequence) and not isinstance(templates, str) else 1
+    elif atype in _OCR_ACTIONS:
+        cost["ocr"] = 1
+    elif atype == "WaitFor":
+        # Worst case: every poll until the timeout captures and matches
+        try:
+            polls = len(
+                poll_schedule(
+                    float(_resolve_value(cfg, raw.get("timeout_s", 5.0))),
+                    float(_resolve_value(cfg, raw.get("min_interval_s", 0.1))),
+                    float(_resolve_value(cfg, raw.get("max_interval_s", 0.5))),
+                    float(_resolve_value(cfg, raw.get("backoff", 1.5))),
+                )
+            )
+        except Exception:
+            polls = 1
+        templates = raw.get("templates")
+        per_poll = len(templates) if isinstance(templates, Sequence) and not isinstance(templates, str) else 1
+        cost["captures"] = polls
+        cost["matches"] = polls * per_poll
+    if atype == "Wait":
+        try:
+            cost["paced"] = float(_resolve_value(cfg, raw.get("seconds", 0))) > 0
+        except Exception:
+            cost["paced"] = False
+    elif atype in _PACING_ACTIONS:
+        cost["paced"] = True
+    children = raw.get("actions")
+    if isinstance(children, Sequence) and not isinstance(children, str):
+        try:
+            times = max(1, int(_resolve_value(cfg, raw.get("attempts", 1))))
+        except Exception:
+            times = 1
+        if raw.get("capture") in _CAPTURING_MODES:
+            cost["captures"] += times
+            cost["paced"] = True
+        if atype == "Retry" and times > 1 and raw.get("backoff", "none") != "none":
+            cost["paced"] = True
+        for child in children:
+            sub = _action_cost(cfg, child)
+            for field in ("captures", "matches", "ocr"):
+                cost[field] += sub[field] * times
+            cost["paced"] = cost["paced"] or sub["paced"]
+    return cost
+
+
+def _strongly_connected(nodes: Sequence[str], edges: Mapping[str, Sequence[str]]) -> List[List[str]]:
+    """Tarjan's algorithm; returns components that contain a cycle."""
+    index: Dict[str, int] = {}
+    low: Dict[str, int] = {}
+    stack: List[str] = []
+    on_stack: set[str] = set()
+    result: List[List[str]] = []
+    counter = 0
+
+    def visit(node: str) -> None:
+        nonlocal counter
+        index[node] = low[node] = counter
+        counter += 1
+        stack.append(node)
+        on_stack.add(node)
+        for nxt in edges.get(node, ()):
+            if nxt not in index:
+                visit(nxt)
+                low[node] = min(low[node], low[nxt])
+            elif nxt in on_stack:
+                low[node] = min(low[node], index[nxt])
+        if low[node] == index[node]:
+            comp: List[str] = []
+            while True:
+                top = stack.pop()
+                on_stack.discard(top)
+                comp.append(top)
+                if top == node:
+                    break
+            if len(comp) > 1 or node in edges.get(node, ()):
+                result.append(sorted(comp, key=nodes.index))
+
+    for node in nodes:
+        if node not in index:
+            visit(node)
+    return result
+
+
+def analyze_graph(cfg: AppConfig, data: Mapping[str, Any]) -> Dict[str, Any]:
+    """Check a template-expanded graph definition for structural and pacing problems.
+
+    Errors (missing start, duplicate names, dangling transitions) make the
+    definition unusable; warnings (unreachable steps, loops without any wait
+    or capture) point at wasted work or CPU spin.
+    """
+    errors: List[str] = []
+    warnings: List[str] = []
+    steps_data = data.get("steps")
+    steps: Dict[str, Mapping[str, Any]] = {}
+    order: List[str] = []
+    if isinstance(steps_data, Sequence):
+        for entry in steps_data:
+            if not isinstance(entry, Mapping) or not isinstance(entry.get("name"), str) or not entry.get("name"):
+                errors.append("Every step must be an object with a non-empty 'name'")
+                continue
+            name = entry["name"]
+            if name in steps:
+                errors.append(f"Duplicate step name '{name}'")
+                continue
+            steps[name] = entry
+            order.append(name)
+    start = data.get("start")
+    if not isinstance(start, str) or start not in steps:
+        errors.append(f"Start step '{start}' is not defined")
+        start = None
+
+    # A missing transition keeps the machine on the same step
+    edges: Dict[str, List[str]] = {}
+    dangling: List[Dict[str, str]] = []
+    for name in order:
+        targets: List[str] = []
+        for field in ("on_success", "on_failure"):
+            target = steps[name].get(field)
+            if target is None or target == "":
+                target = name
+            if not isinstance(target, str) or target not in steps:
+                dangling.append({"step": name, "field": field, "target": str(target)})
+                errors.append(f"Step '{name}' {field} points to unknown step '{target}'")
+                continue
+            if target not in targets:
+                targets.append(target)
+        edges[name] = targets
+
+    reachable: set[str] = set()
+    if start is not None:
+        pending = [start]
+        while pending:
+            node = pending.pop()
+            if node in reachable:
+                continue
+            reachable.add(node)
+            pending.extend(edges.get(node, ()))
+    unreachable = [name for name in order if start is not None and name not in reachable]
+    for name in unreachable:
+        warnings.append(f"Step '{name}' is unreachable from '{start}'")
+
+    costs: Dict[str, Dict[str, Any]] = {}
+    for name in order:
+        total = {"captures": 0, "matches": 0, "ocr": 0, "paced": False, "ends_cycle": False, "ends_on_failure": False}
+        capture = steps[name].get("capture")
+        if capture in _CAPTURING_MODES:
+            total["captures"] += 1
+            total["paced"] = True
+        elif capture is not None and capture not in CAPTURE_MODES:
+            errors.append(f"Step '{name}' capture must be one of {', '.join(CAPTURE_MODES)}")
+        actions = steps[name].get("actions") or []
+        if isinstance(actions, Sequence):
+            for raw in actions:
+                sub = _action_cost(cfg, raw)
+                for field in ("captures", "matches", "ocr"):
+                    total[field] += sub[field]
+                total["paced"] = total["paced"] or sub["paced"]
+                atype = raw.get("type") if isinstance(raw, Mapping) else None
+                if atype in _CYCLE_END_ACTIONS:
+                    total["ends_cycle"] = True
+                if atype in _CYCLE_END_ON_FAILURE_ACTIONS:
+                    total["ends_on_failure"] = True
+        costs[name] = total
+
+    # Cycles made only of unpaced steps run as fast as loop_sleep_s allows
+    try:
+        loop_sleep = float(data.get("loop_sleep_s", 0.05))
+    except Exception:
+        loop_sleep = 0.05
+    unpaced = [name for name in order if name in reachable and not costs[name]["paced"]]
+    unpaced_edges: Dict[str, List[str]] = {}
+    for name in unpaced:
+        targets = []
+        for field in ("on_success", "on_failure"):
+            # A transition that ends the cycle hands control to the orchestrator
+            # (other modes, check-stuck) first, so a gated self-loop is paced
+            if _ends_cycle(costs[name], field):
+                continue
+            target = steps[name].get(field) or name
+            if target in unpaced and target not in targets:
+                targets.append(target)
+        unpaced_edges[name] = targets
+    tight_loops = _strongly_connected(unpaced, unpaced_edges)
+    for loop in tight_loops:
+        rate = f"~{1.0 / loop_sleep:.0f} steps/s" if loop_sleep > 0 else "without any sleep"
+        warnings.append(f"Loop {' -> '.join(loop)} has no Wait or capture and can spin {rate}")
+
+    per_cycle = _worst_case_cycle(start, edges, steps, costs) if start is not None else None
+    if per_cycle is not None and per_cycle["unbounded"]:
+        warnings.append("A cycle can loop without returning to the start step; only the orchestrator's step guard bounds it")
+
+    return {
+        "type": "graph",
+        "start": start,
+        "errors": errors,
+        "warnings": warnings,
+        "unreachable": unreachable,
+        "dangling": dangling,
+        "tight_loops": tight_loops,
+        "steps": {
+            name: {k: costs[name][k] for k in ("captures", "matches", "ocr", "paced")} for name in order
+        },
+        "per_cycle": per_cycle,
+    }
+
+
+def _ends_cycle(cost: Mapping[str, Any], field: str) -> bool:
+    """Whether leaving a step through ``field`` ends the current cycle."""
+    return bool(cost["ends_cycle"] or (field == "on_failure" and cost["ends_on_failure"]))
+
+
+def _worst_case_cycle(
+    start: str,
+    edges: Mapping[str, Sequence[str]],
+    steps: Mapping[str, Mapping[str, Any]],
+    costs: Mapping[str, Mapping[str, Any]],
+) -> Dict[str, Any]:
+    """Worst-case captures/matches/OCR from ``start`` until the cycle ends.
+
+    A cycle ends at an EndCycle step, a failing CooldownGate, or on returning
+    to ``start``. Paths that revisit a step are cut there and flagged as
+    unbounded, since only the orchestrator's step guard ends them.
+    """
+    best = {"captures": 0, "matches": 0, "ocr": 0, "steps": 0}
+    unbounded = False
+    explored = 0
+
+    def transitions(name: str) -> List[Tuple[str, bool]]:
+        # (target, cycle ends after this step)
+        out: List[Tuple[str, bool]] = []
+        for field in ("on_success", "on_failure"):
+            target = steps[name].get(field) or name
+            if target not in steps:
+                continue
+            ends = _ends_cycle(costs[name], field)
+            out.append((target, ends))
+        return out
+
+    def walk(name: str, path: List[str], acc: Dict[str, int]) -> None:
+        nonlocal unbounded, explored
+        explored += 1
+        if explored > _MAX_CYCLE_PATHS:
+            unbounded = True
+            return
+        c = costs[name]
+        acc = {
+            "captures": acc["captures"] + c["captures"],
+            "matches": acc["matches"] + c["matches"],
+            "ocr": acc["ocr"] + c["ocr"],
+            "steps": acc["steps"] + 1,
+        }
+        path.append(name)
+        for target, ends in transitions(name):
+            if ends or target == start:
+                for field in best:
+                    best[field] = max(best[field], acc[field])
+            elif target in path:
+                unbounded = True
+                for field in best:
+                    best[field] = max(best[field], acc[field])
+            else:
+                walk(target, path, acc)
+        path.pop()
+
+    walk(start, [], {"captures": 0, "matches": 0, "ocr": 0, "steps": 0})
+    return {**best, "unbounded": unbounded}
+
+
+def _analyze_sequence(cfg: AppConfig, data: Mapping[str, Any]) -> Dict[str, Any]:
+    total = {"captures": 0, "matches": 0, "ocr": 0}
+    paced = False
+    actions = data.get("actions") or []
+    if isinstance(actions, Sequence):
+        for raw in actions:
+            sub = _action_cost(cfg, raw)
+            for field in total:
+                total[field] += sub[field]
+            paced = paced or sub["paced"]
+    warnings: List[str] = []
+    if not paced:
+        warnings.append("Sequence has no Wait or capture; it repeats as fast as loop_sleep_s allows")
+    return {
+        "type": "sequence",
+        "errors": [],
+        "warnings": warnings,
+        "per_cycle": {**total, "steps": 1, "unbounded": False},
+    }
+
+
+def analyze_definition(cfg: AppConfig, raw: Mapping[str, Any], key: str | None = None) -> Dict[str, Any]:
+    """Expand templates and run the static checks for a graph or sequence definition."""
+    data = _apply_templates(cfg, raw)
+    stype = str(data.get("type") or "").strip().lower()
+    if stype == "graph":
+        report = analyze_graph(cfg, data)
+    elif stype == "sequence":
+        report = _analyze_sequence(cfg, data)
+    else:
+        report = {"type": stype, "errors": [f"Unsupported type '{stype}'"], "warnings": []}
+    report["key"] = str(data.get("key") or key or "")
+    return report
 
 
 def _resolve_value(cfg: AppConfig, value: Any) -> Any:
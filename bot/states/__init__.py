@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import threading as _threading
+import time as _time
 from collections import OrderedDict
 from collections.abc import Callable, Iterator, Mapping
 
@@ -24,6 +26,8 @@ __all__ = [
     "build_checkstuck_state",
     "build_farm_gem_state",
     "get_mode_registry",
+    "get_definition",
+    "invalidate_registry",
 ]
 
 
@@ -90,10 +94,7 @@ def build_farm_alliance_resource_center_state(cfg: AppConfig) -> tuple[State, Co
 
 
 def _label_for(key: str, fallback: str) -> str:
-    try:
-        data = _sm_loader.load_definition(key)
-    except Exception:
-        return fallback
+    data = get_definition(key)
     label = data.get("label")
     return label if isinstance(label, str) and label else fallback
 
@@ -132,11 +133,7 @@ def _base_mode_registry() -> "OrderedDict[str, tuple[str, Builder]]":
 
 
 def _list_definition_keys() -> list[str]:
-    try:
-        keys = list(_sm_loader.list_definitions())
-    except Exception:
-        return []
-    return keys
+    return list(_index().definitions.keys())
 
 
 def _merge_additional_modes(
@@ -154,11 +151,88 @@ def _merge_additional_modes(
     return registry
 
 
-def get_mode_registry() -> "OrderedDict[str, tuple[str, Builder]]":
+def _build_mode_registry() -> "OrderedDict[str, tuple[str, Builder]]":
     base = _base_mode_registry()
     return _merge_additional_modes(base)
 
 
+class _DefinitionIndex:
+    """Raw JSON definitions plus the mode registry derived from them.
+
+    Rebuilt only when the set of definition files or one of their
+    mtimes/sizes changes; that check itself runs at most once per
+    ``_RECHECK_S`` so hot API paths just return the cached objects.
+    """
+
+    def __init__(self, signature: tuple, definitions: "dict[str, Mapping]") -> None:
+        self.signature = signature
+        self.definitions = definitions
+        self.registry: "OrderedDict[str, tuple[str, Builder]]" = OrderedDict()
+        self.checked_at = _time.monotonic()
+
+
+_RECHECK_S = 1.0
+_index_lock = _threading.RLock()
+_current_index: _DefinitionIndex | None = None
+
+
+def _definitions_signature() -> tuple:
+    entries = []
+    try:
+        for path in sorted(_sm_loader.get_state_dir().glob("*.json")):
+            if path.name.startswith("_"):
+                continue
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((path.stem, st.st_mtime_ns, st.st_size))
+    except Exception:
+        pass
+    return tuple(entries)
+
+
+def _index() -> _DefinitionIndex:
+    global _current_index
+    with _index_lock:
+        current = _current_index
+        now = _time.monotonic()
+        if current is not None and now - current.checked_at < _RECHECK_S:
+            return current
+        signature = _definitions_signature()
+        if current is not None and current.signature == signature:
+            current.checked_at = now
+            return current
+        definitions: "dict[str, Mapping]" = {}
+        for key, _mtime, _size in signature:
+            try:
+                definitions[key] = _sm_loader.load_definition(key)
+            except Exception:
+                continue
+        # Publish definitions first: building the registry reads labels from them
+        index = _DefinitionIndex(signature, definitions)
+        _current_index = index
+        index.registry = _build_mode_registry()
+        return index
+
+
+def invalidate_registry() -> None:
+    """Force the next access to rescan the definition files."""
+    global _current_index
+    with _index_lock:
+        _current_index = None
+
+
+def get_definition(key: str) -> Mapping:
+    """Cached raw definition for ``key`` (empty mapping if unknown); treat as read-only."""
+    return _index().definitions.get(key, {})
+
+
+def get_mode_registry() -> "OrderedDict[str, tuple[str, Builder]]":
+    """Cached key -> (label, builder) registry in UI order; treat as read-only."""
+    return _index().registry
+
+
 class _ModeMapping(Mapping[str, tuple[str, Builder]]):
     def __iter__(self) -> Iterator[str]:
         return iter(get_mode_registry())
@@ -36,22 +36,16 @@ class AlternatingState(State):
     def _run_one_cycle(self, st: State, ctx: Context) -> None:
         # If it's a GraphState, consider a cycle completed when we loop back to the start step
         if isinstance(st, GraphState):
-            start = getattr(st, "_current", None)
-            progressed = False
             # Safety guard to avoid infinite loops
             for _ in range(128):
                 if ctx.stop_event.is_set():
                     return
-                prev = getattr(st, "_current", None)
                 st.run_once(ctx)
                 # Allow actions to request early end of the current cycle
                 if getattr(ctx, "end_cycle", False):
                     ctx.end_cycle = False
                     break
-                curr = getattr(st, "_current", None)
-                if curr != start:
-                    progressed = True
-                if progressed and curr == start:
+                if st.wrapped:
                     # Completed one full cycle
                     break
             return
@@ -95,8 +89,6 @@ class RoundRobinState(State):
     def _run_one_cycle(self, st: State, ctx: Context) -> None:
         # Mirror AlternatingState semantics for cycle completion and end_cycle support
         if isinstance(st, GraphState):
-            start = getattr(st, "_current", None)
-            progressed = False
             for _ in range(256):
                 if ctx.stop_event.is_set():
                     return
@@ -104,10 +96,7 @@ class RoundRobinState(State):
                 if getattr(ctx, "end_cycle", False):
                     ctx.end_cycle = False
                     break
-                curr = getattr(st, "_current", None)
-                if curr != start:
-                    progressed = True
-                if progressed and curr == start:
+                if st.wrapped:
                     break
             return
         st.run_once(ctx)
@@ -227,8 +216,6 @@ class WithCheckStuckState(State):
     def _run_one_cycle(self, st: State, ctx: Context) -> None:
         # Mirror GraphState cycle completion semantics
         if isinstance(st, GraphState):
-            start = getattr(st, "_current", None)
-            progressed = False
             for _ in range(256):
                 if ctx.stop_event.is_set():
                     return
@@ -236,10 +223,7 @@ class WithCheckStuckState(State):
                 if getattr(ctx, "end_cycle", False):
                     ctx.end_cycle = False
                     break
-                curr = getattr(st, "_current", None)
-                if curr != start:
-                    progressed = True
-                if progressed and curr == start:
+                if st.wrapped:
                     break
             return
         st.run_once(ctx)
@@ -13,13 +13,17 @@ import re
 
 import bot.config as config
 from bot import settings as settings_store
-from bot.core.state_machine import Context, State, StateMachine
+from bot.core.state_machine import Context, GraphState, State, StateMachine
 import bot.states as state_registry
 from bot.states import build_alternating_state, build_round_robin_state, build_with_checkstuck_state
 from bot.state_machines import loader as state_loader
 from bot.core import logs
 from bot.core import counters as _counters
-from bot.core.window import find_window_by_title_substr, get_client_rect_screen, bring_to_front, close_window
+from bot.core import latency as _latency
+from bot.core import ocr as _ocr
+from bot.core import inputs as _inputs
+from bot.core.window import get_client_rect_screen, bring_to_front, close_window
+from bot.core.window_locator import get_locator, locate
 import numpy as _np  # type: ignore
 import mss as _mss   # type: ignore
 from datetime import datetime
@@ -34,6 +38,8 @@ class Running:
     ctx: Optional[Context]
     started_ts: float
     last_window_seen_ts: float
+    # Instance id (see _instance_titles); one Running per instance
+    instance: str = "main"
 
 
 MODE_META = {
@@ -109,8 +115,9 @@ def _state_modes():
 
 
 def _load_state_definition(key: str) -> Dict[str, object]:
+    # Served from the registry's cached index; no file read per request
     try:
-        data = state_loader.load_definition(key)
+        data = state_registry.get_definition(key)
         if isinstance(data, dict):
             return dict(data)
     except Exception:
@@ -197,10 +204,15 @@ def _write_state_definition(key: str, data: Dict[str, object]) -> None:
     with path.open("w", encoding="utf-8") as fh:
         json.dump(data, fh, indent=2, sort_keys=False)
         fh.write("\n")
+    state_registry.invalidate_registry()
 
 
 def _validate_state_definition(key: str, data: Dict[str, object]) -> None:
     cfg = config.DEFAULT_CONFIG
+    report = state_loader.analyze_definition(cfg, data, key=key)
+    errors = report.get("errors") or []
+    if errors:
+        raise state_loader.DefinitionError("; ".join(str(e) for e in errors))
     state_loader.build_state_from_dict(cfg, data, key=key)
 
 
@@ -209,64 +221,137 @@ app = Flask(__name__, template_folder="templates", static_folder="static")
 logging.getLogger("werkzeug").setLevel(logging.ERROR)
 app.logger.disabled = True
 
-_running: Optional[Running] = None
+# Running machines keyed by instance id. Each instance drives its own game
+# window; templates, the OCR service, counters and this web UI are shared.
+_running: Dict[str, Running] = {}
+_running_lock = _threading.RLock()
+DEFAULT_INSTANCE = "main"
 
 _WINDOW_MONITOR_POLL_S = 2.0
 _WINDOW_MONITOR_GRACE_S = 10.0
 
 
+def _instance_titles() -> Dict[str, str]:
+    """Configured instances as id -> window title substring.
+
+    Comes from INSTANCES; without it there is a single "main" instance bound
+    to WINDOW_TITLE_SUBSTR.
+    """
+    cfg = config.DEFAULT_CONFIG
+    out: Dict[str, str] = {}
+    for instance, title in getattr(cfg, "instances", ()) or ():
+        if _STATE_KEY_RE.match(str(instance)) and str(title).strip():
+            out[str(instance)] = str(title).strip()
+    if not out:
+        out[DEFAULT_INSTANCE] = str(getattr(cfg, "window_title_substr", "") or "")
+    return out
+
+
+def _default_instance() -> str:
+    return next(iter(_instance_titles()))
+
+
+def _instance_arg() -> str:
+    """Instance a request addresses (?instance= or JSON "instance"); the first configured one by default."""
+    raw = request.args.get("instance")
+    if raw is None:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            raw = data.get("instance")
+    instance = str(raw or "").strip()
+    return instance or _default_instance()
+
+
+def _get_running(instance: str) -> Optional[Running]:
+    with _running_lock:
+        return _running.get(instance)
+
+
+def _all_running() -> List[Running]:
+    with _running_lock:
+        return list(_running.values())
+
+
 def _monitor_window_loop() -> None:
-    """Background watchdog that stops the bot when the game window disappears."""
+    """Background watchdog that stops an instance when its game window disappears."""
 
     while True:
         _time.sleep(_WINDOW_MONITOR_POLL_S)
-        running = _running
-        if not running or not running.ctx:
-            continue
+        for running in _all_running():
+            try:
+                _check_instance_window(running)
+            except Exception:
+                pass
 
-        # If selection changed while we were iterating, skip this cycle to avoid
-        # interfering with the new run.
-        if running is not _running:
-            continue
 
-        window_substr = str(getattr(running.ctx, "window_title_substr", "") or "").strip()
-        if not window_substr:
-            if running is _running:
-                running.last_window_seen_ts = _time.time()
-            continue
+def _check_instance_window(running: Running) -> None:
+    if not running.ctx:
+        return
 
-        try:
-            hwnd = find_window_by_title_substr(window_substr)
-        except Exception:
-            hwnd = None
+    # If the instance was restarted while we were iterating, skip it this
+    # cycle to avoid interfering with the new run.
+    if _get_running(running.instance) is not running:
+        return
 
-        now = _time.time()
+    window_substr = str(getattr(running.ctx, "window_title_substr", "") or "").strip()
+    if not window_substr:
+        running.last_window_seen_ts = _time.time()
+        return
 
-        if hwnd:
-            if running is _running:
-                running.last_window_seen_ts = now
-            continue
+    try:
+        hwnd = locate(window_substr, hint=running.ctx.hwnd, owner=running.instance)
+    except Exception:
+        hwnd = None
 
-        last_seen = getattr(running, "last_window_seen_ts", getattr(running, "started_ts", now))
-        if now - last_seen < _WINDOW_MONITOR_GRACE_S:
-            continue
+    now = _time.time()
 
-        if running is not _running:
-            continue
+    if hwnd:
+        running.last_window_seen_ts = now
+        return
 
-        try:
-            logs.add("[Monitor] Game window not detected; stopping bot.", level="warn")
-        except Exception:
-            pass
-        _stop_running()
+    last_seen = getattr(running, "last_window_seen_ts", getattr(running, "started_ts", now))
+    if now - last_seen < _WINDOW_MONITOR_GRACE_S:
+        return
 
+    if _get_running(running.instance) is not running:
+        return
 
+    try:
+        logs.set_instance(running.instance)
+        logs.add(f"[Monitor] Game window for instance '{running.instance}' not detected; stopping it.", level="warn")
+    except Exception:
+        pass
+    finally:
+        logs.set_instance(None)
+    _stop_running(running.instance)
 
-def _stop_running() -> None:
-    global _running
-    if _running and _running.machine and _running.ctx:
-        _running.machine.stop(_running.ctx)
-    _running = None
+
+def _stop_running(instance: Optional[str] = None) -> None:
+    """Stop one instance, or every instance when ``instance`` is None."""
+    with _running_lock:
+        if instance is None:
+            stopping = list(_running.values())
+            _running.clear()
+        else:
+            one = _running.pop(instance, None)
+            stopping = [one] if one is not None else []
+    for running in stopping:
+        try:
+            if running.machine and running.ctx:
+                running.machine.stop(running.ctx)
+        except Exception:
+            pass
+        # Let another instance bind the window
+        try:
+            get_locator().release(running.instance)
+        except Exception:
+            pass
+    # Persist write-behind counters (and learned wait latencies) so a stop is a durable checkpoint
+    try:
+        _counters.flush()
+        _latency.flush()
+    except Exception:
+        pass
 
 
 _window_monitor_thread = _threading.Thread(
@@ -275,71 +360,95 @@ _window_monitor_thread = _threading.Thread(
 _window_monitor_thread.start()
 
 
+def _start_instance(
+    instance: str,
+    window_title: str,
+    selection: List[str],
+    initial_hwnd: Optional[int] = None,
+    before_start=None,
+    paused: bool = False,
+) -> Running:
+    """Build the selected modes for ``instance``, bind them to ``window_title`` and start.
+
+    One mode runs with checkstuck after each cycle; 2+ run round-robin in
+    selection order. ``before_start(ctx)`` runs after binding, before the
+    machine thread starts.
+    """
+    cfg = config.DEFAULT_CONFIG
+    modes = _state_modes()
+    if len(selection) == 1:
+        key = selection[0]
+        fallback_label, builder = modes[key]
+        label = _state_label(key, fallback_label)
+        # Wrap with checkstuck so it runs after each cycle; pass label for pink switch logs
+        state, ctx = build_with_checkstuck_state(cfg, builder, label=label)
+        kind = "single"
+    else:
+        builders = [(_state_label(k, modes[k][0]), modes[k][1]) for k in selection]
+        state, ctx = build_round_robin_state(cfg, builders)
+        kind = "multi"
+    ctx.window_title_substr = window_title
+    ctx.instance_id = instance
+    if initial_hwnd:
+        try:
+            ctx.hwnd = initial_hwnd
+        except Exception:
+            pass
+    if before_start is not None:
+        try:
+            before_start(ctx)
+        except Exception:
+            pass
+    mach = StateMachine(state)
+    mach.start(ctx)
+    start_ts = _time.time()
+    if paused:
+        try:
+            mach.pause(ctx)
+        except Exception:
+            pass
+    running = Running(
+        kind=kind,
+        modes=tuple(selection),
+        machine=mach,
+        ctx=ctx,
+        started_ts=start_ts,
+        last_window_seen_ts=start_ts,
+        instance=instance,
+    )
+    with _running_lock:
+        _running[instance] = running
+    return running
+
+
 def _restart_with_current_selection() -> bool:
-    """Rebuild and restart the running machine using the latest configuration values.
+    """Rebuild and restart every running instance using the latest configuration values.
 
     Returns True if a machine was restarted, False if nothing was running.
     """
-    global _running
-    if not _running:
-        return False
-    # Capture current selection and paused state
-    try:
-        was_paused = bool(_running.machine and _running.ctx and _running.machine.is_paused(_running.ctx))
-    except Exception:
-        was_paused = False
-    selection = list(_running.modes)
-    kind = _running.kind
-    # Stop existing
-    _stop_running()
-    # Recreate with latest configuration
-    cfg = config.DEFAULT_CONFIG
-    try:
-        modes = _state_modes()
-        if len(selection) == 1:
-            key = selection[0]
-            fallback_label, builder = modes[key]
-            label = _state_label(key, fallback_label)
-            state, ctx = build_with_checkstuck_state(cfg, builder, label=label)
-            mach = StateMachine(state)
-            mach.start(ctx)
-            start_ts = _time.time()
-            if was_paused:
-                try:
-                    mach.pause(ctx)
-                except Exception:
-                    pass
-            _running = Running(
-                kind="single",
-                modes=(key,),
-                machine=mach,
-                ctx=ctx,
-                started_ts=start_ts,
-                last_window_seen_ts=start_ts,
-            )
-        else:
-            builders = [(_state_label(k, modes[k][0]), modes[k][1]) for k in selection]
-            state, ctx = build_round_robin_state(cfg, builders)
-            mach = StateMachine(state)
-            mach.start(ctx)
-            start_ts = _time.time()
-            if was_paused:
-                try:
-                    mach.pause(ctx)
-                except Exception:
-                    pass
-            _running = Running(
-                kind="multi",
-                modes=tuple(selection),
-                machine=mach,
-                ctx=ctx,
-                started_ts=start_ts,
-                last_window_seen_ts=start_ts,
-            )
-        return True
-    except Exception:
-        _running = None
+    previous = _all_running()
+    if not previous:
         return False
+    titles = _instance_titles()
+    restarted = False
+    for running in previous:
+        # Capture current selection and paused state
+        try:
+            was_paused = bool(running.machine and running.ctx and running.machine.is_paused(running.ctx))
+        except Exception:
+            was_paused = False
+        selection = list(running.modes)
+        title = titles.get(running.instance) or str(getattr(running.ctx, "window_title_substr", "") or "")
+        hwnd = getattr(running.ctx, "hwnd", None)
+        # Stop existing
+        _stop_running(running.instance)
+        # Recreate with latest configuration
+        try:
+            _start_instance(running.instance, title, selection, initial_hwnd=hwnd, paused=was_paused)
+            restarted = True
+        except Exception:
+            pass
+    return restarted
 
 
 def _settings_with_values() -> List[Dict[str, object]]:
@@ -429,6 +538,36 @@ def api_get_state_machine(key: str):
     return jsonify(data)
 
 
+@app.get("/api/state-machines/<key>/analysis")
+def api_analyze_state_machine(key: str):
+    """Static checks for a saved definition: dangling/unreachable steps, tight loops, per-cycle cost."""
+    try:
+        norm = _normalize_state_key(key)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    try:
+        raw = state_loader.load_definition(norm)
+        report = state_loader.analyze_definition(config.DEFAULT_CONFIG, raw, key=norm)
+    except FileNotFoundError:
+        return jsonify({"error": "Not found"}), 404
+    except Exception as exc:
+        return jsonify({"error": str(exc)}), 400
+    return jsonify(report)
+
+
+@app.post("/api/state-machines/analyze")
+def api_analyze_state_payload():
+    """Same checks for an unsaved definition (editor preview)."""
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "JSON body required"}), 400
+    try:
+        report = state_loader.analyze_definition(config.DEFAULT_CONFIG, payload, key=str(payload.get("key") or "") or None)
+    except Exception as exc:
+        return jsonify({"error": str(exc)}), 400
+    return jsonify(report)
+
+
 @app.post("/api/state-machines")
 def api_create_state_machine():
     payload = request.get_json(silent=True)
@@ -484,6 +623,7 @@ def api_delete_state_machine(key: str):
         path.unlink()
     except Exception as exc:
         return jsonify({"error": str(exc)}), 500
+    state_registry.invalidate_registry()
     return jsonify({"ok": True})
 
 
@@ -508,20 +648,51 @@ def api_modes():
     return jsonify(payload)
 
 
+@app.get("/api/instances")
+def api_instances():
+    """Configured and running instances with their window binding and state."""
+    titles = _instance_titles()
+    running_by_id = {r.instance: r for r in _all_running()}
+    out: List[Dict[str, object]] = []
+    for instance in list(titles) + [i for i in running_by_id if i not in titles]:
+        running = running_by_id.get(instance)
+        item: Dict[str, object] = {
+            "id": instance,
+            "window_title": titles.get(instance, ""),
+            "running": running is not None,
+        }
+        if running is not None:
+            try:
+                paused = bool(running.machine and running.ctx and running.machine.is_paused(running.ctx))
+            except Exception:
+                paused = False
+            item.update({
+                "window_title": getattr(running.ctx, "window_title_substr", "") or item["window_title"],
+                "hwnd": getattr(running.ctx, "hwnd", None),
+                "kind": running.kind,
+                "modes": list(running.modes),
+                "paused": paused,
+            })
+        out.append(item)
+    return jsonify({"instances": out, "default": _default_instance()})
+
+
 @app.get("/api/status")
 def api_status():
-    if not _running:
-        return jsonify({"running": False})
+    instance = _instance_arg()
+    running = _get_running(instance)
+    if not running:
+        return jsonify({"running": False, "instance": instance})
     paused = False
     try:
-        if _running.machine and _running.ctx:
-            paused = bool(_running.machine.is_paused(_running.ctx))
+        if running.machine and running.ctx:
+            paused = bool(running.machine.is_paused(running.ctx))
     except Exception:
         paused = False
     # Report cooldowns (remaining seconds) for active modes
     cooldowns = {}
     try:
-        if _running.ctx and _running.modes:
+        if running.ctx and running.modes:
             now = _time.time()
             # Map UI mode keys to cooldown keys used by states
             alias = {
@@ -532,10 +703,10 @@ def api_status():
                 "farm_gem": "gems",
                 "train": "train",
             }
-            for mode_key in _running.modes:
+            for mode_key in running.modes:
                 cd_key = alias.get(mode_key, mode_key)
                 try:
-                    until = float(getattr(_running.ctx, f"_cooldown_until_{cd_key}", 0.0))
+                    until = float(getattr(running.ctx, f"_cooldown_until_{cd_key}", 0.0))
                 except Exception:
                     until = 0.0
                 remain = max(0, int(until - now))
@@ -545,8 +716,9 @@ def api_status():
         cooldowns = {}
     return jsonify({
         "running": True,
-        "kind": _running.kind,
-        "modes": list(_running.modes),
+        "instance": instance,
+        "kind": running.kind,
+        "modes": list(running.modes),
         "paused": paused,
         "cooldowns": cooldowns,
     })
@@ -574,6 +746,7 @@ def api_settings_post():
     try:
         settings_store.update_settings(updates)
         config.DEFAULT_CONFIG = config.make_config()
+        logs.configure_from(config.DEFAULT_CONFIG)
     except Exception:
         return jsonify({"ok": False, "error": "Failed to save"}), 500
     reloaded = False
@@ -596,22 +769,27 @@ def api_reload():
 
 @app.post("/api/start")
 def api_start():
-    global _running
     data = request.get_json(silent=True) or {}
     selection: List[str] = list(data.get("selection") or [])
     modes = _state_modes()
     selection = [s for s in selection if s in modes]
     if not selection:
         return jsonify({"error": "No valid modes selected"}), 400
-    _stop_running()
+    instance = _instance_arg()
+    if not _STATE_KEY_RE.match(instance):
+        return jsonify({"error": "Instance id may only contain letters, digits, '_' and '-'"}), 400
+    # An ad-hoc instance may name its window in the request
+    target_title = str(data.get("window_title") or "").strip() or _instance_titles().get(instance, "")
+    if not target_title:
+        return jsonify({"error": f"Unknown instance '{instance}' (add it to INSTANCES or pass window_title)"}), 400
+    _stop_running(instance)
     cfg = config.DEFAULT_CONFIG
-    target_title = getattr(cfg, "window_title_substr", "")
     launch_wait_s = float(getattr(cfg, "game_launch_wait_s", 0.0) or 0.0)
     initial_hwnd: Optional[int] = None
 
     def _find_hwnd() -> Optional[int]:
         try:
-            return find_window_by_title_substr(target_title)
+            return locate(target_title, owner=instance)
         except Exception:
             return None
 
@@ -666,12 +844,10 @@ def api_start():
 
     def _save_start_shot(ctx: Context) -> None:
         try:
-            hwnd = ctx.hwnd
+            hwnd = locate(ctx.window_title_substr, hint=ctx.hwnd, owner=ctx.instance_id or None)
             if hwnd is None:
-                hwnd = find_window_by_title_substr(ctx.window_title_substr)
-                if hwnd is None:
-                    return
-                ctx.hwnd = hwnd
+                return
+            ctx.hwnd = hwnd
             try:
                 bring_to_front(hwnd)
             except Exception:
@@ -709,75 +885,47 @@ def api_start():
                 pass
         except Exception:
             return
-    if len(selection) == 1:
-        key = selection[0]
-        fallback_label, builder = modes[key]
-        label = _state_label(key, fallback_label)
-        # Wrap with checkstuck so it runs after each cycle; pass label for pink switch logs
-        state, ctx = build_with_checkstuck_state(cfg, builder, label=label)
-        mach = StateMachine(state)
-        if initial_hwnd:
-            try:
-                ctx.hwnd = initial_hwnd
-            except Exception:
-                pass
+    running = _start_instance(instance, target_title, selection, initial_hwnd=initial_hwnd, before_start=_save_start_shot)
+    others = [r.instance for r in _all_running() if r.instance != instance]
+    if others:
         try:
-            _save_start_shot(ctx)
+            if _inputs.capture_backend() == "screen":
+                logs.add(
+                    f"[Instances] '{instance}' runs alongside {', '.join(others)} with CAPTURE_BACKEND=screen; "
+                    "overlapping game windows will capture each other (use CAPTURE_BACKEND=window)",
+                    level="warn",
+                )
         except Exception:
             pass
-        mach.start(ctx)
-        start_ts = _time.time()
-        _running = Running(
-            kind="single",
-            modes=(key,),
-            machine=mach,
-            ctx=ctx,
-            started_ts=start_ts,
-            last_window_seen_ts=start_ts,
-        )
-        return jsonify({"ok": True, "kind": "single", "modes": selection})
-    # 2+ selections: run round-robin in selection order
-    builders = [(_state_label(k, modes[k][0]), modes[k][1]) for k in selection]
-    state, ctx = build_round_robin_state(cfg, builders)
-    mach = StateMachine(state)
-    if initial_hwnd:
-        try:
-            ctx.hwnd = initial_hwnd
-        except Exception:
-            pass
-    try:
-        _save_start_shot(ctx)
-    except Exception:
-        pass
-    mach.start(ctx)
-    start_ts = _time.time()
-    _running = Running(
-        kind="multi",
-        modes=tuple(selection),
-        machine=mach,
-        ctx=ctx,
-        started_ts=start_ts,
-        last_window_seen_ts=start_ts,
-    )
-    return jsonify({"ok": True, "kind": "multi", "modes": selection})
+    return jsonify({"ok": True, "instance": instance, "kind": running.kind, "modes": selection})
 
 
 @app.post("/api/close-game")
 def api_close_game():
-    """Stop the state machine and request the game window to close."""
-    _stop_running()
-    cfg = config.DEFAULT_CONFIG
-    window_substr = str(getattr(cfg, "window_title_substr", "") or "").strip()
+    """Stop an instance's state machine and request its game window to close."""
+    instance = _instance_arg()
+    running = _get_running(instance)
+    hint = getattr(running.ctx, "hwnd", None) if running and running.ctx else None
+    window_substr = ""
+    if running and running.ctx:
+        window_substr = str(getattr(running.ctx, "window_title_substr", "") or "").strip()
+    window_substr = window_substr or _instance_titles().get(instance, "").strip()
+    _stop_running(instance)
     if not window_substr:
         return jsonify({"ok": False, "error": "WINDOW_TITLE_SUBSTR is not configured"}), 400
     try:
-        logs.add("[Web] Close game requested", level='info')
+        logs.add(f"[Web] Close game requested ({instance})", level='info')
     except Exception:
         pass
     try:
-        hwnd = find_window_by_title_substr(window_substr)
+        hwnd = locate(window_substr, hint=hint, owner=instance)
     except Exception:
         hwnd = None
+    finally:
+        try:
+            get_locator().release(instance)
+        except Exception:
+            pass
     if not hwnd:
         try:
             logs.add("[Web] Close game skipped (window not found)", level='info')
@@ -801,16 +949,17 @@ def api_close_game():
 
 @app.post("/api/stop")
 def api_stop():
-    _stop_running()
+    _stop_running(_instance_arg())
     return jsonify({"ok": True})
 
 
 @app.post("/api/pause")
 def api_pause():
-    if not _running or not _running.machine or not _running.ctx:
+    running = _get_running(_instance_arg())
+    if not running or not running.machine or not running.ctx:
         return jsonify({"error": "Not running"}), 400
     try:
-        _running.machine.pause(_running.ctx)
+        running.machine.pause(running.ctx)
     except Exception:
         return jsonify({"error": "Failed to pause"}), 500
     return jsonify({"ok": True})
@@ -818,10 +967,11 @@ def api_pause():
 
 @app.post("/api/resume")
 def api_resume():
-    if not _running or not _running.machine or not _running.ctx:
+    running = _get_running(_instance_arg())
+    if not running or not running.machine or not running.ctx:
         return jsonify({"error": "Not running"}), 400
     try:
-        _running.machine.resume(_running.ctx)
+        running.machine.resume(running.ctx)
     except Exception:
         return jsonify({"error": "Failed to resume"}), 500
     return jsonify({"ok": True})
@@ -834,15 +984,81 @@ def api_logs():
         since = int(since_raw) if since_raw is not None else 0
     except Exception:
         since = 0
-    entries = logs.get_since(since)
-    return jsonify({"logs": entries})
+    # ?instance= limits the stream to one instance (plus process-wide entries)
+    instance = str(request.args.get("instance") or "").strip() or None
+    body = '{"logs":' + logs.get_since_json(since, instance) + "}"
+    return app.response_class(body, mimetype="application/json")
+
+
+def _parse_time_arg(raw: Optional[str]) -> Optional[float]:
+    """Epoch seconds or an ISO timestamp (local time when naive)."""
+    if raw is None or not str(raw).strip():
+        return None
+    raw = str(raw).strip()
+    try:
+        return float(raw)
+    except ValueError:
+        pass
+    return datetime.fromisoformat(raw).timestamp()
+
+
+@app.get("/api/logs/search")
+def api_logs_search():
+    """Search the on-disk log archive (current and rotated files).
+
+    Query params: from/to (epoch seconds or ISO time), level (comma list),
+    category, q (substring), limit (default 500, max 5000).
+    """
+    try:
+        since_ts = _parse_time_arg(request.args.get("from"))
+        until_ts = _parse_time_arg(request.args.get("to"))
+    except Exception:
+        return jsonify({"error": "from/to must be epoch seconds or ISO timestamps"}), 400
+    try:
+        limit = min(5000, max(1, int(request.args.get("limit", 500))))
+    except Exception:
+        return jsonify({"error": "limit must be an integer"}), 400
+    level_raw = str(request.args.get("level") or "").strip()
+    levels = [lv for lv in level_raw.split(",") if lv.strip()] or None
+    category = str(request.args.get("category") or "").strip() or None
+    text = request.args.get("q") or None
+    logs.flush()
+    result = logs.search(since_ts, until_ts, levels=levels, category=category, text=text, limit=limit)
+    return jsonify(result)
+
+
+def _step_stats(machine: Optional[StateMachine]) -> Dict[str, List[Dict[str, object]]]:
+    """Per-step runs/successes/time of every graph in ``machine``, keyed by machine key."""
+    out: Dict[str, List[Dict[str, object]]] = {}
+    stack: List[object] = [getattr(machine, "_state", None)]
+    seen = set()
+    while stack:
+        st = stack.pop()
+        if st is None or id(st) in seen:
+            continue
+        seen.add(id(st))
+        if isinstance(st, GraphState):
+            key = getattr(st, "_machine_key", None) or st.name
+            # Each orchestrator slot gets its own checkstuck graph; keep them apart
+            name, n = str(key), 2
+            while name in out:
+                name, n = f"{key}#{n}", n + 1
+            out[name] = st.step_stats()
+            continue
+        # Orchestrators (bot.states.alternate) hold their children in these
+        for attr in ("_first", "_second", "_primary", "_check"):
+            stack.append(getattr(st, attr, None))
+        stack.extend(getattr(st, "_states", None) or ())
+    return out
 
 
 @app.get("/api/metrics")
 def api_metrics():
-    if not _running or not _running.ctx:
-        return jsonify({"running": False})
-    ctx = _running.ctx
+    instance = _instance_arg()
+    running = _get_running(instance)
+    if not running or not running.ctx:
+        return jsonify({"running": False, "instance": instance})
+    ctx = running.ctx
     now = _time.time()
     try:
         since = max(0.0, now - float(getattr(ctx, "last_progress_ts", 0.0)))
@@ -867,17 +1083,25 @@ def api_metrics():
         w_left, w_top, w_width, w_height = int(wr[0]), int(wr[1]), int(wr[2]), int(wr[3])
     except Exception:
         w_left = w_top = w_width = w_height = 0
-    # Global counters snapshot
+    # Counters and their rates are process-wide (all instances together)
     try:
         counters = _counters.get_all()
     except Exception:
         counters = {}
+    rates: Dict[str, float] = {}
+    for key in ("troops_trained", "nodes_farmed", "alliance_helps"):
+        try:
+            rates[key] = round(_counters.rate_per_hour(key, 3600.0), 2)
+        except Exception:
+            rates[key] = 0.0
     active_machine = getattr(ctx, "active_machine_key", "") or getattr(ctx, "machine_key", "")
     data = {
         "running": True,
-        "kind": _running.kind,
-        "modes": list(_running.modes),
-        "thread_alive": bool(_running.machine and _running.machine._thread and _running.machine._thread.is_alive()),
+        "instance": instance,
+        "instances_running": len(_all_running()),
+        "kind": running.kind,
+        "modes": list(running.modes),
+        "thread_alive": bool(running.machine and running.machine._thread and running.machine._thread.is_alive()),
         "metrics": {
             "current_state": getattr(ctx, "current_state_name", ""),
             "current_step": getattr(ctx, "current_graph_step", ""),
@@ -892,14 +1116,21 @@ def api_metrics():
                 "nodes_farmed": int(counters.get("nodes_farmed", 0)),
                 "alliance_helps": int(counters.get("alliance_helps", 0)),
             },
+            "rates_per_hour": rates,
             "rss_mb": rss_mb,
             "private_mb": priv_mb,
             "pagefile_mb": page_mb,
             "handles": handles,
             "gdi_objects": gdi,
             "user_objects": user,
+            "ocr": _ocr.status(),
+            "window_locator": get_locator().stats(),
+            "input": _inputs.stats(),
+            "steps": _step_stats(running.machine),
             "capture_ok": bool(getattr(ctx, '_mss', None) is not None),
             "capture_grabs": int(getattr(ctx, '_mss_grab_count', 0)),
+            "captures_taken": int(getattr(ctx, "captures_taken", 0)),
+            "captures_reused": int(getattr(ctx, "captures_skipped", 0)),
             "window": {
                 "left": w_left,
                 "top": w_top,
@@ -912,6 +1143,68 @@ def api_metrics():
     return jsonify(data)
 
 
+@app.get("/api/latency")
+def api_latency():
+    """Learned UI response latencies per machine/step/wait, with the wait each implies."""
+    cfg = config.DEFAULT_CONFIG
+    q = float(getattr(cfg, "adaptive_wait_percentile", 0.95))
+    return jsonify({
+        "enabled": bool(getattr(cfg, "adaptive_waits", True)),
+        "percentile": q,
+        "min_samples": _latency.MIN_SAMPLES,
+        "items": _latency.snapshot(q),
+    })
+
+
+@app.delete("/api/latency")
+def api_latency_reset():
+    key = str(request.args.get("key") or "").strip() or None
+    _latency.reset(key)
+    return jsonify({"ok": True})
+
+
+@app.get("/api/counters/history")
+def api_counters_history():
+    """Time-bucketed counter history plus the average hourly rate over the window.
+
+    Query params: key (required), hours (default 24), machine, resolution
+    (minute/hour/day; picked from the window when omitted).
+    """
+    key = str(request.args.get("key") or "").strip()
+    if not key:
+        return jsonify({"error": "key is required"}), 400
+    try:
+        hours = float(request.args.get("hours", 24))
+    except Exception:
+        return jsonify({"error": "hours must be a number"}), 400
+    if hours <= 0:
+        return jsonify({"error": "hours must be positive"}), 400
+    machine = str(request.args.get("machine") or "").strip() or None
+    window_s = hours * 3600.0
+    resolution = str(request.args.get("resolution") or "").strip().lower()
+    if not resolution:
+        resolution = "minute" if hours <= 2 else ("hour" if hours <= 24 * 30 else "day")
+    spans = {"minute": 60.0, "hour": 3600.0, "day": 86400.0}
+    if resolution not in spans:
+        return jsonify({"error": f"Unknown resolution '{resolution}'"}), 400
+    count = max(1, int(-(-window_s // spans[resolution])))
+    now = _time.time()
+    try:
+        buckets = _counters.history(key, resolution=resolution, count=count, machine=machine, now=now)
+        total = _counters.total_since(key, window_s, machine=machine, now=now)
+    except Exception as exc:
+        return jsonify({"error": str(exc)}), 400
+    return jsonify({
+        "key": key,
+        "machine": machine,
+        "hours": hours,
+        "resolution": resolution,
+        "total": total,
+        "per_hour": total * 3600.0 / window_s,
+        "buckets": [[ts, n] for ts, n in buckets],
+    })
+
+
 @app.get("/shots/latest")
 def shots_latest():
     """Return the most recent annotated match screenshot as an image response.
@@ -993,6 +1286,17 @@ def api_quit():
             _time.sleep(0.2)
         except Exception:
             pass
+        # os._exit skips atexit hooks, so drain the log writer explicitly
+        try:
+            logs.flush()
+            _latency.flush()
+        except Exception:
+            pass
+        # ...and stop OCR worker processes, which would otherwise outlive us
+        try:
+            _ocr.shutdown()
+        except Exception:
+            pass
         try:
             os._exit(0)
         except Exception:
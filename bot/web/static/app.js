@@ -8,6 +8,50 @@ const LS_SELECTED_KEY = 'modes.selected.v1';
 const LS_COUNTERS_KEY = 'counters.v1';
 const LS_SESSION_KEY = 'counters.session.v1';
 const LS_VIEW_MODE_KEY = 'dashboard.viewMode.v1';
+const LS_INSTANCE_KEY = 'instance.selected.v1';
+
+// Instance (game window) the controls and status apply to; '' = server default
+let currentInstance = '';
+try { currentInstance = localStorage.getItem(LS_INSTANCE_KEY) || ''; } catch (e) { currentInstance = ''; }
+
+function instanceQS() {
+  return currentInstance ? `?instance=${encodeURIComponent(currentInstance)}` : '';
+}
+
+async function loadInstances() {
+  try {
+    const res = await fetch('/api/instances');
+    if (!res.ok) return;
+    const data = await res.json();
+    const items = Array.isArray(data.instances) ? data.instances : [];
+    const ids = items.map((it) => it.id);
+    if (!currentInstance || !ids.includes(currentInstance)) {
+      currentInstance = data.default || ids[0] || '';
+    }
+    const bar = document.getElementById('instance-bar');
+    const sel = document.getElementById('instance-select');
+    if (!bar || !sel) return;
+    bar.style.display = items.length > 1 ? '' : 'none';
+    sel.innerHTML = '';
+    for (const it of items) {
+      const opt = document.createElement('option');
+      opt.value = it.id;
+      const state = it.running ? (it.paused ? ' (paused)' : ' (running)') : '';
+      opt.textContent = `${it.id} - ${it.window_title || 'n/a'}${state}`;
+      sel.appendChild(opt);
+    }
+    sel.value = currentInstance;
+  } catch (e) {
+    // ignore
+  }
+}
+
+async function onInstanceChange(ev) {
+  currentInstance = (ev && ev.target && ev.target.value) || '';
+  try { localStorage.setItem(LS_INSTANCE_KEY, currentInstance); } catch (e) { /* ignore */ }
+  await status();
+  await metrics();
+}
 
 function saveSelectionLS(arr) {
   try {
@@ -232,7 +276,7 @@ function onSelectionChange() {
 
 async function status() {
   try {
-    const res = await fetch('/api/status');
+    const res = await fetch('/api/status' + instanceQS());
     const data = await res.json();
     try {
       document.dispatchEvent(new CustomEvent('bot-status', { detail: data }));
@@ -300,7 +344,9 @@ function renderLogs(items) {
     const hh = String(t.getHours()).padStart(2,'0');
     const mm = String(t.getMinutes()).padStart(2,'0');
     const ss = String(t.getSeconds()).padStart(2,'0');
-    div.textContent = `[${hh}:${mm}:${ss}] ${it.text}`;
+    // Entries from an instance's threads carry its id (multi-instance runs)
+    const who = it.instance ? `[${it.instance}] ` : '';
+    div.textContent = `[${hh}:${mm}:${ss}] ${who}${it.text}`;
     frag.appendChild(div);
     if (it.id && it.id > lastLogId) lastLogId = it.id;
   }
@@ -331,7 +377,7 @@ async function start() {
   try {
     if (running) {
       // Toggle to stop
-      await fetch('/api/stop', { method: 'POST' });
+      await fetch('/api/stop' + instanceQS(), { method: 'POST' });
     } else {
       // Capture a session baseline before starting
       try {
@@ -347,7 +393,7 @@ async function start() {
       // Start with current selection
       const res = await fetch('/api/start', {
         method: 'POST', headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ selection })
+        body: JSON.stringify({ selection, instance: currentInstance || undefined })
       });
       if (!res.ok) { alert('Failed to start'); }
     }
@@ -365,7 +411,7 @@ async function togglePause() {
   if (!running) return;
   try {
     const url = paused ? '/api/resume' : '/api/pause';
-    const res = await fetch(url, { method: 'POST' });
+    const res = await fetch(url + instanceQS(), { method: 'POST' });
     if (!res.ok) {
       alert(paused ? 'Failed to resume' : 'Failed to pause');
     }
@@ -388,6 +434,10 @@ window.addEventListener('DOMContentLoaded', () => {
   if (settingsBtn) settingsBtn.addEventListener('click', toggleSettings);
   const saveBtn = document.getElementById('save-settings');
   if (saveBtn) saveBtn.addEventListener('click', saveSettings);
+  const instanceSel = document.getElementById('instance-select');
+  if (instanceSel) instanceSel.addEventListener('change', onInstanceChange);
+  loadInstances();
+  setInterval(loadInstances, 5000);
   initModeInteractions();
   initViewToggle();
   applySavedSelection();
@@ -412,7 +462,7 @@ async function metrics() {
   if (metricsInflight) return;
   metricsInflight = true;
   try {
-    const res = await fetch('/api/metrics');
+    const res = await fetch('/api/metrics' + instanceQS());
     if (!res.ok) return;
     const data = await res.json();
     try {
@@ -476,7 +526,7 @@ async function stopAndCloseGame() {
   const btn = document.getElementById('stop-close');
   if (btn) btn.disabled = true;
   try {
-    const res = await fetch('/api/close-game', { method: 'POST' });
+    const res = await fetch('/api/close-game' + instanceQS(), { method: 'POST' });
     let body = null;
     try { body = await res.json(); } catch (err) { body = null; }
     if (!res.ok) {
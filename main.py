@@ -1,9 +1,15 @@
-from bot.web.run import run_app
-from bot.core.window import enable_dpi_awareness
+import multiprocessing
 
 
 if __name__ == "__main__":
+    # OCR worker processes are spawned; needed for bundled (PyInstaller) runs
+    multiprocessing.freeze_support()
+    # Spawned OCR workers re-import this module as __mp_main__; importing the
+    # bot only here keeps them from loading the web app (log writer, window
+    # monitor, counters journal replay)
+    from bot.web.run import run_app
+    from bot.core.window import enable_dpi_awareness
+
     # Ensure DPI awareness so captured pixels map to screen coordinates
     enable_dpi_awareness()
     run_app()
-
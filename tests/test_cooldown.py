@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+from bot.actions.cooldown import CooldownGate, SetCooldownFromText
+from bot.core.state_machine import Context
+
+
+class _StubRead:
+    """Stands in for the ReadText: stores ``seconds`` like a real read (None = no timer)."""
+
+    def __init__(self, name, seconds):
+        self.name = name
+        self.seconds = seconds
+
+    def run(self, ctx):
+        if self.seconds is not None:
+            ctx.ocr_reads[self.name] = {"text": "", "int": None, "seconds": self.seconds, "ts": time.time()}
+        return None
+
+
+def _action(seconds, **kwargs):
+    action = SetCooldownFromText(name="timer", key="march", region_pct=(0.0, 0.0, 1.0, 1.0), **kwargs)
+    action._read = _StubRead("timer", seconds)
+    return action
+
+
+def _remaining(ctx, key="march"):
+    return getattr(ctx, f"_cooldown_until_{key}") - time.time()
+
+
+def test_defaults_to_easyocr():
+    assert SetCooldownFromText.__dataclass_fields__["engine"].default == "easyocr"
+
+
+def test_timer_plus_margin():
+    ctx = Context(window_title_substr="test")
+    assert _action(120, margin_s=5.0).run(ctx) is True
+    assert _remaining(ctx) == pytest.approx(125.0, abs=1.0)
+    # The gate now holds the mode
+    assert CooldownGate(name="gate", key="march").run(ctx) is False
+
+
+@pytest.mark.parametrize(
+    "seconds, expected",
+    [(10, 60.0), (4000, 3600.0), (600, 605.0)],
+)
+def test_timer_is_clamped(seconds, expected):
+    ctx = Context(window_title_substr="test")
+    assert _action(seconds, min_seconds=60.0, max_seconds=3600.0).run(ctx) is True
+    assert _remaining(ctx) == pytest.approx(expected, abs=1.0)
+
+
+def test_fallback_range_when_no_timer_read():
+    ctx = Context(window_title_substr="test")
+    assert _action(None, fallback_min_seconds=300.0, fallback_max_seconds=200.0).run(ctx) is False
+    assert 199.0 <= _remaining(ctx) <= 300.0
+
+
+def test_stale_read_does_not_count():
+    ctx = Context(window_title_substr="test")
+    ctx.ocr_reads["timer"] = {"seconds": 50, "ts": time.time() - 60}
+    assert _action(None).run(ctx) is False
+    # No fallback configured: the cooldown is left alone
+    assert not hasattr(ctx, "_cooldown_until_march")
@@ -0,0 +1,121 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _run(code: str, cwd: Path) -> str:
+    # counters resolves its files against the working directory at import
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    out = subprocess.run(
+        [sys.executable, "-c", textwrap.dedent(code)],
+        cwd=str(cwd),
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert out.returncode == 0, out.stderr
+    return out.stdout.strip()
+
+
+def test_replay_skips_records_the_snapshot_covers(tmp_path):
+    (tmp_path / "bot.counters.json").write_text(json.dumps({"nodes_farmed": 5, "_journal_seq": 2}))
+    (tmp_path / "bot.counters.json.journal").write_text(
+        "\n".join(json.dumps({"k": "nodes_farmed", "by": 1, "t": 1.0, "s": s}) for s in (1, 2, 3)) + "\n"
+    )
+    out = _run(
+        """
+        from bot.core import counters
+        print(counters.get_all()["nodes_farmed"])
+        """,
+        tmp_path,
+    )
+    assert out == "6"
+    saved = json.loads((tmp_path / "bot.counters.json").read_text())
+    assert saved["nodes_farmed"] == 6 and saved["_journal_seq"] == 3
+    assert not (tmp_path / "bot.counters.json.journal").exists()
+
+
+def test_flush_writes_outside_the_lock(tmp_path):
+    out = _run(
+        """
+        import threading
+        from bot.core import counters
+
+        entered, release = threading.Event(), threading.Event()
+        real_write = counters._write_json_atomic
+
+        def slow_write(path, payload):
+            if path == counters._path:
+                entered.set()
+                release.wait(10)
+            real_write(path, payload)
+
+        counters._write_json_atomic = slow_write
+        counters.inc("nodes_farmed")
+        flusher = threading.Thread(target=counters.flush)
+        flusher.start()
+        assert entered.wait(10)
+        # The snapshot write is blocked; increments must not wait for it
+        done = threading.Event()
+        threading.Thread(target=lambda: (counters.inc("nodes_farmed"), done.set())).start()
+        print(done.wait(5))
+        release.set()
+        flusher.join()
+        # The second increment is not in that snapshot, so its journal survives
+        print(counters._journal_path.exists())
+        counters.flush()
+        print(counters._journal_path.exists())
+        """,
+        tmp_path,
+    )
+    assert out.splitlines() == ["True", "True", "False"]
+    # A restart sees both increments exactly once
+    assert _run("from bot.core import counters; print(counters.get_all()['nodes_farmed'])", tmp_path) == "2"
+
+
+def test_reset_clears_history(tmp_path):
+    out = _run(
+        """
+        from bot.core import counters
+        counters.inc("nodes_farmed", 3, machine="farm_wood")
+        counters.inc("troops_trained", 2)
+        counters.reset(["nodes_farmed"])
+        print(counters.total_since("nodes_farmed", 3600), counters.total_since("nodes_farmed", 3600, machine="farm_wood"))
+        print(counters.total_since("troops_trained", 3600))
+        counters.reset()
+        print(counters.total_since("troops_trained", 3600))
+        """,
+        tmp_path,
+    )
+    assert out.splitlines() == ["0 0", "2", "0"]
+    # The cleared history is what persists
+    out = _run(
+        "from bot.core import counters; print(counters.total_since('troops_trained', 3600), counters.get_all()['troops_trained'])",
+        tmp_path,
+    )
+    assert out == "0 0"
+
+
+def test_journaled_reset_clears_history_on_replay(tmp_path):
+    out = _run(
+        """
+        import os
+        from bot.core import counters
+        counters.inc("nodes_farmed", 4)
+        counters.reset(["nodes_farmed"], persist=False)
+        # Simulate a crash: skip the exit flush
+        os._exit(0)
+        """,
+        tmp_path,
+    )
+    out = _run(
+        "from bot.core import counters; print(counters.total_since('nodes_farmed', 3600), counters.get_all()['nodes_farmed'])",
+        tmp_path,
+    )
+    assert out == "0 0"
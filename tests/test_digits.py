@@ -0,0 +1,118 @@
+import cv2
+import numpy as np
+import pytest
+
+from bot.core import digits
+
+
+@pytest.mark.parametrize(
+    "text, seconds",
+    [
+        ("01:02:03", 3723),
+        ("02:03", 123),
+        ("1d 02:03:04", 93784),
+        ("1h 5m", 3900),
+        ("1H 5M", 3900),
+        ("2d 3h", 183600),
+        ("45s", 45),
+        ("3m", 180),
+        ("Returns in 12:30", 750),
+    ],
+)
+def test_parse_duration_reads_timers(text, seconds):
+    assert digits.parse_duration(text) == seconds
+
+
+@pytest.mark.parametrize("text", ["3M", "1.5M", "1.5m", "12,345", "5m 3m", "3 months", ""])
+def test_parse_duration_rejects_amounts_and_words(text):
+    assert digits.parse_duration(text) is None
+
+
+def test_amount_with_million_suffix_stays_an_amount():
+    assert digits.parse_int("3M") == 3_000_000
+    assert digits.parse_duration("3M") is None
+
+
+_SCALE = 4
+# 5x7 pixel glyphs; the atlas is cut from the same "font" the HUD is drawn in
+_FONT = {
+    "0": [".###.", "#...#", "#..##", "#.#.#", "##..#", "#...#", ".###."],
+    "1": ["..#..", ".##..", "..#..", "..#..", "..#..", "..#..", ".###."],
+    "2": [".###.", "#...#", "....#", "...#.", "..#..", ".#...", "#####"],
+    "5": ["#####", "#....", "####.", "....#", "....#", "#...#", ".###."],
+    ":": [".", ".", "#", ".", "#", ".", "."],
+    # Not in the atlas
+    "x": ["#...#", "#...#", ".#.#.", "..#..", ".#.#.", "#...#", "#...#"],
+}
+_NAMES = {":": "colon"}
+
+
+def _bitmap(char):
+    rows = np.array([[1 if c == "#" else 0 for c in row] for row in _FONT[char]], dtype=np.uint8)
+    return np.kron(rows, np.ones((_SCALE, _SCALE), dtype=np.uint8))
+
+
+def _write_atlas(folder, chars="0125:"):
+    folder.mkdir(parents=True)
+    for char in chars:
+        img = np.pad(_bitmap(char), 3) * 255
+        cv2.imwrite(str(folder / f"{_NAMES.get(char, char)}.png"), img)
+
+
+def _render(text, gap=_SCALE, fg=255, bg=0):
+    """BGR image of ``text`` drawn glyph by glyph, ``gap`` px apart (" " = wide gap)."""
+    height = 7 * _SCALE
+    parts = [np.zeros((height, 6), np.uint8)]
+    for char in text:
+        if char == " ":
+            parts.append(np.zeros((height, 5 * _SCALE), np.uint8))
+            continue
+        parts.append(_bitmap(char))
+        parts.append(np.zeros((height, gap), np.uint8))
+    parts.append(np.zeros((height, 6), np.uint8))
+    mask = np.pad(np.hstack(parts), ((5, 5), (0, 0)))
+    img = np.where(mask > 0, fg, bg).astype(np.uint8)
+    return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+
+
+def test_binarize_marks_text_as_one_on_either_background():
+    light = digits.binarize(_render("12", fg=20, bg=230))
+    dark = digits.binarize(_render("12", fg=230, bg=20))
+    assert light.max() == 1 and np.array_equal(light, dark)
+    # Text is the minority class
+    assert light.mean() < 0.5
+
+
+def test_reads_a_timer_from_the_atlas(tmp_path):
+    _write_atlas(tmp_path / "digits")
+    glyphs = digits.load_atlas(tmp_path / "digits")
+    assert sorted(g.char for g in glyphs) == sorted("0125:")
+    text, worst = digits.read(_render("12:05"), glyphs)
+    assert text == "12:05"
+    assert worst > 0.9
+    assert digits.parse_duration(text) == 725
+
+
+def test_wide_gap_reads_as_space(tmp_path):
+    _write_atlas(tmp_path / "digits")
+    text, _worst = digits.read(_render("12 50"), digits.load_atlas(tmp_path / "digits"))
+    assert text == "12 50"
+
+
+def test_unknown_glyph_reads_as_question_mark(tmp_path):
+    _write_atlas(tmp_path / "digits")
+    glyphs = digits.load_atlas(tmp_path / "digits")
+    text, worst = digits.read(_render("1x2"), glyphs, min_score=0.8)
+    assert text == "1?2"
+    assert worst < 0.8
+    # A lower threshold accepts the closest atlas glyph instead
+    loose, _ = digits.read(_render("1x2"), glyphs, min_score=0.0)
+    assert "?" not in loose and len(loose) == 3
+
+
+def test_atlas_reloads_when_files_change(tmp_path):
+    folder = tmp_path / "digits"
+    _write_atlas(folder, chars="12")
+    assert digits.read(_render("5"), digits.load_atlas(folder), min_score=0.9)[0] == "?"
+    cv2.imwrite(str(folder / "5.png"), np.pad(_bitmap("5"), 3) * 255)
+    assert digits.read(_render("5"), digits.load_atlas(folder), min_score=0.9)[0] == "5"
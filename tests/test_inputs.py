@@ -0,0 +1,159 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from bot.core.inputs import InputArbiter
+
+
+def _ctx(instance="main"):
+    return SimpleNamespace(instance_id=instance, stop_event=threading.Event())
+
+
+def _submit_async(arbiter, run, ctx):
+    """Submit from a new thread; returns (thread, result holder)."""
+    out = {}
+
+    def caller():
+        try:
+            out["ok"] = arbiter.submit(run, ctx)
+        except BaseException as exc:
+            out["error"] = exc
+
+    t = threading.Thread(target=caller)
+    t.start()
+    return t, out
+
+
+def _wait_queued(arbiter, n, timeout=5.0):
+    end = time.time() + timeout
+    while arbiter._queue.qsize() < n and time.time() < end:
+        time.sleep(0.005)
+    assert arbiter._queue.qsize() >= n
+
+
+def test_requests_run_one_at_a_time_in_order():
+    arbiter = InputArbiter()
+    release = threading.Event()
+    started = threading.Event()
+    order, active, overlap = [], [0], []
+    lock = threading.Lock()
+
+    def job(name, block=False):
+        def run():
+            with lock:
+                active[0] += 1
+                overlap.append(active[0])
+            if block:
+                started.set()
+                release.wait(5)
+            order.append(name)
+            with lock:
+                active[0] -= 1
+        return run
+
+    first, _ = _submit_async(arbiter, job("a", block=True), _ctx("main"))
+    assert started.wait(5)
+    later = []
+    for name, inst in (("b", "alt"), ("c", "main"), ("d", "alt")):
+        later.append(_submit_async(arbiter, job(name), _ctx(inst)))
+        _wait_queued(arbiter, len(later))
+    release.set()
+    for t, out in [(first, None)] + later:
+        t.join(5)
+        if out is not None:
+            assert out["ok"] is True
+    assert order == ["a", "b", "c", "d"]
+    assert max(overlap) == 1
+
+
+def test_unstarted_request_is_dropped_on_stop():
+    arbiter = InputArbiter()
+    release, started = threading.Event(), threading.Event()
+    ran = []
+
+    def busy():
+        started.set()
+        release.wait(5)
+
+    blocker, _ = _submit_async(arbiter, busy, _ctx())
+    assert started.wait(5)
+    ctx = _ctx("alt")
+    waiter, out = _submit_async(arbiter, lambda: ran.append("dropped"), ctx)
+    _wait_queued(arbiter, 1)
+    ctx.stop_event.set()
+    waiter.join(5)
+    assert out["ok"] is False
+    release.set()
+    blocker.join(5)
+    # The input thread skips it once it reaches it
+    follow, follow_out = _submit_async(arbiter, lambda: ran.append("next"), _ctx())
+    follow.join(5)
+    assert follow_out["ok"] is True
+    assert ran == ["next"]
+    assert arbiter.stats()["cancelled"] == 1
+
+
+def test_started_request_runs_to_completion_after_stop():
+    arbiter = InputArbiter()
+    started, release = threading.Event(), threading.Event()
+    finished = []
+    ctx = _ctx()
+
+    def drag():
+        started.set()
+        release.wait(5)
+        finished.append(True)
+
+    t, out = _submit_async(arbiter, drag, ctx)
+    assert started.wait(5)
+    ctx.stop_event.set()
+    time.sleep(0.15)  # a few of the caller's stop polls
+    assert "ok" not in out  # still waiting for the drag
+    release.set()
+    t.join(5)
+    assert finished == [True]
+    assert out["ok"] is True
+    assert arbiter.stats()["cancelled"] == 0
+
+
+def test_exception_is_raised_in_the_caller():
+    arbiter = InputArbiter()
+
+    def boom():
+        raise RuntimeError("input failed")
+
+    with pytest.raises(RuntimeError, match="input failed"):
+        arbiter.submit(boom, _ctx())
+    # The input thread survives for later requests
+    assert arbiter.submit(lambda: None, _ctx()) is True
+    stats = arbiter.stats()
+    assert stats["failed"] == 1 and stats["executed"] == 2
+
+
+def test_stats_report_waits_per_instance():
+    arbiter = InputArbiter()
+    started, release = threading.Event(), threading.Event()
+
+    def busy():
+        started.set()
+        release.wait(5)
+
+    blocker, _ = _submit_async(arbiter, busy, _ctx("main"))
+    assert started.wait(5)
+    waiter, _ = _submit_async(arbiter, lambda: None, _ctx("alt"))
+    _wait_queued(arbiter, 1)
+    time.sleep(0.2)
+    release.set()
+    blocker.join(5)
+    waiter.join(5)
+
+    stats = arbiter.stats()
+    assert stats["executed"] == 2 and stats["queued"] == 0
+    assert set(stats["by_instance"]) == {"main", "alt"}
+    assert stats["by_instance"]["alt"]["count"] == 1
+    assert stats["by_instance"]["alt"]["avg_wait_ms"] >= 150
+    # Two samples: p95 (nearest rank) and max are the longer wait
+    assert stats["wait_ms"]["p95"] == stats["wait_ms"]["max"] >= 150
+    assert stats["wait_ms"]["avg"] < stats["wait_ms"]["max"]
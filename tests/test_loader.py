@@ -0,0 +1,37 @@
+import bot.config as config
+from bot.state_machines import loader
+
+
+def _graph(steps, start):
+    return {"type": "graph", "start": start, "steps": steps}
+
+
+def test_gated_self_loop_is_not_a_tight_loop():
+    report = loader.analyze_graph(
+        config.DEFAULT_CONFIG,
+        _graph(
+            [
+                {"name": "Gate", "actions": [{"type": "CooldownGate", "name": "gate", "key": "farm"}],
+                 "on_success": "Work", "on_failure": "Gate"},
+                {"name": "Work", "actions": [{"type": "Wait", "name": "w", "seconds": 1}],
+                 "on_success": "Gate", "on_failure": "Gate"},
+            ],
+            "Gate",
+        ),
+    )
+    assert report["tight_loops"] == []
+    assert report["warnings"] == []
+
+
+def test_unpaced_self_loop_still_warns():
+    report = loader.analyze_graph(
+        config.DEFAULT_CONFIG,
+        _graph([{"name": "Spin", "actions": [{"type": "ClickPercent", "name": "c", "x_pct": 0.5, "y_pct": 0.5}]}], "Spin"),
+    )
+    assert report["tight_loops"] == [["Spin"]]
+
+
+def test_shipped_definitions_have_no_tight_loops():
+    for key in loader.list_definitions():
+        report = loader.analyze_definition(config.DEFAULT_CONFIG, loader.load_definition(key), key)
+        assert not report.get("tight_loops"), key
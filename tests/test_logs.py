@@ -0,0 +1,45 @@
+import json
+import threading
+
+from bot.core import logs
+
+
+def _log_from(instance, text):
+    def run():
+        logs.set_instance(instance)
+        logs.add(text)
+
+    t = threading.Thread(target=run)
+    t.start()
+    t.join()
+
+
+def test_entries_carry_the_instance_of_their_thread():
+    _log_from("main", "[TestInstance] one")
+    _log_from("alt", "[TestInstance] two")
+    logs.add("[TestInstance] shared")
+
+    every = [e for e in logs.get_since(0) if e["text"].startswith("[TestInstance]")]
+    assert [(e.get("instance"), e["text"]) for e in every][-3:] == [
+        ("main", "[TestInstance] one"),
+        ("alt", "[TestInstance] two"),
+        (None, "[TestInstance] shared"),
+    ]
+
+    alt = [e for e in json.loads(logs.get_since_json(0, "alt")) if e["text"].startswith("[TestInstance]")]
+    assert [e["text"] for e in alt][-2:] == ["[TestInstance] two", "[TestInstance] shared"]
+    assert all(e.get("instance") in (None, "alt") for e in alt)
+
+
+def test_rate_limits_never_drop_errors():
+    logs.configure(rate_limits={"TestBurst": 1.0})
+    try:
+        for i in range(5):
+            logs.event("TestBurst", "err {i}", level="err", i=i)
+            logs.event("TestBurst", "info {i}", i=i)
+        texts = [e["text"] for e in logs.get_since(0) if e.get("category") == "TestBurst"]
+    finally:
+        logs.configure()
+    assert [t for t in texts if "err" in t] == [f"[TestBurst] err {i}" for i in range(5)]
+    # Info entries share the one-per-second bucket; errors took no tokens from it
+    assert [t for t in texts if "info" in t] == ["[TestBurst] info 0"]
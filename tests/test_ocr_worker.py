@@ -0,0 +1,114 @@
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _run(code: str) -> str:
+    out = subprocess.run(
+        [sys.executable, "-c", textwrap.dedent(code)],
+        cwd=str(ROOT),
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert out.returncode == 0, out.stderr
+    return out.stdout.strip()
+
+
+def test_spawned_main_reimport_does_not_load_web_app():
+    # A spawned child runs the parent's main script as __mp_main__
+    loaded = _run(
+        """
+        import runpy, sys
+        runpy.run_path("main.py", run_name="__mp_main__")
+        print(sorted(m for m in sys.modules if m == "bot.web" or m.startswith("bot.web.")))
+        """
+    )
+    assert loaded == "[]"
+
+
+def test_ocr_worker_process_does_not_import_bot_web(tmp_path):
+    # Fake easyocr so the worker can start without the real model
+    (tmp_path / "easyocr.py").write_text(
+        "class Reader:\n"
+        "    def __init__(self, langs, gpu=False):\n"
+        "        pass\n"
+        "    def readtext(self, image):\n"
+        "        return []\n"
+    )
+    (tmp_path / "probe.py").write_text(
+        textwrap.dedent(
+            """
+            import sys
+
+            from bot.core import ocr_worker
+
+
+            def probe(index, requests, results):
+                results.put(sorted(m for m in sys.modules if m == "bot.web" or m.startswith("bot.web.")))
+                ocr_worker.worker_main(index, requests, results)
+            """
+        )
+    )
+    report = _run(
+        f"""
+        import multiprocessing, runpy, sys
+        sys.path[:0] = [{str(tmp_path)!r}, {str(ROOT)!r}]
+
+        if __name__ == "__main__":
+            import probe
+            mp = multiprocessing.get_context("spawn")
+            requests, results = mp.Queue(), mp.Queue()
+            proc = mp.Process(target=probe.probe, args=(0, requests, results), daemon=True)
+            proc.start()
+            print(results.get(timeout=60))
+            requests.put(("load", ("en",)))
+            print(results.get(timeout=60)[0])
+            requests.put(None)
+            proc.join(timeout=10)
+        """
+    )
+    imported, loaded = report.splitlines()
+    assert imported == "[]"
+    assert loaded == "loaded"
+
+
+def test_dead_worker_fails_pending_reads_and_is_respawned(tmp_path):
+    # Fake easyocr whose worker dies on a bright crop
+    (tmp_path / "easyocr.py").write_text(
+        "import os\n"
+        "class Reader:\n"
+        "    def __init__(self, langs, gpu=False):\n"
+        "        pass\n"
+        "    def readtext(self, image):\n"
+        "        if image.mean() > 128:\n"
+        "            os._exit(3)\n"
+        "        return []\n"
+    )
+    report = _run(
+        f"""
+        import sys, time
+        sys.path[:0] = [{str(tmp_path)!r}, {str(ROOT)!r}]
+
+        if __name__ == "__main__":
+            import numpy as np
+            from bot.core import ocr
+
+            ocr._RESPAWN_MIN_S = 0.0
+            pool = ocr._ProcessPool(1)
+            key = ("en",)
+            assert pool.preload(key).wait(60)
+            started = time.time()
+            crash = pool.submit(np.full((8, 8, 3), 255, np.uint8), key)
+            print(type(crash.exception(timeout=30)).__name__, time.time() - started < 10)
+            assert pool.preload(key).wait(60)
+            print(pool.submit(np.zeros((8, 8, 3), np.uint8), key).result(timeout=30), pool.respawns)
+            pool.close()
+        """
+    )
+    failed, after = report.splitlines()
+    assert failed == "RuntimeError True"
+    assert after == "[] 1"
@@ -0,0 +1,82 @@
+import threading
+
+import cv2
+import numpy as np
+
+from bot.actions.ocr import ReadText
+from bot.core.state_machine import Context, GraphState, GraphStep
+
+_FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+def _write_atlas(folder):
+    folder.mkdir(parents=True)
+    for char, stem in [(str(d), str(d)) for d in range(10)] + [(":", "colon")]:
+        img = np.zeros((40, 30), np.uint8)
+        cv2.putText(img, char, (4, 32), _FONT, 1.0, 255, 2)
+        cv2.imwrite(str(folder / f"{stem}.png"), img)
+
+
+def _frame(left_text, right_text):
+    frame = np.zeros((60, 400, 3), np.uint8)
+    cv2.putText(frame, left_text, (10, 45), _FONT, 1.0, (255, 255, 255), 2)
+    cv2.putText(frame, right_text, (210, 45), _FONT, 1.0, (255, 255, 255), 2)
+    return frame
+
+
+class _SlowRead(ReadText):
+    """ReadText that finishes only after ``release`` is set."""
+
+    release = None
+
+    def _read_digits(self, ctx, roi):
+        self.release.wait(5)
+        return super()._read_digits(ctx, roi)
+
+
+def test_two_readtexts_in_one_parallel_step(tmp_path):
+    _write_atlas(tmp_path / "glyphs" / "digits")
+    ctx = Context(window_title_substr="test", templates_dir=tmp_path)
+    ctx.frame_bgr = _frame("12", "3:05")
+    ctx.window_rect = (0, 0, 400, 60)
+    ctx.frame_stale = False
+
+    release = threading.Event()
+    first = _SlowRead(name="count", region_pct=(0.0, 0.0, 0.5, 1.0), engine="digits")
+    first.release = release
+
+    class _Second(ReadText):
+        def _read_digits(self, ctx, roi):
+            text = super()._read_digits(ctx, roi)
+            # The second-declared read finishes first
+            release.set()
+            return text
+
+    second = _Second(name="timer", region_pct=(0.5, 0.0, 0.5, 1.0), engine="digits")
+    graph = GraphState([GraphStep("read", [first, second], parallel=True, merge="any")], start="read")
+
+    graph.run_once(ctx)
+
+    assert ctx.ocr_reads["count"]["text"] == "12"
+    assert ctx.ocr_reads["count"]["int"] == 12
+    assert ctx.ocr_reads["timer"]["text"] == "3:05"
+    assert ctx.ocr_reads["timer"]["seconds"] == 185
+    # last_ocr_* follow declaration order, not completion order
+    assert ctx.last_ocr_text == "3:05"
+    assert ctx.last_ocr_seconds == 185
+    assert ctx.ocr_reads["count"]["ts"] >= ctx.ocr_reads["timer"]["ts"]
+
+
+def test_parallel_readtext_leaves_context_untouched_until_join(tmp_path):
+    _write_atlas(tmp_path / "glyphs" / "digits")
+    ctx = Context(window_title_substr="test", templates_dir=tmp_path)
+    ctx.frame_bgr = _frame("12", "3:05")
+    ctx.window_rect = (0, 0, 400, 60)
+
+    action = ReadText(name="count", region_pct=(0.0, 0.0, 0.5, 1.0), engine="digits")
+    result, commit = action.run_deferred(ctx)
+    assert result is None
+    assert ctx.ocr_reads == {} and ctx.last_ocr_text == ""
+    commit()
+    assert ctx.ocr_reads["count"]["int"] == 12
+    assert ctx.last_ocr_int == 12
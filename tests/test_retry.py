@@ -0,0 +1,58 @@
+import numpy as np
+
+from bot.actions.retry import Retry
+from bot.core.state_machine import Context
+
+
+class _FakeCapture:
+    """Stands in for a capture: installs the next frame on the context."""
+
+    def __init__(self, frames):
+        self.name = "capture"
+        self._frames = iter(frames)
+
+    def run(self, ctx):
+        ctx.frame_bgr, ctx.frame_roi_pct = next(self._frames)
+        ctx.captures_taken += 1
+        return None
+
+
+class _Reader:
+    def __init__(self):
+        self.name = "read"
+        self.region_pct = (0.0, 0.0, 0.5, 0.5)
+        self.runs = 0
+
+    def run(self, ctx):
+        self.runs += 1
+        return False
+
+
+def _ctx():
+    ctx = Context(window_title_substr="test")
+    ctx.window_rect = (0, 0, 64, 64)
+    return ctx
+
+
+def _roi_frame(value):
+    # ROI-only capture of the bottom-right quarter: black over the watched region
+    frame = np.zeros((64, 64, 3), np.uint8)
+    frame[32:, 32:] = value
+    return frame, (0.5, 0.5, 0.5, 0.5)
+
+
+def test_unchanged_full_frames_end_the_retry():
+    frame = np.full((64, 64, 3), 90, np.uint8)
+    reader = _Reader()
+    retry = Retry(name="r", actions=[_FakeCapture([(frame, None)] * 3), reader], attempts=3, exit_if_unchanged=True)
+    assert retry.run(_ctx()) is False
+    assert reader.runs == 1
+
+
+def test_roi_frames_outside_the_watched_region_are_not_compared():
+    reader = _Reader()
+    frames = [_roi_frame(v) for v in (10, 120, 240)]
+    retry = Retry(name="r", actions=[_FakeCapture(frames), reader], attempts=3, exit_if_unchanged=True)
+    assert retry.run(_ctx()) is False
+    # The black watched region looked identical every time; all attempts still ran
+    assert reader.runs == 3
@@ -0,0 +1,86 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from bot.actions import screenshot
+from bot.actions.screenshot import Screenshot
+from bot.core.state_machine import Context, GraphState, GraphStep
+
+
+def _fake_capture(ctx, roi_pct=None):
+    rect = SimpleNamespace(left=0, top=0, width=40, height=30, to_tuple=lambda: (0, 0, 40, 30))
+    raw = np.zeros((30, 40, 4), np.uint8)
+    return screenshot._store_frame(ctx, raw, rect, None, None)
+
+
+class _Check:
+    """Read-only step action that always fails."""
+
+    frame_safe = True
+
+    def __init__(self, name):
+        self.name = name
+
+    def run(self, ctx):
+        return False
+
+
+class _Click:
+    name = "click"
+
+    def run(self, ctx):
+        return True
+
+
+def _ctx(monkeypatch):
+    monkeypatch.setattr(screenshot, "capture_frame", _fake_capture)
+    return Context(window_title_substr="test")
+
+
+def test_next_step_reuses_the_frame_just_captured(monkeypatch):
+    ctx = _ctx(monkeypatch)
+    graph = GraphState(
+        [
+            GraphStep("units", [Screenshot("cap_units"), _Check("units")], on_failure="close"),
+            GraphStep("close", [Screenshot("cap_close"), _Check("close")], on_failure="units"),
+        ],
+        start="units",
+    )
+    graph.run_once(ctx)
+    graph.run_once(ctx)
+    assert (ctx.captures_taken, ctx.captures_skipped) == (1, 1)
+
+
+def test_loop_through_one_screenshot_captures_every_pass(monkeypatch):
+    ctx = _ctx(monkeypatch)
+    graph = GraphState([GraphStep("poll", [Screenshot("cap"), _Check("poll")], on_failure="poll")], start="poll")
+    for _ in range(3):
+        graph.run_once(ctx)
+    assert (ctx.captures_taken, ctx.captures_skipped) == (3, 0)
+
+
+def test_input_or_roi_or_age_forces_a_capture(monkeypatch):
+    ctx = _ctx(monkeypatch)
+    first, second = Screenshot("first"), Screenshot("second")
+    graph = GraphState(
+        [
+            GraphStep("a", [first, _Click()], on_success="b"),
+            GraphStep("b", [second, _Check("b")], on_failure="a"),
+        ],
+        start="a",
+    )
+    graph.run_once(ctx)
+    graph.run_once(ctx)
+    assert ctx.captures_skipped == 0
+
+    ctx.frame_stale = True
+    first.run(ctx)
+    ctx.frame_roi_pct = (0.0, 0.0, 0.5, 0.5)
+    second.run(ctx)
+    assert ctx.captures_skipped == 0
+
+    ctx.frame_stale = True
+    first.run(ctx)
+    ctx.frame_ts -= screenshot.FRESH_FRAME_MAX_AGE_S + 0.1
+    second.run(ctx)
+    assert (ctx.captures_taken, ctx.captures_skipped) == (6, 0)
@@ -0,0 +1,93 @@
+from bot.core import window_locator
+from bot.core.window_locator import FakeBackend, WindowLocator
+
+
+class _Clock:
+    def __init__(self, start=1000.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+
+def _locator(monkeypatch, windows):
+    clock = _Clock()
+    monkeypatch.setattr(window_locator.time, "time", clock)
+    backend = FakeBackend(windows)
+    return WindowLocator(backend), backend, clock
+
+
+def test_cached_hit_inside_trust_window(monkeypatch):
+    loc, backend, clock = _locator(monkeypatch, {1: "Notepad", 2: "Call of Dragons"})
+    assert loc.find("call of dragons") == 2
+    clock.now += 0.5
+    assert loc.find("Call of Dragons") == 2
+    assert backend.enumerations == 1
+    assert loc.stats() == {"cached": 1, "claimed": 0, "hits": 1, "validations": 0, "enumerations": 1}
+
+
+def test_revalidates_after_trust_expires(monkeypatch):
+    loc, backend, clock = _locator(monkeypatch, {2: "Call of Dragons"})
+    loc.find("dragons")
+    clock.now += window_locator.VALIDATE_EVERY_S + 0.1
+    assert loc.find("dragons") == 2
+    # Validated in place; no second enumeration
+    assert backend.enumerations == 1
+    assert loc.stats()["validations"] == 1
+
+
+def test_enumerates_again_when_window_closed_hidden_or_retitled(monkeypatch):
+    loc, backend, clock = _locator(monkeypatch, {2: "Call of Dragons", 3: "Call of Dragons"})
+    assert loc.find("dragons") == 3
+    step = window_locator.VALIDATE_EVERY_S + 0.1
+
+    del backend.windows[3]  # closed
+    clock.now += step
+    assert loc.find("dragons") == 2
+    assert backend.enumerations == 2
+
+    backend.hidden.add(2)  # hidden
+    backend.windows[4] = "Call of Dragons"
+    clock.now += step
+    assert loc.find("dragons") == 4
+    assert backend.enumerations == 3
+
+    backend.windows[4] = "Loading..."  # retitled
+    clock.now += step
+    assert loc.find("dragons") is None
+    assert backend.enumerations == 4
+    assert loc.stats()["cached"] == 0
+
+
+def test_expire_forces_revalidation_inside_trust_window(monkeypatch):
+    loc, backend, clock = _locator(monkeypatch, {2: "Call of Dragons", 5: "Call of Dragons"})
+    assert loc.find("dragons") == 5
+    del backend.windows[5]
+    # Still trusted without an event
+    assert loc.find("dragons") == 5
+    loc.expire(5)
+    assert loc.find("dragons") == 2
+
+
+def test_owners_claim_distinct_windows_and_release(monkeypatch):
+    loc, backend, clock = _locator(monkeypatch, {1: "Call of Dragons", 2: "Call of Dragons"})
+    main = loc.find("dragons", owner="main")
+    alt = loc.find("dragons", owner="alt")
+    assert {main, alt} == {1, 2}
+    assert loc.owner_of(main) == "main" and loc.owner_of(alt) == "alt"
+    # A third instance finds nothing free
+    assert loc.find("dragons", owner="third") is None
+    # Lookups without an owner ignore claims
+    assert loc.find("dragons") in (1, 2)
+
+    loc.release("alt")
+    assert loc.owner_of(alt) is None
+    assert loc.find("dragons", owner="third") == alt
+    assert loc.stats()["claimed"] == 2
+
+
+def test_hint_for_a_claimed_window_is_not_used(monkeypatch):
+    loc, backend, clock = _locator(monkeypatch, {1: "Call of Dragons", 2: "Call of Dragons"})
+    main = loc.find("dragons", owner="main")
+    other = loc.find("dragons", hint=main, owner="alt")
+    assert other is not None and other != main